@@ -0,0 +1,148 @@
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+from enum import Enum
+from threading import Lock
+import copy
+import json
+import logging
+import time
+from django.conf import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache bounds used when the settings do not say otherwise
+DEFAULT_CACHE_MAX_ENTRIES = 256
+DEFAULT_CACHE_MAX_ROWS = 200_000
+DEFAULT_CACHE_TTL = 300
+
+
+def result_rows(value: Any) -> int:
+    """Rough size of a transform result: the rows it holds (at least 1)"""
+    if isinstance(value, dict):
+        rows = value.get("data", value.get("groups"))
+        if isinstance(rows, list):
+            return max(len(rows), 1)
+    return 1
+
+
+def make_key(*parts: Any) -> str:
+    """Canonical cache key of validated parameters; enums are keyed by value, other objects by str()"""
+    return json.dumps(parts, sort_keys=True, default=lambda value: value.value if isinstance(value, Enum) else str(value))
+
+
+class ResultCache:
+    """
+    Bounded LRU cache with a TTL for results computed from one dataset.
+
+    Every entry belongs to the dataset generation it was computed at. Seeing
+    a newer generation drops all older entries, and lookups from an older
+    generation (a request that raced a write) neither read nor store, so a
+    result is never served after a write that could have changed it. Size is
+    bounded both by entry count and by the total number of rows held.
+
+    Values are copied on the way in and out, so a caller that mutates a
+    result it stored or was served cannot change what later callers get.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+        max_rows: int = DEFAULT_CACHE_MAX_ROWS,
+        ttl: float = DEFAULT_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._rows = 0
+        self._generation = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def _advance(self, generation: int) -> bool:
+        """Move to `generation` if it is newer; False for a stale generation. Lock held."""
+        if generation > self._generation:
+            self._counters["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._rows = 0
+            self._generation = generation
+        return generation == self._generation
+
+    def _remove(self, key: Hashable) -> None:
+        """Drop one entry. Lock held."""
+        _, rows, _ = self._entries.pop(key)
+        self._rows -= rows
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        """Cached value for `key` at `generation`, or None"""
+        with self._lock:
+            if not self._advance(generation) or key not in self._entries:
+                self._counters["misses"] += 1
+                return None
+            expires, _, value = self._entries[key]
+            if expires <= self.clock():
+                self._remove(key)
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, generation: int, value: Any) -> None:
+        """Store a value computed at `generation`"""
+        rows = result_rows(value)
+        value = copy.deepcopy(value)
+        with self._lock:
+            if not self._advance(generation) or rows > self.max_rows:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + self.ttl, rows, value)
+            self._rows += rows
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def get_or_compute(self, key: Hashable, generation: int, compute: Callable[[], Any]) -> Any:
+        """Cached value, computing and storing it on a miss"""
+        value = self.get(key, generation)
+        if value is None:
+            value = compute()
+            self.put(key, generation, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry and reset the generation and counters"""
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+            self._generation = 0
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio": self._counters["hits"] / lookups if lookups else None,
+                "entries": len(self._entries),
+                "rows": self._rows,
+                "generation": self._generation,
+                "max_entries": self.max_entries,
+                "max_rows": self.max_rows,
+                "ttl": self.ttl,
+            }
+
+
+# Process-wide cache of transform results
+transform_cache = ResultCache(
+    max_entries=getattr(settings, "TRANSFORM_CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES),
+    max_rows=getattr(settings, "TRANSFORM_CACHE_MAX_ROWS", DEFAULT_CACHE_MAX_ROWS),
+    ttl=getattr(settings, "TRANSFORM_CACHE_TTL", DEFAULT_CACHE_TTL),
+)
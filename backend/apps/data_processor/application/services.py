@@ -1,16 +1,33 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, AsyncIterator, Callable, Tuple
+from itertools import islice
+from asgiref.sync import sync_to_async
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from pydantic import ValidationError
 import logging
 from apps.data_processor.domain.models import DataItem, DataSet, TransformationType
 from apps.data_processor.domain.schemas import (
     DataItemSchema, DataSetSchema, FilterParamsSchema, 
-    SortParamsSchema, AggregateParamsSchema, TransformationTypeEnum
+    SortParamsSchema, AggregateParamsSchema, GroupParamsSchema, TransformationTypeEnum
+)
+from apps.data_processor.domain.sketches import approximate_aggregate, new_sketch, sketch_result
+from apps.data_processor.infrastructure.repositories import (
+    DataEntryRepository, aiter_domain, aiter_domain_batches, aiter_field_values
+)
+from apps.data_processor.infrastructure.queries import supports_json_queries
+from apps.data_processor.application.ingestion import IngestionPipeline
+from apps.data_processor.application.cache import transform_cache
+from apps.data_processor.application.transforms import (
+    Compute, Query, Rows, Step, Steps, changes_steps, products_steps, run_steps, transform_key, transform_steps
 )
-from apps.data_processor.infrastructure.repositories import DataEntryRepository
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Rows per batch when the async service streams the table
+ASYNC_BATCH_SIZE = 1000
+
+
 class DataProcessingService:
     """Service for processing and transforming data"""
     
@@ -20,116 +37,224 @@ class DataProcessingService:
     
     def process_data(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Process raw input data and store in database"""
-        # Convert input data to domain models using Pydantic schemas
-        data_items = []
-        
+        # Items without a name are skipped rather than rejected
+        records = []
         for item_data in data:
-            try:
-                # Log the raw item
-                logger.debug(f"Processing raw item: {item_data}")
-                
-                # Ensure required fields exist (name, price, quantity, category)
-                if 'name' not in item_data or not item_data['name']:
-                    logger.warning(f"Skipping item with missing name: {item_data}")
-                    continue
-                    
-                # Validate with Pydantic schema
-                schema = DataItemSchema.parse_obj(item_data)
-                
-                # Log validated schema
-                logger.debug(f"Validated schema: id={schema.id}, name={schema.name}, " +
-                            f"price={schema.price}, quantity={schema.quantity}, " +
-                            f"category={schema.category}")
-                logger.debug(f"Numeric fields: {schema.numeric_fields}")
-                logger.debug(f"String fields: {schema.string_fields}")
-                
-                # Convert to domain model
-                domain_item = schema.to_domain()
-                data_items.append(domain_item)
-                
-                # Log domain item
-                logger.debug(f"Domain item: id={domain_item.id}, " +
-                            f"numeric_fields={domain_item.numeric_fields}, " +
-                            f"string_fields={domain_item.string_fields}")
-            except Exception as e:
-                logger.error(f"Error processing item {item_data}: {str(e)}")
-                raise
+            if 'name' not in item_data or not item_data['name']:
+                logger.warning(f"Skipping item with missing name: {item_data}")
+                continue
+            records.append(item_data)
         
         # Skip processing if no valid items
-        if not data_items:
+        if not records:
             logger.warning("No valid items to process")
             return []
-            
-        # Store data items
-        created_entries = self.repository.create_many(data_items)
         
-        # Return stored data
-        result = [entry.to_domain().to_dict() for entry in created_entries]
-        logger.info(f"Created {len(result)} entries")
-        return result
+        # Each item is validated once and inserted straight from the schema
+        return IngestionPipeline(self.session).ingest(records)
     
-    def transform_data(self, transformation_type: str, **params) -> Dict[str, Any]:
-        """Transform data based on transformation type and parameters"""
-        try:
-            # Log transformation request
-            logger.info(f"Transforming data with type: {transformation_type}, params: {params}")
-            
-            # Get all data as domain objects
-            dataset = self.repository.get_all_as_domain()
+    def process_stream(self, records: Iterable[Tuple[int, Any]], chunk_size: int) -> Iterator[Dict[str, Any]]:
+        """
+        Validate and store streamed records in chunks of `chunk_size`, committing
+        each chunk before the next one is read, so memory is bounded by the chunk
+        rather than the upload. Records are (line number, record) pairs, where the
+        record may be the exception that prevented parsing it. Invalid records
+        are skipped and reported. Yields one progress event per chunk and a
+        final summary event.
+        """
+        pipeline = IngestionPipeline(self.session)
+        records = iter(records)
+        totals = {"chunks": 0, "received": 0, "created": 0, "failed": 0}
+        
+        while True:
+            with pipeline.stats.stage("parse") as timing:
+                chunk = list(islice(records, chunk_size))
+                timing["items"] = len(chunk)
+            if not chunk:
+                break
             
-            # Apply transformation
-            if transformation_type == TransformationTypeEnum.FILTER:
-                # Parameters already validated by Pydantic in the view
-                field = params.get('field')
-                value = params.get('value')
-                operator = params.get('operator')
-                
-                logger.debug(f"Filtering by field: {field}, value: {value} ({type(value)}), operator: {operator}")
-                
-                # Handle ID field specially
-                if field == 'id' and not isinstance(value, int):
-                    try:
-                        value = int(value)
-                    except (ValueError, TypeError):
-                        logger.error(f"Invalid ID value: {value}")
-                        raise ValueError(f"ID must be an integer, got {value}")
-                
-                # Handle numeric fields
-                if field in ('price', 'quantity') and not isinstance(value, (int, float)):
-                    try:
-                        value = float(value)
-                    except (ValueError, TypeError):
-                        logger.error(f"Invalid numeric value for {field}: {value}")
-                        raise ValueError(f"{field.capitalize()} must be a number, got {value}")
-                
-                result = dataset.filter(field, value, operator)
-                if not result.items:
-                    logger.info(f"No results found for filter: {field}={value} with operator {operator}")
-                return {"data": result.to_dict()}
-                
-            elif transformation_type == TransformationTypeEnum.SORT:
-                # Parameters already validated by Pydantic in the view
-                field = params.get('field')
-                ascending = params.get('ascending')
-                
-                logger.debug(f"Sorting by field: {field}, ascending: {ascending}")
-                
-                result = dataset.sort(field, ascending)
-                return {"data": result.to_dict()}
-                
-            elif transformation_type == TransformationTypeEnum.AGGREGATE:
-                # Parameters already validated by Pydantic in the view
-                field = params.get('field')
-                operation = params.get('operation')
-                
-                logger.debug(f"Aggregating field: {field}, operation: {operation}")
-                
-                result = dataset.aggregate(field, operation)
-                return result
+            entries = []
+            errors = []
+            with pipeline.stats.stage("validate", items=len(chunk)):
+                for line, record in chunk:
+                    if isinstance(record, Exception):
+                        errors.append({"line": line, "error": str(record)})
+                    elif not isinstance(record, dict):
+                        errors.append({"line": line, "error": "Each record must be an object"})
+                    elif not record.get('name'):
+                        errors.append({"line": line, "error": "Product name is required"})
+                    else:
+                        try:
+                            entries.append(pipeline.to_entry(record))
+                        except ValidationError as e:
+                            errors.append({"line": line, "error": "Invalid data format", "details": e.errors()})
             
-            logger.error(f"Unsupported transformation type: {transformation_type}")
-            raise ValueError(f"Unsupported transformation type: {transformation_type}")
+            created_entries = pipeline.insert(entries)
             
+            totals["chunks"] += 1
+            totals["received"] += len(chunk)
+            totals["created"] += len(created_entries)
+            totals["failed"] += len(errors)
+            logger.info(f"Stored upload chunk {totals['chunks']}: {len(created_entries)} created, {len(errors)} failed")
+            yield {
+                "chunk": totals["chunks"],
+                "received": len(chunk),
+                "created": len(created_entries),
+                "failed": len(errors),
+                "ids": [entry.id for entry in created_entries],
+                "errors": errors,
+            }
+        
+        logger.info(f"Finished upload: {totals}")
+        yield {"done": True, **totals}
+    
+    def get_products(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get all products, or one keyset page of them when a limit is given"""
+        return run_steps(products_steps(limit, cursor), self._execute)
+    
+    def get_changes(self, since: int) -> Dict[str, Any]:
+        """
+        Products created or updated after watermark `since`, ids of deleted
+        products and the new watermark. Watermark 0, or one the dataset no
+        longer knows, returns every product with `reset` set.
+        """
+        return run_steps(changes_steps(since), self._execute)
+    
+    def transform_data(
+        self,
+        transformation_type: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        **params
+    ) -> Dict[str, Any]:
+        """
+        Transform data based on transformation type and parameters.
+        Filter and sort results are paginated by keyset when a limit is given.
+        Results are cached per validated parameters and dataset generation,
+        so they are recomputed only after a write.
+        """
+        key = transform_key(transformation_type, limit, cursor, params)
+        generation = self.repository.generations.current()
+        return transform_cache.get_or_compute(
+            key, generation,
+            lambda: self._transform_data(transformation_type, limit, cursor, **params)
+        )
+    
+    def _transform_data(
+        self,
+        transformation_type: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        **params
+    ) -> Dict[str, Any]:
+        """Compute a transformation (uncached)"""
+        try:
+            steps = transform_steps(transformation_type, limit, cursor, supports_json_queries(self.session), **params)
+            return run_steps(steps, self._execute)
         except Exception as e:
             logger.error(f"Error in transform_data: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+    
+    def _execute(self, step: Step) -> Any:
+        """Run one step of a transforms plan in the calling thread"""
+        if isinstance(step, Query):
+            return step.call(self.repository)
+        if isinstance(step, Rows):
+            return DataSet(items=list(self.repository.iter_domain(where=step.where)))
+        if isinstance(step, Compute):
+            return step.call()
+        values = self.repository.iter_field_values(step.field, numeric_only=step.operation == "approx_percentile")
+        return approximate_aggregate(values, step.operation, step.percentile)
+
+
+class AsyncDataProcessingService:
+    """
+    DataProcessingService for async views, over an AsyncSession.
+
+    Both services run the same plans from application.transforms; only the
+    steps are executed differently. Queries go through AsyncSession.run_sync:
+    SQLAlchemy executes the sync repository in a greenlet whose database I/O
+    is awaited on the event loop by the asyncio driver (asyncpg, aiosqlite).
+    That greenlet runs on the loop's thread, so only bounded queries go
+    through it. Whole-table reads are streamed in batches, yielding to other
+    requests between them, and the CPU-bound steps (validation, sorting,
+    in-memory filters and aggregations, sketches, serialization) run in a
+    worker thread, so one large request does not stall the others.
+    """
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def _run(self, call: Callable[[DataProcessingService], Any]) -> Any:
+        return await self.session.run_sync(lambda session: call(DataProcessingService(session)))
+    
+    @staticmethod
+    async def _compute(function: Callable[..., Any], *args) -> Any:
+        """Run CPU-bound work in a worker thread rather than on the event loop"""
+        return await sync_to_async(function, thread_sensitive=False)(*args)
+    
+    async def _run_steps(self, steps: Steps) -> Dict[str, Any]:
+        """run_steps, awaiting each step"""
+        result = None
+        while True:
+            try:
+                step = steps.send(result)
+            except StopIteration as stop:
+                return stop.value
+            result = await self._execute(step)
+    
+    async def _execute(self, step: Step) -> Any:
+        """Run one step of a transforms plan without blocking the event loop"""
+        if isinstance(step, Query):
+            return await self._run(lambda service: step.call(service.repository))
+        if isinstance(step, Rows):
+            items = []
+            async for batch in aiter_domain_batches(self.session, ASYNC_BATCH_SIZE, step.where):
+                items.extend(batch)
+            return DataSet(items=items)
+        if isinstance(step, Compute):
+            return await self._compute(step.call)
+        sketch = new_sketch(step.operation)
+        numeric_only = step.operation == "approx_percentile"
+        async for values in aiter_field_values(self.session, step.field, numeric_only, ASYNC_BATCH_SIZE):
+            await self._compute(sketch.update, values)
+        return sketch_result(sketch, step.operation, step.percentile)
+    
+    async def ingest(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate, store and serialize a batch of raw records"""
+        # Validation and serialization touch no session; only the insert is awaited
+        pipeline = IngestionPipeline(self.session.sync_session)
+        entries = await self._compute(pipeline.validate, records)
+        stored = await self.session.run_sync(lambda session: pipeline.insert(entries))
+        result = await self._compute(pipeline.serialize, stored)
+        logger.info(f"Ingested {len(result)} entries")
+        return result
+    
+    async def get_products(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get all products, or one keyset page of them when a limit is given"""
+        return await self._run_steps(products_steps(limit, cursor))
+    
+    async def get_changes(self, since: int) -> Dict[str, Any]:
+        """Products changed and ids deleted since watermark `since`, and the new watermark"""
+        return await self._run_steps(changes_steps(since))
+    
+    async def transform_data(
+        self,
+        transformation_type: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        **params
+    ) -> Dict[str, Any]:
+        """Transform data based on transformation type and parameters, cached like the sync service"""
+        key = transform_key(transformation_type, limit, cursor, params)
+        generation = await self._run(lambda service: service.repository.generations.current())
+        result = transform_cache.get(key, generation)
+        if result is None:
+            json_queries = supports_json_queries(self.session.sync_session)
+            result = await self._run_steps(transform_steps(transformation_type, limit, cursor, json_queries, **params))
+            transform_cache.put(key, generation, result)
+        return result
+    
+    def iter_products(self) -> AsyncIterator[DataItem]:
+        """All products in id order, streamed in batches"""
+        return aiter_domain(self.session)
@@ -0,0 +1,242 @@
+from typing import Any, Callable, Dict, Generator, Optional
+from dataclasses import dataclass
+import logging
+from sqlalchemy.sql import ColumnElement
+from apps.data_processor.domain.expressions import compile_predicate
+from apps.data_processor.domain.models import DataSet
+from apps.data_processor.domain.schemas import TransformationTypeEnum
+from apps.data_processor.domain.sketches import APPROXIMATE_OPERATIONS, DEFAULT_PERCENTILE
+from apps.data_processor.domain.statistics import DEFAULT_HISTOGRAM_BINS
+from apps.data_processor.infrastructure.queries import compile_expression, compile_filter
+from apps.data_processor.infrastructure.repositories import (
+    DataEntryRepository, changed_between, get_tombstone_retention
+)
+from apps.data_processor.application.cache import make_key
+from shared.utils.pagination import encode_cursor, decode_cursor
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Query:
+    """A bounded database call: `call` gets the repository"""
+    call: Callable[[DataEntryRepository], Any]
+
+
+@dataclass(frozen=True)
+class Rows:
+    """Every entry matching `where` (all of them when None) as a DataSet in id order"""
+    where: Optional[ColumnElement] = None
+
+
+@dataclass(frozen=True)
+class Compute:
+    """CPU-bound work over data already loaded"""
+    call: Callable[[], Any]
+
+
+@dataclass(frozen=True)
+class Sketch:
+    """An approximate aggregation of a field's values, streamed from the database"""
+    field: str
+    operation: str
+    percentile: float
+
+
+Step = Any
+Steps = Generator[Step, Any, Dict[str, Any]]
+
+
+def run_steps(steps: Steps, execute: Callable[[Step], Any]) -> Dict[str, Any]:
+    """Drive a step generator, sending each step's result back into it"""
+    result = None
+    while True:
+        try:
+            step = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result = execute(step)
+
+
+def coerce_filter_value(field: str, value: Any) -> Any:
+    """Convert a filter value to the type of the id and numeric fields"""
+    # Handle ID field specially
+    if field == 'id' and not isinstance(value, int):
+        try:
+            value = int(value)
+        except (ValueError, TypeError):
+            logger.error(f"Invalid ID value: {value}")
+            raise ValueError(f"ID must be an integer, got {value}")
+
+    # Handle numeric fields
+    if field in ('price', 'quantity') and not isinstance(value, (int, float)):
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            logger.error(f"Invalid numeric value for {field}: {value}")
+            raise ValueError(f"{field.capitalize()} must be a number, got {value}")
+    return value
+
+
+def transform_key(transformation_type: Any, limit: Optional[int], cursor: Optional[str], params: Dict[str, Any]) -> str:
+    """Key of a transform result in transform_cache, shared by the sync and async services"""
+    return make_key(getattr(transformation_type, 'value', transformation_type), limit, cursor, params)
+
+
+def paginate(
+    repository: DataEntryRepository,
+    limit: int,
+    cursor: Optional[str],
+    scope: Dict[str, Any],
+    **page_args
+) -> Dict[str, Any]:
+    """Fetch one keyset page and wrap its position in an opaque cursor bound to `scope`"""
+    after = decode_cursor(cursor, scope) if cursor else None
+    page, next_position = repository.get_page(limit, after=after, **page_args)
+    next_cursor = encode_cursor(next_position, scope) if next_position is not None else None
+    return {"data": page.to_dict(), "next_cursor": next_cursor}
+
+
+def products_steps(limit: Optional[int], cursor: Optional[str]) -> Steps:
+    """All products, or one keyset page of them when a limit is given"""
+    if limit is not None:
+        return (yield Query(lambda repository: paginate(repository, limit, cursor, {"transformation": "products"})))
+    dataset = yield Rows()
+    return {"data": (yield Compute(dataset.to_dict))}
+
+
+def changes_steps(since: int) -> Steps:
+    """
+    Products written after watermark `since`, ids of deleted products and
+    the new watermark. Watermark 0, one the dataset no longer knows, or one
+    older than the tombstone retention returns every product with `reset` set.
+    """
+    watermark = yield Query(lambda repository: repository.generations.current())
+    if since and watermark - get_tombstone_retention() <= since <= watermark:
+        changed = yield Rows(changed_between(since, watermark))
+        deleted = yield Query(lambda repository: repository.deleted_between(since, watermark))
+        if since >= (yield Query(lambda repository: repository.tombstone_horizon())):
+            return {"data": (yield Compute(changed.to_dict)), "deleted": deleted, "watermark": watermark, "reset": False}
+
+    dataset = yield Rows()
+    return {"data": (yield Compute(dataset.to_dict)), "deleted": [], "watermark": watermark, "reset": True}
+
+
+def transform_steps(
+    transformation_type: str,
+    limit: Optional[int],
+    cursor: Optional[str],
+    json_queries: bool,
+    **params
+) -> Steps:
+    """
+    Compute a transformation (uncached). Filter and sort results are
+    paginated by keyset when a limit is given. `json_queries` tells whether
+    the database evaluates JSON path predicates; without it the rows are
+    filtered and aggregated in memory.
+    """
+    # Log transformation request
+    logger.info(f"Transforming data with type: {transformation_type}, params: {params}")
+
+    if transformation_type == TransformationTypeEnum.FILTER and params.get('where') is not None:
+        # Boolean expression, already parsed by FilterExpressionParamsSchema
+        where = params['where']
+
+        logger.debug(f"Filtering by expression: {where}")
+
+        if limit is not None:
+            scope = {"transformation": "filter", "where": str(where)}
+            return (yield Query(lambda repository: paginate(repository, limit, cursor, scope, where=where)))
+
+        # Compiled once, to SQL or to a single in-memory pass
+        condition = compile_expression(where) if json_queries else None
+        if condition is None:
+            dataset = yield Rows()
+            predicate = compile_predicate(where)
+            return (yield Compute(lambda: {"data": [item.to_dict() for item in dataset.items if predicate(item)]}))
+        dataset = yield Rows(condition)
+        return {"data": (yield Compute(dataset.to_dict))}
+
+    elif transformation_type == TransformationTypeEnum.FILTER:
+        # Parameters already validated by Pydantic in the view
+        field = params.get('field')
+        value = params.get('value')
+        operator = params.get('operator')
+
+        logger.debug(f"Filtering by field: {field}, value: {value} ({type(value)}), operator: {operator}")
+
+        value = coerce_filter_value(field, value)
+
+        if limit is not None:
+            scope = {"transformation": "filter", "field": field, "value": value, "operator": operator}
+            return (yield Query(
+                lambda repository: paginate(repository, limit, cursor, scope, filter_params=(field, value, operator))
+            ))
+
+        # Filter in the database rather than loading every row
+        condition = compile_filter(field, value, operator) if json_queries else None
+        if condition is None:
+            dataset = yield Rows()
+            result = yield Compute(lambda: dataset.filter(field, value, operator).to_dict())
+        else:
+            dataset = yield Rows(condition)
+            result = yield Compute(dataset.to_dict)
+        if not result:
+            logger.info(f"No results found for filter: {field}={value} with operator {operator}")
+        return {"data": result}
+
+    elif transformation_type == TransformationTypeEnum.SORT:
+        # Parameters already validated by Pydantic in the view
+        field = params.get('field')
+        ascending = params.get('ascending')
+
+        logger.debug(f"Sorting by field: {field}, ascending: {ascending}")
+
+        if limit is not None:
+            scope = {"transformation": "sort", "field": field, "ascending": ascending}
+            return (yield Query(
+                lambda repository: paginate(repository, limit, cursor, scope, sort_field=field, ascending=ascending)
+            ))
+
+        dataset = yield Rows()
+        return (yield Compute(lambda: {"data": dataset.sort(field, ascending).to_dict()}))
+
+    elif transformation_type == TransformationTypeEnum.AGGREGATE:
+        # Parameters already validated by Pydantic in the view
+        field = params.get('field')
+        operation = params.get('operation')
+        percentile = params.get('percentile', DEFAULT_PERCENTILE)
+        bins = params.get('bins', DEFAULT_HISTOGRAM_BINS)
+        lower = params.get('lower')
+        upper = params.get('upper')
+
+        logger.debug(f"Aggregating field: {field}, operation: {operation}")
+
+        if operation in APPROXIMATE_OPERATIONS and json_queries:
+            return {"result": (yield Sketch(field, operation, percentile))}
+
+        # Aggregate in the database; only the result is transferred
+        result = yield Query(lambda repository: repository.database_aggregate(field, operation, bins, lower, upper))
+        if result is None:
+            dataset = yield Rows()
+            result = yield Compute(lambda: dataset.aggregate(field, operation, percentile, bins, lower, upper))
+        return result
+
+    elif transformation_type == TransformationTypeEnum.GROUP:
+        # Parameters already validated by Pydantic in the view
+        group_by = params.get('group_by')
+        fields = params.get('fields')
+        operations = [getattr(operation, 'value', operation) for operation in params.get('operations')]
+
+        logger.debug(f"Grouping by: {group_by}, fields: {fields}, operations: {operations}")
+
+        # Every group and statistic comes from one GROUP BY scan
+        groups = yield Query(lambda repository: repository.database_group_aggregate(group_by, fields, operations))
+        if groups is None:
+            dataset = yield Rows()
+            groups = yield Compute(lambda: dataset.group_aggregate(group_by, fields, operations))
+        return {"groups": groups}
+
+    logger.error(f"Unsupported transformation type: {transformation_type}")
+    raise ValueError(f"Unsupported transformation type: {transformation_type}")
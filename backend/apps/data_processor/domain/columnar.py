@@ -0,0 +1,386 @@
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field as dataclass_field
+import numpy as np
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.domain.sketches import DEFAULT_PERCENTILE
+from apps.data_processor.domain.statistics import (
+    DEFAULT_HISTOGRAM_BINS, histogram_bounds, histogram_result, stats_result
+)
+
+# Largest magnitude up to which every int is exactly representable as a float64
+MAX_EXACT_INT = 2 ** 53
+
+
+@dataclass
+class NumericColumn:
+    """
+    A numeric_fields key stored as a float64 array.
+    `present` marks rows that have the key, `valid` the ones whose value could
+    be converted to float and `is_int` the ones that were plain ints, so rows
+    materialize with their original types. Values that are neither int nor
+    float (bools, numeric strings, ...) and ints beyond +-2**53, which
+    float64 would round, are kept verbatim in `raw`.
+    """
+    values: np.ndarray
+    present: np.ndarray
+    valid: np.ndarray
+    is_int: np.ndarray
+    raw: Dict[int, Any] = dataclass_field(default_factory=dict)
+
+    def take(self, indices: np.ndarray) -> "NumericColumn":
+        """Select rows by position"""
+        raw = {}
+        if self.raw:
+            positions = {int(old): new for new, old in enumerate(indices)}
+            raw = {positions[row]: value for row, value in self.raw.items() if row in positions}
+        return NumericColumn(
+            values=self.values[indices],
+            present=self.present[indices],
+            valid=self.valid[indices],
+            is_int=self.is_int[indices],
+            raw=raw
+        )
+
+    def value_at(self, row: int) -> Any:
+        """Materialize the original value of a row"""
+        if row in self.raw:
+            return self.raw[row]
+        value = self.values[row]
+        return int(value) if self.is_int[row] else float(value)
+
+
+@dataclass
+class StringColumn:
+    """
+    A string_fields key stored dictionary-encoded.
+    `codes` index into `categories`; -1 marks rows without the key.
+    """
+    codes: np.ndarray
+    categories: List[Any]
+
+    @property
+    def present(self) -> np.ndarray:
+        return self.codes >= 0
+
+    def take(self, indices: np.ndarray) -> "StringColumn":
+        """Select rows by position, sharing the dictionary"""
+        return StringColumn(codes=self.codes[indices], categories=self.categories)
+
+    def match(self, predicate) -> np.ndarray:
+        """
+        Evaluate a predicate once per distinct value and broadcast it to rows.
+        Rows without the key never match.
+        """
+        matches = np.array([bool(predicate(category)) for category in self.categories] + [False])
+        # Code -1 picks the trailing False
+        return matches[self.codes]
+
+
+def int_sum(values: np.ndarray) -> int:
+    """
+    Exact sum of float64-held ints (each within +-2**53): in int64 when it
+    cannot overflow, else with Python ints
+    """
+    if not len(values) or float(np.abs(values).max()) * len(values) < 2 ** 63:
+        return int(values.astype(np.int64).sum())
+    return sum(int(value) for value in values.tolist())
+
+
+class _Fallback(Exception):
+    """Raised internally when a column holds values only the row engine handles exactly"""
+
+
+class ColumnarDataSet:
+    """
+    Column-oriented alternative to DataSet backed by NumPy arrays.
+
+    filter evaluates vectorized boolean masks, sort uses a stable argsort and
+    aggregate uses array reductions. Results match DataSet for the same data;
+    the few inputs that cannot be handled vectorially (NaN or non-numeric
+    values in a sorted/aggregated column, mixed numeric and string keys)
+    are delegated to DataSet so the behaviour stays identical. Sums are
+    computed with NumPy's pairwise summation, so float results can differ
+    from DataSet's left-to-right sum in the last few ulps.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        id_valid: np.ndarray,
+        numeric: Dict[str, NumericColumn],
+        strings: Dict[str, StringColumn]
+    ):
+        self.ids = ids
+        self.id_valid = id_valid
+        self.numeric = numeric
+        self.strings = strings
+
+    @classmethod
+    def from_items(cls, items: List[DataItem]) -> "ColumnarDataSet":
+        """Build columns from a list of domain items in one pass"""
+        count = len(items)
+        ids = np.zeros(count, dtype=np.int64)
+        id_valid = np.zeros(count, dtype=bool)
+        numeric: Dict[str, Dict[str, Any]] = {}
+        strings: Dict[str, Dict[str, Any]] = {}
+
+        for row, item in enumerate(items):
+            if item.id is not None:
+                ids[row] = item.id
+                id_valid[row] = True
+
+            for key, value in item.numeric_fields.items():
+                column = numeric.get(key)
+                if column is None:
+                    column = numeric[key] = {
+                        "values": np.zeros(count), "present": np.zeros(count, dtype=bool),
+                        "valid": np.zeros(count, dtype=bool), "is_int": np.zeros(count, dtype=bool),
+                        "raw": {}
+                    }
+                column["present"][row] = True
+                value_type = type(value)
+                if value_type is float or (value_type is int and -MAX_EXACT_INT <= value <= MAX_EXACT_INT):
+                    column["values"][row] = value
+                    column["valid"][row] = True
+                    column["is_int"][row] = value_type is int
+                else:
+                    column["raw"][row] = value
+                    try:
+                        column["values"][row] = float(value)
+                        column["valid"][row] = True
+                    except (ValueError, TypeError, OverflowError):
+                        pass
+
+            for key, value in item.string_fields.items():
+                column = strings.get(key)
+                if column is None:
+                    column = strings[key] = {"codes": np.full(count, -1, dtype=np.int32), "lookup": {}}
+                lookup = column["lookup"]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(lookup)
+                column["codes"][row] = code
+
+        return cls(
+            ids=ids,
+            id_valid=id_valid,
+            numeric={key: NumericColumn(**column) for key, column in numeric.items()},
+            strings={
+                key: StringColumn(codes=column["codes"], categories=list(column["lookup"]))
+                for key, column in strings.items()
+            }
+        )
+
+    @classmethod
+    def from_dataset(cls, dataset: DataSet) -> "ColumnarDataSet":
+        """Build a columnar copy of a DataSet"""
+        return cls.from_items(dataset.items)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, indices: np.ndarray) -> "ColumnarDataSet":
+        """Select rows by position"""
+        return ColumnarDataSet(
+            ids=self.ids[indices],
+            id_valid=self.id_valid[indices],
+            numeric={key: column.take(indices) for key, column in self.numeric.items()},
+            strings={key: column.take(indices) for key, column in self.strings.items()}
+        )
+
+    def item_at(self, row: int) -> DataItem:
+        """Materialize one row as a domain item"""
+        return DataItem(
+            id=int(self.ids[row]) if self.id_valid[row] else None,
+            numeric_fields={
+                key: column.value_at(row)
+                for key, column in self.numeric.items() if column.present[row]
+            },
+            string_fields={
+                key: column.categories[column.codes[row]]
+                for key, column in self.strings.items() if column.codes[row] >= 0
+            }
+        )
+
+    @property
+    def items(self) -> List[DataItem]:
+        """Materialize all rows as domain items"""
+        return [self.item_at(row) for row in range(len(self))]
+
+    def to_dataset(self) -> DataSet:
+        """Convert back to the row-oriented DataSet"""
+        return DataSet(items=self.items)
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        """Convert to list of dictionaries"""
+        return [item.to_dict() for item in self.items]
+
+    @staticmethod
+    def _compare(values: np.ndarray, value: Any, operator: str) -> Optional[np.ndarray]:
+        if operator == "eq":
+            return values == value
+        elif operator == "neq":
+            return values != value
+        elif operator == "gt":
+            return values > value
+        elif operator == "lt":
+            return values < value
+        return None
+
+    def filter_mask(self, field: str, value: Any, operator: str = "eq") -> np.ndarray:
+        """Boolean mask of the rows DataSet.filter would keep"""
+        mask = np.zeros(len(self), dtype=bool)
+
+        # Special case for ID field
+        if field == "id":
+            try:
+                compare_value = int(value) if not isinstance(value, int) else value
+            except (ValueError, TypeError):
+                return mask
+            matches = self._compare(self.ids, compare_value, operator)
+            return mask if matches is None else self.id_valid & matches
+
+        # Numeric keys take precedence over string keys
+        numeric = self.numeric.get(field)
+        numeric_present = numeric.present if numeric is not None else mask
+        if numeric is not None:
+            try:
+                compare_value = float(value) if not isinstance(value, (int, float)) else value
+                matches = self._compare(numeric.values, compare_value, operator)
+                if matches is not None:
+                    mask = numeric.present & numeric.valid & matches
+            except (ValueError, TypeError):
+                pass
+
+        strings = self.strings.get(field)
+        if strings is not None:
+            if operator == "eq":
+                matches = strings.match(lambda item_value: item_value == value)
+            elif operator == "neq":
+                matches = strings.match(lambda item_value: item_value != value)
+            elif operator == "contains" and isinstance(value, str):
+                # Case-insensitive contains check, once per distinct value
+                needle = value.upper()
+                matches = strings.match(lambda item_value: needle in item_value.upper())
+            else:
+                matches = None
+            if matches is not None:
+                mask = mask | (~numeric_present & matches)
+
+        return mask
+
+    def filter(self, field: str, value: Any, operator: str = "eq") -> "ColumnarDataSet":
+        """Filter items based on field, value and operator"""
+        return self.take(np.flatnonzero(self.filter_mask(field, value, operator)))
+
+    @staticmethod
+    def _stable_argsort(keys: np.ndarray, ascending: bool) -> np.ndarray:
+        """
+        Stable argsort in either direction.
+        Descending order keeps ties in their original order, like sorted(reverse=True).
+        """
+        if ascending:
+            return np.argsort(keys, kind="stable")
+        reversed_order = np.argsort(keys[::-1], kind="stable")[::-1]
+        return len(keys) - 1 - reversed_order
+
+    def _sort_positions(self, field: str, ascending: bool) -> np.ndarray:
+        """Positions of the rows DataSet.sort would return, in order"""
+        if field == "id":
+            rows = np.flatnonzero(self.id_valid)
+            return rows[self._stable_argsort(self.ids[rows], ascending)]
+
+        numeric = self.numeric.get(field)
+        strings = self.strings.get(field)
+        numeric_present = numeric.present if numeric is not None else np.zeros(len(self), dtype=bool)
+        string_rows = (
+            np.flatnonzero(strings.present & ~numeric_present) if strings is not None
+            else np.zeros(0, dtype=np.int64)
+        )
+        numeric_rows = np.flatnonzero(numeric_present)
+
+        if len(numeric_rows) and len(string_rows):
+            # Python cannot order numbers against strings either
+            raise _Fallback()
+
+        if len(numeric_rows):
+            if numeric.raw:
+                raise _Fallback()
+            keys = numeric.values[numeric_rows]
+            if np.isnan(keys).any():
+                raise _Fallback()
+            return numeric_rows[self._stable_argsort(keys, ascending)]
+
+        if len(string_rows):
+            try:
+                ranks = {category: rank for rank, category in enumerate(sorted(set(strings.categories)))}
+            except TypeError:
+                raise _Fallback()
+            code_ranks = np.array([ranks[category] for category in strings.categories])
+            keys = code_ranks[strings.codes[string_rows]]
+            return string_rows[self._stable_argsort(keys, ascending)]
+
+        return np.zeros(0, dtype=np.int64)
+
+    def sort(self, field: str, ascending: bool = True) -> "ColumnarDataSet":
+        """Sort items based on field"""
+        try:
+            positions = self._sort_positions(field, ascending)
+        except _Fallback:
+            return ColumnarDataSet.from_dataset(self.to_dataset().sort(field, ascending))
+        return self.take(positions)
+
+    def aggregate(
+        self,
+        field: str,
+        operation: str = "sum",
+        percentile: float = DEFAULT_PERCENTILE,
+        bins: int = DEFAULT_HISTOGRAM_BINS,
+        lower: Optional[float] = None,
+        upper: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Aggregate numeric values using specified operation"""
+        if operation == "approx_distinct":
+            # Counts string values too
+            return self.to_dataset().aggregate(field, operation)
+
+        column = self.numeric.get(field)
+        if column is None or not column.present.any():
+            return {"result": None}
+
+        rows = np.flatnonzero(column.present)
+        if column.raw or operation not in ("sum", "avg", "min", "max", "count", "stats", "histogram"):
+            return self.take(rows).to_dataset().aggregate(field, operation, percentile, bins, lower, upper)
+
+        values = column.values[rows]
+        if operation == "count":
+            return {"result": len(rows)}
+        if operation in ("min", "max", "stats", "histogram") and np.isnan(values).any():
+            return self.take(rows).to_dataset().aggregate(field, operation, percentile, bins, lower, upper)
+        if operation == "histogram":
+            return {"result": self._histogram(values, bins, lower, upper)}
+
+        all_int = bool(column.is_int[rows].all())
+        total = int_sum(values) if all_int else float(values.sum())
+        if operation == "sum":
+            return {"result": total}
+        elif operation == "avg":
+            return {"result": total / len(rows)}
+
+        # min/max return the first extreme value with its original type
+        minimum = column.value_at(int(rows[int(values.argmin())]))
+        maximum = column.value_at(int(rows[int(values.argmax())]))
+        if operation == "stats":
+            return {"result": stats_result(len(rows), total, minimum, maximum, float(values.var()))}
+        return {"result": minimum if operation == "min" else maximum}
+
+    @staticmethod
+    def _histogram(values: np.ndarray, bins: int, lower: Optional[float], upper: Optional[float]) -> Dict[str, Any]:
+        """Vectorized statistics.Histogram: same bin formula, counted with bincount"""
+        if lower is None or upper is None:
+            lower, upper = histogram_bounds(float(values.min()), float(values.max()))
+        values = values[(values >= lower) & (values <= upper)]
+        index = np.minimum(((values - lower) * bins / (upper - lower)).astype(np.int64), bins - 1)
+        index[values == upper] = bins - 1
+        counts = np.bincount(index, minlength=bins)
+        return histogram_result(float(lower), float(upper), [int(count) for count in counts])
@@ -0,0 +1,342 @@
+from typing import Any, Callable, Iterator, List, Tuple, Union
+from dataclasses import dataclass
+import json
+import operator as operators
+import re
+import logging
+from apps.data_processor.domain.models import DataItem
+from apps.data_processor.domain.schemas import OperatorEnum
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Largest expression accepted, counted in comparisons and boolean operators
+MAX_EXPRESSION_NODES = 64
+
+# Symbolic spellings of the comparison operators in the query DSL
+SYMBOLS = {"=": "eq", "==": "eq", "!=": "neq", ">": "gt", "<": "lt"}
+
+# Ordering/equality operators shared by the id and numeric comparisons
+COMPARATORS = {
+    "eq": operators.eq,
+    "neq": operators.ne,
+    "gt": operators.gt,
+    "lt": operators.lt,
+}
+
+Predicate = Callable[[DataItem], bool]
+
+
+class ExpressionError(ValueError):
+    """Raised for filter expressions that cannot be parsed or are invalid"""
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """A field/operator/value triple, as accepted by DataSet.filter"""
+    field: str
+    operator: str
+    value: Union[str, int, float, bool]
+
+    def __str__(self) -> str:
+        return f"{json.dumps(self.field, ensure_ascii=False)} {self.operator} {json.dumps(self.value, ensure_ascii=False)}"
+
+
+@dataclass(frozen=True)
+class And:
+    """All of the child expressions hold"""
+    children: Tuple["Expression", ...]
+
+    def __str__(self) -> str:
+        return "(" + " and ".join(str(child) for child in self.children) + ")"
+
+
+@dataclass(frozen=True)
+class Or:
+    """At least one of the child expressions holds"""
+    children: Tuple["Expression", ...]
+
+    def __str__(self) -> str:
+        return "(" + " or ".join(str(child) for child in self.children) + ")"
+
+
+@dataclass(frozen=True)
+class Not:
+    """The child expression does not hold"""
+    child: "Expression"
+
+    def __str__(self) -> str:
+        return f"(not {self.child})"
+
+
+Expression = Union[Comparison, And, Or, Not]
+
+
+def make_comparison(field: Any, operator: Any, value: Any) -> Comparison:
+    """Validate a comparison the way FilterParamsSchema does"""
+    if not isinstance(field, str) or not field:
+        raise ExpressionError(f"Field must be a non-empty string, got {field!r}")
+    operator = SYMBOLS.get(operator, operator)
+    if operator not in {item.value for item in OperatorEnum}:
+        raise ExpressionError(
+            f"Invalid operator {operator!r}. Valid operators are: {', '.join(item.value for item in OperatorEnum)}"
+        )
+    if not isinstance(value, (str, int, float, bool)):
+        raise ExpressionError(f"Value of {field!r} must be a string, number or boolean, got {value!r}")
+    if field == "id" and not isinstance(value, int):
+        try:
+            value = int(value)
+        except (ValueError, TypeError, OverflowError):
+            raise ExpressionError(f"ID must be an integer, got {value}")
+    return Comparison(field, operator, value)
+
+
+def iter_comparisons(expression: Expression) -> Iterator[Comparison]:
+    """Every comparison in the expression"""
+    if isinstance(expression, Comparison):
+        yield expression
+    elif isinstance(expression, Not):
+        yield from iter_comparisons(expression.child)
+    else:
+        for child in expression.children:
+            yield from iter_comparisons(child)
+
+
+def count_nodes(expression: Expression) -> int:
+    """Number of comparisons and boolean operators in the expression"""
+    if isinstance(expression, Comparison):
+        return 1
+    if isinstance(expression, Not):
+        return 1 + count_nodes(expression.child)
+    return 1 + sum(count_nodes(child) for child in expression.children)
+
+
+def _check_size(expression: Expression) -> Expression:
+    """Reject expressions larger than MAX_EXPRESSION_NODES"""
+    if count_nodes(expression) > MAX_EXPRESSION_NODES:
+        raise ExpressionError(f"Filter expression is too large (more than {MAX_EXPRESSION_NODES} terms)")
+    return expression
+
+
+def parse_json_expression(data: Any) -> Expression:
+    """
+    Build an expression from its JSON form:
+    {"and": [...]}, {"or": [...]}, {"not": {...}} or
+    {"field": "price", "operator": "lt", "value": 50} (operator defaults to eq).
+    """
+    def build(node: Any, depth: int) -> Expression:
+        if depth > MAX_EXPRESSION_NODES or not isinstance(node, dict):
+            raise ExpressionError(f"Invalid filter expression: {node!r}")
+        if set(node) in ({"and"}, {"or"}):
+            key = next(iter(node))
+            children = node[key]
+            if not isinstance(children, list) or not children:
+                raise ExpressionError(f"'{key}' needs a non-empty list of expressions")
+            built = tuple(build(child, depth + 1) for child in children)
+            return And(built) if key == "and" else Or(built)
+        if set(node) == {"not"}:
+            return Not(build(node["not"], depth + 1))
+        if "field" in node and "value" in node and set(node) <= {"field", "operator", "value"}:
+            return make_comparison(node["field"], node.get("operator", "eq"), node["value"])
+        raise ExpressionError(f"Invalid filter expression: {node!r}")
+
+    return _check_size(build(data, 0))
+
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<paren>[()])
+      | (?P<symbol>==|!=|=|>|<)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)(?![\w.])
+      | (?P<word>[A-Za-z_][\w.-]*)
+    )
+""", re.VERBOSE)
+
+
+def _tokenize(text: str) -> List[Tuple[str, Any]]:
+    """Split a DSL expression into (kind, value) tokens"""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ExpressionError(f"Unexpected character at position {position}: {text[position:position + 10]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        raw = match.group(kind)
+        if kind == "string":
+            tokens.append(("value", re.sub(r"\\(.)", r"\1", raw[1:-1])))
+        elif kind == "number":
+            tokens.append(("value", float(raw) if any(c in raw for c in ".eE") else int(raw)))
+        elif kind == "word" and raw.lower() in ("and", "or", "not"):
+            tokens.append(("keyword", raw.lower()))
+        elif kind == "word" and raw.lower() in ("true", "false"):
+            tokens.append(("value", raw.lower() == "true"))
+        else:
+            tokens.append((kind, raw))
+    return tokens
+
+
+def parse_dsl(text: str) -> Expression:
+    """
+    Parse the query DSL, e.g.
+    category eq "Electronics" and price lt 50 and not (quantity eq 0 or name contains "refurb").
+
+    A comparison is a field, an operator (eq, neq, gt, lt, contains or
+    =, !=, >, <) and a value (quoted string, number, true/false or a bare
+    word). not binds tighter than and, which binds tighter than or.
+    """
+    tokens = _tokenize(text)
+    position = 0
+
+    def peek() -> Tuple[str, Any]:
+        return tokens[position] if position < len(tokens) else ("end", None)
+
+    def take() -> Tuple[str, Any]:
+        nonlocal position
+        token = peek()
+        position += 1
+        return token
+
+    def parse_or(depth: int) -> Expression:
+        children = [parse_and(depth)]
+        while peek() == ("keyword", "or"):
+            take()
+            children.append(parse_and(depth))
+        return children[0] if len(children) == 1 else Or(tuple(children))
+
+    def parse_and(depth: int) -> Expression:
+        children = [parse_not(depth)]
+        while peek() == ("keyword", "and"):
+            take()
+            children.append(parse_not(depth))
+        return children[0] if len(children) == 1 else And(tuple(children))
+
+    def parse_not(depth: int) -> Expression:
+        if depth > MAX_EXPRESSION_NODES:
+            raise ExpressionError("Filter expression is nested too deeply")
+        if peek() == ("keyword", "not"):
+            take()
+            return Not(parse_not(depth + 1))
+        if peek() == ("paren", "("):
+            take()
+            expression = parse_or(depth + 1)
+            if take() != ("paren", ")"):
+                raise ExpressionError("Missing closing parenthesis")
+            return expression
+        return parse_comparison()
+
+    def parse_comparison() -> Comparison:
+        kind, field = take()
+        if kind not in ("word", "value") or not isinstance(field, str):
+            raise ExpressionError(f"Expected a field name, got {field!r}")
+        kind, operator = take()
+        if kind not in ("word", "symbol"):
+            raise ExpressionError(f"Expected an operator after {field!r}, got {operator!r}")
+        kind, value = take()
+        if kind not in ("word", "value"):
+            raise ExpressionError(f"Expected a value after {field!r} {operator}, got {value!r}")
+        return make_comparison(field, operator.lower(), value)
+
+    if not tokens:
+        raise ExpressionError("Filter expression is empty")
+    expression = parse_or(0)
+    if position != len(tokens):
+        raise ExpressionError(f"Unexpected {peek()[1]!r} in filter expression")
+    return _check_size(expression)
+
+
+def parse_expression(source: Any) -> Expression:
+    """Parse a filter expression given as JSON (object or text) or in the query DSL"""
+    if isinstance(source, str):
+        stripped = source.strip()
+        if stripped.startswith("{"):
+            try:
+                source = json.loads(stripped)
+            except ValueError as e:
+                raise ExpressionError(f"Invalid JSON filter expression: {e}")
+        else:
+            return parse_dsl(stripped)
+    return parse_json_expression(source)
+
+
+def _compile_comparison(comparison: Comparison) -> Predicate:
+    """Predicate keeping exactly the items DataSet.filter would keep for one comparison"""
+    field, operator, value = comparison.field, comparison.operator, comparison.value
+    compare = COMPARATORS.get(operator)
+
+    if field == "id":
+        try:
+            target = int(value) if not isinstance(value, int) else value
+        except (ValueError, TypeError):
+            return lambda item: False
+        if compare is None:
+            return lambda item: False
+
+        def match_id(item: DataItem) -> bool:
+            if item.id is None:
+                return False
+            try:
+                return compare(int(item.id), target)
+            except (ValueError, TypeError):
+                return False
+        return match_id
+
+    # The value is coerced once rather than per item
+    try:
+        number = value if isinstance(value, (int, float)) else float(value)
+    except (ValueError, TypeError):
+        number = None
+    match_number = compare if number is not None else None
+
+    if operator == "eq":
+        match_string = lambda text: text == value
+    elif operator == "neq":
+        match_string = lambda text: text != value
+    elif operator == "contains" and isinstance(value, str):
+        # Case-insensitive contains check
+        needle = value.upper()
+        match_string = lambda text: needle in text.upper()
+    else:
+        match_string = None
+
+    def match(item: DataItem) -> bool:
+        numeric_fields = item.numeric_fields
+        if field in numeric_fields:
+            if match_number is None:
+                return False
+            try:
+                return match_number(float(numeric_fields[field]), number)
+            except (ValueError, TypeError):
+                return False
+        string_fields = item.string_fields
+        if field in string_fields:
+            return match_string is not None and match_string(string_fields[field])
+        return False
+    return match
+
+
+def compile_predicate(expression: Expression) -> Predicate:
+    """
+    Compile an expression once into a single predicate over DataItem.
+    Comparisons are specialized up front and the boolean structure
+    short-circuits, so items are tested in one pass with no re-parsing.
+    """
+    if isinstance(expression, Comparison):
+        return _compile_comparison(expression)
+    if isinstance(expression, Not):
+        inner = compile_predicate(expression.child)
+        return lambda item: not inner(item)
+
+    predicates = tuple(compile_predicate(child) for child in expression.children)
+    if isinstance(expression, And):
+        if len(predicates) == 2:
+            first, second = predicates
+            return lambda item: first(item) and second(item)
+        return lambda item: all(predicate(item) for predicate in predicates)
+    if len(predicates) == 2:
+        first, second = predicates
+        return lambda item: first(item) or second(item)
+    return lambda item: any(predicate(item) for predicate in predicates)
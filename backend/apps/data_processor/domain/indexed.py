@@ -0,0 +1,372 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from operator import itemgetter
+import math
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.domain.trigrams import TrigramIndex
+
+_key = itemgetter(0)
+
+
+class _Fallback(Exception):
+    """Raised internally when only a scan of the items answers exactly like DataSet"""
+
+
+def _ordered_slots(entries: List[Tuple[Any, int]], ascending: bool) -> Iterator[int]:
+    """
+    Slots of sorted (key, slot) pairs in sort order. Ties keep ascending
+    slot order in both directions, like the stable sorted(reverse=True).
+    """
+    if ascending:
+        for _, slot in entries:
+            yield slot
+        return
+    end = len(entries)
+    while end:
+        start = bisect_left(entries, entries[end - 1][0], hi=end, key=_key)
+        for _, slot in entries[start:end]:
+            yield slot
+        end = start
+
+
+class NumericFieldIndex:
+    """
+    Sorted (float value, slot) pairs of the items that hold a numeric key,
+    answering eq/neq/gt/lt with bisect. NaN values are kept aside since
+    they do not order, values float() rejects match nothing, and values
+    that are not plain ints or floats are counted because sorting by them
+    is only exact through DataSet. Bulk adds append and are sorted once by
+    settle(); single adds insert in place.
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[float, int]] = []
+        self.nan: Dict[int, None] = {}
+        self.invalid: Dict[int, None] = {}
+        self.raw = 0
+        self._unsorted = False
+
+    def __len__(self) -> int:
+        return len(self.entries) + len(self.nan) + len(self.invalid)
+
+    def add(self, slot: int, value: Any, bulk: bool = False) -> None:
+        if type(value) is not int and type(value) is not float:
+            self.raw += 1
+        try:
+            number = float(value)
+        except (ValueError, TypeError):
+            self.invalid[slot] = None
+            return
+        if math.isnan(number):
+            self.nan[slot] = None
+        elif bulk:
+            self.entries.append((number, slot))
+            self._unsorted = True
+        else:
+            insort(self.entries, (number, slot))
+
+    def settle(self) -> None:
+        """Sort the entries appended by bulk adds"""
+        if self._unsorted:
+            self.entries.sort()
+            self._unsorted = False
+
+    def remove(self, slot: int, value: Any) -> None:
+        if type(value) is not int and type(value) is not float:
+            self.raw -= 1
+        try:
+            number = float(value)
+        except (ValueError, TypeError):
+            del self.invalid[slot]
+            return
+        if math.isnan(number):
+            del self.nan[slot]
+        else:
+            del self.entries[bisect_left(self.entries, (number, slot))]
+
+    def match(self, value: Any, operator: str) -> List[int]:
+        """Slots DataSet.filter keeps in its numeric branch, in no particular order"""
+        try:
+            number = float(value) if not isinstance(value, (int, float)) else value
+        except (ValueError, TypeError):
+            return []
+        if operator not in ("eq", "neq", "gt", "lt"):
+            return []
+        entries = self.entries
+        if isinstance(number, float) and math.isnan(number):
+            # NaN is unequal to everything, including itself
+            return [slot for _, slot in entries] + list(self.nan) if operator == "neq" else []
+
+        low = bisect_left(entries, number, key=_key)
+        high = bisect_right(entries, number, lo=low, key=_key)
+        if operator == "eq":
+            selected = entries[low:high]
+        elif operator == "gt":
+            selected = entries[high:]
+        elif operator == "lt":
+            selected = entries[:low]
+        else:
+            return [slot for _, slot in entries[:low]] + [slot for _, slot in entries[high:]] + list(self.nan)
+        return [slot for _, slot in selected]
+
+    def ordered(self, ascending: bool) -> Iterator[int]:
+        """Slots in DataSet.sort order"""
+        if self.raw or self.nan or self.invalid:
+            raise _Fallback()
+        return _ordered_slots(self.entries, ascending)
+
+
+class StringFieldIndex:
+    """
+    Hash index from string value to the slots holding it (in slot order),
+    for the items whose key is not shadowed by a numeric key. The first
+    sort orders the distinct values; that order is then kept up to date
+    by single adds and removals, while bulk adds drop it.
+    """
+
+    def __init__(self):
+        self.values: Dict[Any, Dict[int, None]] = {}
+        self.slots = 0
+        self._ordered: Optional[List[Any]] = None
+
+    def __len__(self) -> int:
+        return self.slots
+
+    def add(self, slot: int, value: Any, bulk: bool = False) -> None:
+        slots = self.values.get(value)
+        if slots is None:
+            slots = self.values[value] = {}
+            if bulk:
+                self._ordered = None
+            elif self._ordered is not None and value is not None:
+                try:
+                    insort(self._ordered, value)
+                except TypeError:
+                    self._ordered = None
+        slots[slot] = None
+        self.slots += 1
+
+    def remove(self, slot: int, value: Any) -> None:
+        slots = self.values[value]
+        del slots[slot]
+        self.slots -= 1
+        if not slots:
+            del self.values[value]
+            if self._ordered is not None and value is not None:
+                del self._ordered[bisect_left(self._ordered, value)]
+
+    def match(self, value: Any, operator: str) -> List[int]:
+        """Slots DataSet.filter keeps in its string branch, in no particular order"""
+        if operator == "eq":
+            try:
+                return list(self.values.get(value, ()))
+            except TypeError:
+                raise _Fallback()
+        if operator == "neq":
+            return [slot for item_value, slots in self.values.items() if item_value != value for slot in slots]
+        if operator == "contains" and isinstance(value, str):
+            # Case-insensitive contains check, once per distinct value
+            needle = value.upper()
+            return [slot for item_value, slots in self.values.items() if needle in item_value.upper() for slot in slots]
+        return []
+
+    def ordered(self, ascending: bool) -> Iterator[int]:
+        """Slots in DataSet.sort order (items whose value is None are left out)"""
+        if self._ordered is None:
+            try:
+                self._ordered = sorted(value for value in self.values if value is not None)
+            except TypeError:
+                raise _Fallback()
+        for value in (self._ordered if ascending else reversed(self._ordered)):
+            yield from self.values[value]
+
+
+class IndexedDataSet:
+    """
+    DataSet variant that keeps secondary indexes up to date as items are
+    appended and removed: an id map, sorted (value, position) arrays per
+    numeric key, hash indexes per string key and, on request, trigram
+    indexes for contains. Indexes are updated per item and never rebuilt,
+    so on a warm dataset filter runs in O(log n + k log k) for k matches
+    and sort(limit=k) walks only the first k entries.
+
+    Results are plain DataSets equal to what DataSet gives for the same
+    items in the same order. Inputs the indexes cannot order exactly (NaN,
+    non-numeric or mixed numeric/string values in a sorted field,
+    unhashable filter values) are delegated to DataSet.
+    """
+
+    def __init__(self, items: Iterable[DataItem] = ()):
+        self._items: Dict[int, DataItem] = {}
+        self._next_slot = 0
+        self._ids: Dict[int, int] = {}
+        self._id_index: List[Tuple[int, int]] = []
+        self._unindexed_ids = 0
+        self._numeric: Dict[str, NumericFieldIndex] = {}
+        self._strings: Dict[str, StringFieldIndex] = {}
+        self._substrings: Dict[str, TrigramIndex] = {}
+        self.extend(items)
+
+    @classmethod
+    def from_dataset(cls, dataset: DataSet) -> "IndexedDataSet":
+        """Build an indexed copy of a DataSet"""
+        return cls(dataset.items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def items(self) -> List[DataItem]:
+        """Items in insertion order"""
+        return list(self._items.values())
+
+    def to_dataset(self) -> DataSet:
+        """Convert to a plain DataSet"""
+        return DataSet(items=self.items)
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        """Convert to list of dictionaries"""
+        return [item.to_dict() for item in self._items.values()]
+
+    def get(self, item_id: int) -> Optional[DataItem]:
+        """The item with this id, or None"""
+        slot = self._ids.get(item_id)
+        return self._items[slot] if slot is not None else None
+
+    def append(self, item: DataItem, bulk: bool = False) -> None:
+        """Add an item at the end and index it; ids must be unique"""
+        if item.id is not None and item.id in self._ids:
+            raise ValueError(f"Duplicate item id: {item.id}")
+        slot = self._next_slot
+        self._next_slot += 1
+        self._items[slot] = item
+        self._index(slot, item, add=True, bulk=bulk)
+
+    def extend(self, items: Iterable[DataItem]) -> None:
+        """Append several items, sorting each index once at the end"""
+        for item in items:
+            self.append(item, bulk=True)
+        self._id_index.sort()
+        for index in self._numeric.values():
+            index.settle()
+
+    def remove(self, item_id: int) -> DataItem:
+        """Remove the item with this id and return it; KeyError when there is none"""
+        slot = self._ids[item_id]
+        item = self._items.pop(slot)
+        self._index(slot, item, add=False)
+        return item
+
+    def _index(self, slot: int, item: DataItem, add: bool, bulk: bool = False) -> None:
+        """Add an item to, or remove it from, every index"""
+        if item.id is not None:
+            if type(item.id) is int:
+                if add:
+                    self._ids[item.id] = slot
+                    if bulk:
+                        self._id_index.append((item.id, slot))
+                    else:
+                        insort(self._id_index, (item.id, slot))
+                else:
+                    del self._ids[item.id]
+                    del self._id_index[bisect_left(self._id_index, (item.id, slot))]
+            else:
+                self._unindexed_ids += 1 if add else -1
+
+        for field, value in item.numeric_fields.items():
+            index = self._numeric.get(field)
+            if index is None:
+                index = self._numeric[field] = NumericFieldIndex()
+            index.add(slot, value, bulk) if add else index.remove(slot, value)
+
+        for field, value in item.string_fields.items():
+            # Numeric keys take precedence over string keys
+            if field in item.numeric_fields:
+                continue
+            index = self._strings.get(field)
+            if index is None:
+                index = self._strings[field] = StringFieldIndex()
+            index.add(slot, value, bulk) if add else index.remove(slot, value)
+            substrings = self._substrings.get(field)
+            if substrings is not None:
+                substrings.add(slot, value) if add else substrings.remove(slot)
+
+    def index_substrings(self, field: str) -> TrigramIndex:
+        """Build (once) a trigram index for contains on a string field, maintained from then on"""
+        index = self._substrings.get(field)
+        if index is None:
+            index = self._substrings[field] = TrigramIndex(
+                (slot, value)
+                for slot, item in self._items.items()
+                if field != "id" and field not in item.numeric_fields and field in item.string_fields
+                for value in (item.string_fields[field],)
+            )
+        return index
+
+    def _select(self, slots: Iterable[int]) -> DataSet:
+        items = self._items
+        return DataSet(items=[items[slot] for slot in slots])
+
+    def filter(self, field: str, value: Any, operator: str = "eq") -> DataSet:
+        """Filter items based on field, value and operator"""
+        try:
+            return self._select(sorted(self._filter_slots(field, value, operator)))
+        except _Fallback:
+            return self.to_dataset().filter(field, value, operator)
+
+    def _filter_slots(self, field: str, value: Any, operator: str) -> List[int]:
+        # Special case for ID field
+        if field == "id":
+            if self._unindexed_ids:
+                raise _Fallback()
+            try:
+                compare_value = int(value) if not isinstance(value, int) else value
+            except (ValueError, TypeError):
+                return []
+            entries = self._id_index
+            low = bisect_left(entries, compare_value, key=_key)
+            high = bisect_right(entries, compare_value, lo=low, key=_key)
+            ranges = {"eq": (entries[low:high],), "neq": (entries[:low], entries[high:]),
+                      "gt": (entries[high:],), "lt": (entries[:low],)}
+            return [slot for selected in ranges.get(operator, ()) for _, slot in selected]
+
+        slots = []
+        numeric = self._numeric.get(field)
+        if numeric is not None:
+            slots.extend(numeric.match(value, operator))
+        strings = self._strings.get(field)
+        if strings is not None:
+            substrings = self._substrings.get(field)
+            if operator == "contains" and substrings is not None:
+                slots.extend(substrings.search(value) if isinstance(value, str) else ())
+            else:
+                slots.extend(strings.match(value, operator))
+        return slots
+
+    def sort(self, field: str, ascending: bool = True, limit: Optional[int] = None) -> DataSet:
+        """Sort items based on field; with a limit, only the first `limit` items are kept"""
+        try:
+            slots = self._sorted_slots(field, ascending)
+            return self._select(islice(slots, limit) if limit is not None else slots)
+        except _Fallback:
+            return self.to_dataset().sort(field, ascending, limit=limit)
+
+    def _sorted_slots(self, field: str, ascending: bool) -> Iterator[int]:
+        if field == "id":
+            if self._unindexed_ids:
+                raise _Fallback()
+            return _ordered_slots(self._id_index, ascending)
+
+        numeric = self._numeric.get(field)
+        strings = self._strings.get(field)
+        has_numeric = numeric is not None and len(numeric) > 0
+        has_strings = strings is not None and len(strings) > 0
+        if has_numeric and has_strings:
+            # Python cannot order numbers against strings either
+            raise _Fallback()
+        if has_numeric:
+            return numeric.ordered(ascending)
+        if has_strings:
+            return strings.ordered(ascending)
+        return iter(())
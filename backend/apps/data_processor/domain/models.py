@@ -1,12 +1,17 @@
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Optional
+from dataclasses import dataclass, field as dataclass_field
 from enum import Enum
+import heapq
+from .trigrams import TrigramIndex
+from .sketches import APPROXIMATE_OPERATIONS, DEFAULT_PERCENTILE, approximate_aggregate
+from .statistics import DEFAULT_HISTOGRAM_BINS, RunningStats, Histogram, histogram_bounds
 
 class TransformationType(str, Enum):
     """Types of transformations that can be performed on data"""
     FILTER = "filter"
     SORT = "sort"
     AGGREGATE = "aggregate"
+    GROUP = "group"
     
     @classmethod
     def has_value(cls, value):
@@ -37,15 +42,65 @@ class DataItem:
         
         return result
 
+def sort_value(item: DataItem, field: str) -> Any:
+    """Value DataSet.sort orders an item by: the id, else the numeric, else the string field"""
+    # Special case for ID field
+    if field == 'id':
+        return item.id
+    elif field in item.numeric_fields:
+        return item.numeric_fields[field]
+    elif field in item.string_fields:
+        return item.string_fields[field]
+    return None
+
+def top_k(items: Iterable[DataItem], field: str, k: int, ascending: bool = True) -> List[DataItem]:
+    """
+    The first k items DataSet.sort would return, without sorting them all.
+    Items are selected through a heap of size k, so this takes O(n log k)
+    time and O(k) memory and accepts any iterable, including a stream.
+    heapq's selection is stable, so ties keep their input order as in sorted().
+    """
+    key = lambda item: sort_value(item, field)
+    candidates = (item for item in items if key(item) is not None)
+    select = heapq.nsmallest if ascending else heapq.nlargest
+    return select(k, candidates, key=key)
+
 @dataclass
 class DataSet:
     """Domain model for a collection of data items"""
     items: List[DataItem]
+    _substring_indexes: Dict[str, TrigramIndex] = dataclass_field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    
+    def index_substrings(self, field: str) -> TrigramIndex:
+        """
+        Build (once) a trigram index over the string values of a field, which
+        filter() then uses for `contains` instead of scanning every item.
+        The items must not change once they are indexed.
+        """
+        index = self._substring_indexes.get(field)
+        if index is None:
+            index = TrigramIndex(
+                (position, item.string_fields[field])
+                for position, item in enumerate(self.items)
+                if field != 'id' and field not in item.numeric_fields and field in item.string_fields
+            )
+            self._substring_indexes[field] = index
+        return index
     
     def filter(self, field: str, value: Any, operator: str = "eq") -> "DataSet":
         """Filter items based on field, value and operator"""
         filtered_items = []
         
+        # Substring search on an indexed field only visits matching items
+        index = self._substring_indexes.get(field)
+        if operator == "contains" and index is not None:
+            if not isinstance(value, str):
+                return DataSet(items=[])
+            return DataSet(items=[self.items[position] for position in index.search(value)])
+        needle = value.upper() if operator == "contains" and isinstance(value, str) else None
+        
         for item in self.items:
             # Special case for ID field
             if field == 'id':
@@ -104,35 +159,51 @@ class DataSet:
                     filtered_items.append(item)
                 elif operator == "contains" and isinstance(value, str):
                     # Case-insensitive contains check
-                    if value.upper() in item_value.upper():
+                    if needle in item_value.upper():
                         filtered_items.append(item)
         
         return DataSet(items=filtered_items)
     
-    def sort(self, field: str, ascending: bool = True) -> "DataSet":
-        """Sort items based on field"""
-        
-        def get_value(item: DataItem) -> Any:
-            # Special case for ID field
-            if field == 'id':
-                return item.id
-            elif field in item.numeric_fields:
-                return item.numeric_fields[field]
-            elif field in item.string_fields:
-                return item.string_fields[field]
-            return None
+    def sort(self, field: str, ascending: bool = True, limit: Optional[int] = None) -> "DataSet":
+        """Sort items based on field; with a limit, only the first `limit` items are kept"""
+        if limit is not None:
+            return DataSet(items=top_k(self.items, field, limit, ascending))
         
         # Create a sorted copy
         sorted_items = sorted(
-            [item for item in self.items if get_value(item) is not None],
-            key=get_value,
+            [item for item in self.items if sort_value(item, field) is not None],
+            key=lambda item: sort_value(item, field),
             reverse=not ascending
         )
         
         return DataSet(items=sorted_items)
     
-    def aggregate(self, field: str, operation: str = "sum") -> Dict[str, Any]:
-        """Aggregate numeric values using specified operation"""
+    def aggregate(
+        self,
+        field: str,
+        operation: str = "sum",
+        percentile: float = DEFAULT_PERCENTILE,
+        bins: int = DEFAULT_HISTOGRAM_BINS,
+        lower: Optional[float] = None,
+        upper: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Aggregate numeric values using specified operation.
+        stats returns count, sum, mean, min, max, variance and stddev from a
+        single pass; histogram counts the values in `bins` equal-width bins
+        over [lower, upper] (by default the values' range).
+        approx_distinct counts the distinct values of the field (numeric or
+        string) and approx_percentile estimates the given percentile (0-100)
+        of its numeric values, both from constant-size sketches.
+        """
+        if operation == "approx_distinct":
+            values = (sort_value(item, field) for item in self.items)
+            return {"result": approximate_aggregate((value for value in values if value is not None), operation)}
+        elif operation == "stats":
+            stats = RunningStats()
+            stats.update(item.numeric_fields[field] for item in self.items if field in item.numeric_fields)
+            return {"result": stats.result()}
+        
         values = []
         
         for item in self.items:
@@ -152,9 +223,75 @@ class DataSet:
             return {"result": max(values)}
         elif operation == "count":
             return {"result": len(values)}
+        elif operation in APPROXIMATE_OPERATIONS:
+            return {"result": approximate_aggregate(values, operation, percentile)}
+        elif operation == "histogram":
+            if lower is None or upper is None:
+                lower, upper = histogram_bounds(float(min(values)), float(max(values)))
+            histogram = Histogram(lower, upper, bins)
+            histogram.update(values)
+            return {"result": histogram.result()}
         
         return {"result": None}
     
+    def group_aggregate(self, group_by: str, fields: List[str], operations: List[str]) -> List[Dict[str, Any]]:
+        """
+        Aggregate several numeric fields per group in a single pass.
+        
+        Items are grouped by the string field `group_by` (items without it form
+        the None group). Each group reports {field: {operation: value}} with
+        the same values DataSet.aggregate would return for that group alone.
+        Groups are ordered by key with the None group last.
+        """
+        groups: Dict[Any, Dict[str, List[Any]]] = {}
+        
+        for item in self.items:
+            accumulators = groups.get(item.string_fields.get(group_by))
+            if accumulators is None:
+                # Per field: [count, sum, min, max]
+                accumulators = groups[item.string_fields.get(group_by)] = {
+                    field: [0, 0, None, None] for field in fields
+                }
+            for field in fields:
+                if field not in item.numeric_fields:
+                    continue
+                value = item.numeric_fields[field]
+                state = accumulators[field]
+                state[0] += 1
+                state[1] += value
+                if state[2] is None or value < state[2]:
+                    state[2] = value
+                if state[3] is None or value > state[3]:
+                    state[3] = value
+        
+        def result(state: List[Any], operation: str) -> Any:
+            count, total, minimum, maximum = state
+            if not count:
+                return None
+            if operation == "sum":
+                return total
+            elif operation == "avg":
+                return total / count
+            elif operation == "min":
+                return minimum
+            elif operation == "max":
+                return maximum
+            elif operation == "count":
+                return count
+            return None
+        
+        ordered_keys = sorted(groups, key=lambda key: (key is None, key or ""))
+        return [
+            {
+                "group": key,
+                "results": {
+                    field: {operation: result(groups[key][field], operation) for operation in operations}
+                    for field in fields
+                }
+            }
+            for key in ordered_keys
+        ]
+    
     def to_dict(self) -> List[Dict[str, Any]]:
         """Convert to list of dictionaries"""
         return [item.to_dict() for item in self.items] 
\ No newline at end of file
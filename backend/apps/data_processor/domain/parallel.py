@@ -0,0 +1,337 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import logging
+import os
+import threading
+import weakref
+import numpy as np
+from apps.data_processor.domain.columnar import ColumnarDataSet, NumericColumn, StringColumn, int_sum
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.domain.sketches import DEFAULT_PERCENTILE
+from apps.data_processor.domain.statistics import DEFAULT_HISTOGRAM_BINS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Items below which filter/aggregate run in-process: dispatching partitions
+# to the pool and back costs about 0.6ms, as much as a DataSet scan of a few
+# thousand items
+DEFAULT_PARALLEL_THRESHOLD = 10000
+
+# Aggregations combined from per-partition partials
+PARALLEL_OPERATIONS = ("sum", "avg", "min", "max", "count")
+
+# Shared memory segments a worker keeps attached
+WORKER_ATTACHED_SEGMENTS = 8
+
+_ALIGNMENT = 8
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (the container's share, not the host's)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    The process pool shared by every ParallelDataSet, (re)created with
+    `workers` processes. Workers are spawned rather than forked, so they
+    never inherit a copy of the parent's locks, threads or connections.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False, cancel_futures=True)
+            # Workers must share the parent's resource tracker, or each would
+            # start its own and unlink the segments it attached when it exits
+            resource_tracker.ensure_running()
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+            _executor_workers = workers
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the shared process pool"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+        _executor, _executor_workers = None, 0
+
+
+class _Unsupported(Exception):
+    """Raised internally when a dataset cannot be encoded in shared memory"""
+
+
+def _encode_categories(categories: List[Any]) -> np.ndarray:
+    """String categories as UTF-8 bytes, separated by NUL characters"""
+    if any(type(category) is not str or "\0" in category for category in categories):
+        raise _Unsupported()
+    return np.frombuffer("\0".join(categories).encode("utf-8"), dtype=np.uint8)
+
+
+def _share(arrays: Dict[Tuple[str, ...], np.ndarray]) -> Tuple[SharedMemory, Dict[str, Any]]:
+    """
+    Copy arrays into one shared memory segment. Returns the segment and its
+    layout: the segment name and each array's dtype, offset and length,
+    which is all a worker needs to map them.
+    """
+    placements = {}
+    size = 0
+    for path, array in arrays.items():
+        placements[path] = (array.dtype.str, size, len(array))
+        size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+    shm = SharedMemory(create=True, size=max(size, 1))
+    for path, array in arrays.items():
+        dtype, offset, length = placements[path]
+        np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)[:] = array
+    return shm, {"name": shm.name, "arrays": placements}
+
+
+def _release(shm: SharedMemory) -> None:
+    shm.close()
+    shm.unlink()
+
+
+# Worker side: segments attached by name, most recently used last, with
+# the string categories decoded from each so far
+_attached: "OrderedDict[str, Tuple[SharedMemory, Dict[str, List[str]]]]" = OrderedDict()
+
+
+def _attach(layout: Dict[str, Any]) -> Tuple[SharedMemory, Dict[str, List[str]]]:
+    attached = _attached.get(layout["name"])
+    if attached is None:
+        attached = _attached[layout["name"]] = (SharedMemory(name=layout["name"]), {})
+        while len(_attached) > WORKER_ATTACHED_SEGMENTS:
+            _, (evicted, _) = _attached.popitem(last=False)
+            try:
+                evicted.close()
+            except BufferError:
+                pass
+    _attached.move_to_end(layout["name"])
+    return attached
+
+
+def _view(shm: SharedMemory, layout: Dict[str, Any], path: Tuple[str, ...], start: int, stop: int) -> np.ndarray:
+    """Rows [start, stop) of a shared array, without copying"""
+    dtype, offset, length = layout["arrays"][path]
+    return np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)[start:stop]
+
+
+def _partition(layout: Dict[str, Any], field: str, start: int, stop: int) -> ColumnarDataSet:
+    """
+    Rows [start, stop) as a ColumnarDataSet holding only `field`. String
+    codes are renumbered over the categories the partition uses, so a
+    predicate is evaluated once per distinct value of the partition only.
+    """
+    shm, decoded = _attach(layout)
+    numeric = {}
+    if ("numeric", field, "values") in layout["arrays"]:
+        numeric[field] = NumericColumn(**{
+            name: _view(shm, layout, ("numeric", field, name), start, stop)
+            for name in ("values", "present", "valid", "is_int")
+        })
+    strings = {}
+    if ("strings", field, "codes") in layout["arrays"]:
+        codes = _view(shm, layout, ("strings", field, "codes"), start, stop)
+        present = codes >= 0
+        used = np.unique(codes[present])
+        categories = decoded.get(field)
+        if categories is None:
+            data = _view(shm, layout, ("strings", field, "categories"), 0, None)
+            categories = decoded[field] = bytes(data).decode("utf-8").split("\0")
+        local = np.full(len(codes), -1, dtype=np.int32)
+        local[present] = np.searchsorted(used, codes[present])
+        strings[field] = StringColumn(
+            codes=local,
+            categories=[categories[code] for code in used.tolist()]
+        )
+    return ColumnarDataSet(
+        ids=_view(shm, layout, ("ids",), start, stop),
+        id_valid=_view(shm, layout, ("id_valid",), start, stop),
+        numeric=numeric,
+        strings=strings
+    )
+
+
+def _filter_partition(layout: Dict[str, Any], start: int, stop: int, field: str, value: Any, operator: str) -> np.ndarray:
+    """Positions, in the whole dataset, of the partition's rows DataSet.filter keeps"""
+    mask = _partition(layout, field, start, stop).filter_mask(field, value, operator)
+    return np.flatnonzero(mask) + start
+
+
+def _aggregate_partition(layout: Dict[str, Any], start: int, stop: int, field: str) -> Optional[Tuple[Any, ...]]:
+    """
+    Partial aggregate of a numeric field over the partition: (count, total,
+    all ints, min value, min position, max value, max position), or None
+    when no row has the field. Positions are those of the first extreme.
+    """
+    column = _partition(layout, field, start, stop).numeric.get(field)
+    if column is None:
+        return None
+    rows = np.flatnonzero(column.present)
+    if not len(rows):
+        return None
+    values = column.values[rows]
+    all_int = bool(column.is_int[rows].all())
+    total = int_sum(values) if all_int else float(values.sum())
+    low, high = int(values.argmin()), int(values.argmax())
+    return (
+        len(rows), total, all_int,
+        float(values[low]), int(rows[low]) + start,
+        float(values[high]), int(rows[high]) + start
+    )
+
+
+class ParallelDataSet:
+    """
+    Runs DataSet.filter and DataSet.aggregate as map-reduce over a process pool.
+
+    The items are encoded once into the columnar layout (ids, float64
+    numeric columns with validity masks, dictionary-encoded strings) and
+    copied into a shared memory segment. A call splits the rows into one
+    contiguous partition per worker; each worker maps its rows straight
+    from shared memory, so items are never pickled, and evaluates them
+    with ColumnarDataSet. Filters send back matching positions, which are
+    concatenated in partition order and resolved to the original items;
+    sum/count/min/max/avg send back (count, total, min, max) partials that
+    are combined like DataSet.aggregate would. Other operations, datasets
+    under `threshold` items and inputs only the row engine handles exactly
+    (NaN min/max, non-int/float values, non-string string values) run on
+    the wrapped DataSet. Results equal DataSet's, except that float sums
+    may differ in the last few ulps (see ColumnarDataSet). The items must
+    not change once wrapped. Call close() (or use it as a context manager)
+    to release the shared memory early.
+    """
+
+    def __init__(
+        self,
+        items: List[DataItem],
+        workers: Optional[int] = None,
+        threshold: int = DEFAULT_PARALLEL_THRESHOLD
+    ):
+        self.dataset = DataSet(items=items)
+        self.workers = workers if workers is not None else available_cpus()
+        self._layout: Optional[Dict[str, Any]] = None
+        self._exact_numeric: Dict[str, bool] = {}
+        self._finalizer = None
+        if self.workers > 1 and len(items) >= threshold:
+            try:
+                self._share(ColumnarDataSet.from_items(items))
+            except _Unsupported:
+                pass
+
+    @classmethod
+    def from_dataset(cls, dataset: DataSet, **kwargs) -> "ParallelDataSet":
+        return cls(dataset.items, **kwargs)
+
+    def _share(self, columns: ColumnarDataSet) -> None:
+        arrays = {("ids",): columns.ids, ("id_valid",): columns.id_valid}
+        for key, column in columns.numeric.items():
+            for name in ("values", "present", "valid", "is_int"):
+                arrays[("numeric", key, name)] = getattr(column, name)
+            # min/max of NaN and sums of bools, Decimals, ... only match DataSet there
+            self._exact_numeric[key] = not column.raw and not np.isnan(column.values[column.present]).any()
+        for key, column in columns.strings.items():
+            arrays[("strings", key, "codes")] = column.codes
+            arrays[("strings", key, "categories")] = _encode_categories(column.categories)
+        shm, self._layout = _share(arrays)
+        self._finalizer = weakref.finalize(self, _release, shm)
+
+    @property
+    def items(self) -> List[DataItem]:
+        return self.dataset.items
+
+    @property
+    def is_parallel(self) -> bool:
+        """Whether calls are dispatched to the process pool"""
+        return self._layout is not None
+
+    def __len__(self) -> int:
+        return len(self.dataset.items)
+
+    def __enter__(self) -> "ParallelDataSet":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the shared memory; later calls run on the wrapped DataSet"""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._layout = None
+
+    def _map(self, function, *args) -> Optional[List[Any]]:
+        """
+        Run function(layout, start, stop, *args) for every partition and
+        return the results in partition order, or None when the pool broke
+        (a worker was killed) and the call should run in-process instead.
+        """
+        count = len(self)
+        bounds = [(count * index // self.workers, count * (index + 1) // self.workers) for index in range(self.workers)]
+        executor = get_executor(self.workers)
+        try:
+            futures = [executor.submit(function, self._layout, start, stop, *args) for start, stop in bounds]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            logger.warning("Process pool broke, running in-process")
+            shutdown_executor()
+            return None
+
+    def filter(self, field: str, value: Any, operator: str = "eq") -> DataSet:
+        """Filter items based on field, value and operator"""
+        if self.is_parallel:
+            positions = self._map(_filter_partition, field, value, operator)
+            if positions is not None:
+                items = self.dataset.items
+                return DataSet(items=[items[position] for position in np.concatenate(positions).tolist()])
+        return self.dataset.filter(field, value, operator)
+
+    def aggregate(
+        self,
+        field: str,
+        operation: str = "sum",
+        percentile: float = DEFAULT_PERCENTILE,
+        bins: int = DEFAULT_HISTOGRAM_BINS,
+        lower: Optional[float] = None,
+        upper: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Aggregate numeric values using specified operation"""
+        if self.is_parallel and operation in PARALLEL_OPERATIONS and self._exact_numeric.get(field, True):
+            partials = self._map(_aggregate_partition, field)
+            if partials is not None:
+                return {"result": self._combine([partial for partial in partials if partial is not None], field, operation)}
+        return self.dataset.aggregate(field, operation, percentile, bins, lower, upper)
+
+    def _combine(self, partials: List[Tuple[Any, ...]], field: str, operation: str) -> Any:
+        """Reduce partition partials to the DataSet.aggregate result"""
+        if not partials:
+            return None
+        count = sum(partial[0] for partial in partials)
+        if operation == "count":
+            return count
+        if operation in ("sum", "avg"):
+            if all(partial[2] for partial in partials):
+                total = sum(partial[1] for partial in partials)
+            else:
+                total = sum(float(partial[1]) for partial in partials)
+            return total if operation == "sum" else total / count
+        # The first extreme wins ties, as with min()/max(); report its original value
+        if operation == "min":
+            position = min(partials, key=lambda partial: partial[3])[4]
+        else:
+            position = max(partials, key=lambda partial: partial[5])[6]
+        return self.dataset.items[position].numeric_fields[field]
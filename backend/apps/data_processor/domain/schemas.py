@@ -1,6 +1,20 @@
 from typing import Dict, List, Any, Optional, Union
 from pydantic import BaseModel as PydanticBaseModel, Field, validator, root_validator
 from enum import Enum
+from apps.data_processor.domain.sketches import APPROXIMATE_OPERATIONS, DEFAULT_PERCENTILE
+from apps.data_processor.domain.statistics import STATISTICS_OPERATIONS, DEFAULT_HISTOGRAM_BINS, MAX_HISTOGRAM_BINS
+import math
+
+
+# Upper bound for the `limit` of a keyset-paginated request
+MAX_PAGE_SIZE = 1000
+
+# Items validated and committed together by a streamed upload
+DEFAULT_UPLOAD_CHUNK_SIZE = 1000
+MAX_UPLOAD_CHUNK_SIZE = 10000
+
+# Aggregations that answer for the whole table only, not per group
+UNGROUPED_OPERATIONS = APPROXIMATE_OPERATIONS + STATISTICS_OPERATIONS
 
 
 class BaseModel(PydanticBaseModel):
@@ -15,6 +29,7 @@ class TransformationTypeEnum(str, Enum):
     FILTER = "filter"
     SORT = "sort"
     AGGREGATE = "aggregate"
+    GROUP = "group"
 
 
 class OperatorEnum(str, Enum):
@@ -33,6 +48,10 @@ class AggregationOperationEnum(str, Enum):
     MIN = "min"
     MAX = "max"
     COUNT = "count"
+    APPROX_DISTINCT = "approx_distinct"
+    APPROX_PERCENTILE = "approx_percentile"
+    STATS = "stats"
+    HISTOGRAM = "histogram"
 
 
 class DataItemSchema(BaseModel):
@@ -154,6 +173,24 @@ class FilterParamsSchema(BaseModel):
         return v
 
 
+class FilterExpressionParamsSchema(BaseModel):
+    """
+    Pydantic schema for boolean filter expression parameters validation.
+    `where` is given in the query DSL or as JSON (see domain/expressions.py)
+    and is validated into an Expression.
+    """
+    where: Any
+    
+    class Config:
+        extra = "forbid"
+    
+    @validator('where')
+    def parse_where(cls, v):
+        """Parse the expression; syntax errors become validation errors"""
+        from apps.data_processor.domain.expressions import parse_expression
+        return parse_expression(v)
+
+
 class SortParamsSchema(BaseModel):
     """Pydantic schema for sort parameters validation"""
     field: str
@@ -163,4 +200,69 @@ class SortParamsSchema(BaseModel):
 class AggregateParamsSchema(BaseModel):
     """Pydantic schema for aggregate parameters validation"""
     field: str
-    operation: AggregationOperationEnum = AggregationOperationEnum.SUM 
\ No newline at end of file
+    operation: AggregationOperationEnum = AggregationOperationEnum.SUM 
+    # Only used by approx_percentile
+    percentile: float = Field(DEFAULT_PERCENTILE, ge=0, le=100)
+    # Only used by histogram; the range defaults to the values' min and max
+    bins: int = Field(DEFAULT_HISTOGRAM_BINS, ge=1, le=MAX_HISTOGRAM_BINS)
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+    
+    @root_validator
+    def check_histogram_range(cls, values):
+        """lower and upper come together and bound a finite, non-empty range"""
+        lower, upper = values.get('lower'), values.get('upper')
+        if lower is None and upper is None:
+            return values
+        if lower is None or upper is None:
+            raise ValueError("lower and upper must be given together")
+        if not (math.isfinite(lower) and math.isfinite(upper) and lower < upper):
+            raise ValueError("lower must be less than upper and both finite")
+        return values
+
+
+class GroupParamsSchema(BaseModel):
+    """Pydantic schema for group-by aggregation parameters validation"""
+    group_by: str
+    fields: List[str]
+    operations: List[AggregationOperationEnum] = Field(
+        default_factory=lambda: [
+            operation for operation in AggregationOperationEnum if operation.value not in UNGROUPED_OPERATIONS
+        ]
+    )
+    
+    @validator('fields', 'operations', pre=True)
+    def split_comma_separated(cls, v):
+        """Accept comma-separated query string values, e.g. fields=price,quantity"""
+        if isinstance(v, str):
+            return [part.strip() for part in v.split(',') if part.strip()]
+        return v
+    
+    @validator('fields')
+    def ensure_fields(cls, v):
+        if not v:
+            raise ValueError("At least one field is required")
+        return v
+    
+    @validator('operations')
+    def ensure_grouped_operations(cls, v):
+        ungrouped = [operation.value for operation in v if operation.value in UNGROUPED_OPERATIONS]
+        if ungrouped:
+            raise ValueError(f"Operations not supported per group: {', '.join(ungrouped)}")
+        return v
+
+
+class PaginationParamsSchema(BaseModel):
+    """Pydantic schema for keyset pagination parameters validation"""
+    limit: Optional[int] = Field(None, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+
+
+class DeltaParamsSchema(BaseModel):
+    """Pydantic schema for delta sync parameters validation"""
+    since: int = Field(..., ge=0)
+
+
+class UploadParamsSchema(BaseModel):
+    """Pydantic schema for streamed upload parameters validation"""
+    chunk_size: int = Field(DEFAULT_UPLOAD_CHUNK_SIZE, ge=1, le=MAX_UPLOAD_CHUNK_SIZE)
\ No newline at end of file
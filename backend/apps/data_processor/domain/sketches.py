@@ -0,0 +1,269 @@
+from typing import Any, Iterable, List, Optional, Union
+from hashlib import blake2b
+from itertools import islice
+import math
+import random
+
+# Operations answered from sketches rather than exact values
+APPROXIMATE_OPERATIONS = ("approx_distinct", "approx_percentile")
+
+# Percentile reported by approx_percentile when none is requested (the median)
+DEFAULT_PERCENTILE = 50.0
+
+# HyperLogLog registers: 2**14 one-byte registers, 16 KiB per sketch
+DEFAULT_HLL_PRECISION = 14
+
+# Values deduplicated together before hashing by HyperLogLog.update
+HLL_BATCH_SIZE = 10000
+
+# KLL accuracy parameter: about 3 * k values are retained
+DEFAULT_KLL_K = 200
+
+
+def _encode(value: Any) -> bytes:
+    """
+    Canonical bytes of a value: numbers that compare equal (1, 1.0, True)
+    encode the same, and never collide with strings.
+    """
+    if isinstance(value, (int, float)):
+        try:
+            return b"n" + repr(float(value)).encode()
+        except OverflowError:
+            return b"n" + repr(value).encode()
+    return b"s" + str(value).encode("utf-8")
+
+
+def _sigma(x: float) -> float:
+    """Ertl's sigma function, corrects for empty registers"""
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous = z
+        z += x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x: float) -> float:
+    """Ertl's tau function, corrects for saturated registers"""
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        previous = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch counting distinct values in O(1) memory.
+
+    Values are hashed with 64-bit BLAKE2b (stable across processes) and
+    2**precision registers keep the longest run of leading zeros seen per
+    bucket. The count uses Ertl's improved raw estimator, which needs no
+    bias tables and is accurate from a handful of values up to billions.
+    The relative standard error is 1.04 / sqrt(2**precision): 0.81% at the
+    default precision 14, so 99% of estimates fall within about 2.1%.
+    Sketches of the same precision merge exactly: the merge of partition
+    sketches equals the sketch of all values.
+    """
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @property
+    def standard_error(self) -> float:
+        """Relative standard error of count()"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, value: Any) -> None:
+        """Add one value"""
+        self._add_hash(int.from_bytes(blake2b(_encode(value), digest_size=8).digest(), "big"))
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Add many values, hashing each distinct one once per batch"""
+        values = iter(values)
+        while True:
+            batch = {_encode(value) for value in islice(values, HLL_BATCH_SIZE)}
+            if not batch:
+                return
+            for encoded in batch:
+                self._add_hash(int.from_bytes(blake2b(encoded, digest_size=8).digest(), "big"))
+
+    def _add_hash(self, hashed: int) -> None:
+        width = 64 - self.precision
+        bucket = hashed >> width
+        rank = width - (hashed & ((1 << width) - 1)).bit_length() + 1
+        if rank > self.registers[bucket]:
+            self.registers[bucket] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge precision {other.precision} into {self.precision}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def is_empty(self) -> bool:
+        return not any(self.registers)
+
+    def count(self) -> float:
+        """Estimated number of distinct values"""
+        m = len(self.registers)
+        width = 64 - self.precision
+        histogram = [0] * (width + 2)
+        for register in self.registers:
+            histogram[register] += 1
+        z = m * _tau(1 - histogram[width + 1] / m)
+        for rank in range(width, 0, -1):
+            z = 0.5 * (z + histogram[rank])
+        z += m * _sigma(histogram[0] / m)
+        return m * m / (2 * math.log(2) * z)
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang and Liberty) over ordered values.
+
+    Level h holds values that each stand for 2**h inputs. A full level is
+    sorted and every other value (random offset) is promoted to the next
+    level, with capacities shrinking geometrically (factor 2/3) towards
+    the lower levels, so about 3 * k values are retained however many are
+    added. With the default k = 200 the rank error of a quantile is
+    typically under 1% and below 1.7% with 99% confidence, e.g. p95 is a
+    value whose true rank lies between p93.3 and p96.7. The exact
+    minimum and maximum are kept too. Sketches merge by concatenating
+    levels and compacting, so partitions can be sketched independently.
+    """
+
+    def __init__(self, k: int = DEFAULT_KLL_K, seed: Optional[int] = None):
+        self.k = k
+        self.count = 0
+        self.minimum: Any = None
+        self.maximum: Any = None
+        self.levels: List[List[Any]] = [[]]
+        self._random = random.Random(seed)
+        self._retained = 0
+        self._capacity = self._total_capacity()
+
+    def _level_capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _total_capacity(self) -> int:
+        return sum(self._level_capacity(level) for level in range(len(self.levels)))
+
+    def add(self, value: Any) -> None:
+        """Add one value"""
+        if self.count == 0:
+            self.minimum = self.maximum = value
+        elif value < self.minimum:
+            self.minimum = value
+        elif value > self.maximum:
+            self.maximum = value
+        self.count += 1
+        self.levels[0].append(value)
+        self._retained += 1
+        if self._retained >= self._capacity:
+            self._compress()
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Add many values"""
+        for value in values:
+            self.add(value)
+
+    def _compress(self) -> None:
+        """Compact the lowest full level(s) until the sketch fits its capacity"""
+        while self._retained >= self._capacity:
+            for level, values in enumerate(self.levels):
+                if len(values) < self._level_capacity(level):
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                values.sort()
+                # An odd value out stays behind
+                leftover = [values.pop()] if len(values) % 2 else []
+                offset = self._random.random() < 0.5
+                self.levels[level + 1].extend(values[offset::2])
+                self.levels[level] = leftover
+                break
+            self._retained = sum(len(values) for values in self.levels)
+            self._capacity = self._total_capacity()
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold another sketch into this one"""
+        if other.count == 0:
+            return self
+        if self.count == 0 or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.count == 0 or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        self.count += other.count
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, values in enumerate(other.levels):
+            self.levels[level].extend(values)
+        self._retained = sum(len(values) for values in self.levels)
+        self._capacity = self._total_capacity()
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> Any:
+        """
+        Value at quantile q (0..1): the smallest retained value whose
+        estimated rank reaches q * count. None when the sketch is empty.
+        """
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.minimum
+        if q >= 1:
+            return self.maximum
+        weighted = sorted(
+            (value, 1 << level) for level, values in enumerate(self.levels) for value in values
+        )
+        target = q * sum(weight for _, weight in weighted)
+        rank = 0
+        for value, weight in weighted:
+            rank += weight
+            if rank >= target:
+                return value
+        return self.maximum
+
+
+def new_sketch(operation: str) -> Union[HyperLogLog, KLLSketch]:
+    """An empty sketch for an approximate operation, to be fed with update()"""
+    if operation == "approx_distinct":
+        return HyperLogLog()
+    return KLLSketch(seed=0)
+
+
+def sketch_result(sketch: Union[HyperLogLog, KLLSketch], operation: str, percentile: float = DEFAULT_PERCENTILE) -> Optional[Any]:
+    """The answer of a sketch built by new_sketch, None when it saw no values"""
+    if operation == "approx_distinct":
+        return None if sketch.is_empty() else round(sketch.count())
+    return sketch.quantile(percentile / 100)
+
+
+def approximate_aggregate(values: Iterable[Any], operation: str, percentile: float = DEFAULT_PERCENTILE) -> Optional[Any]:
+    """
+    Answer an approximate aggregation over a stream of values in O(1)
+    memory: approx_distinct counts distinct values, approx_percentile
+    returns the value at `percentile` (0..100). None when there are no values.
+    The quantile sketch is seeded, so the same values give the same answer.
+    """
+    if operation not in APPROXIMATE_OPERATIONS:
+        return None
+    sketch = new_sketch(operation)
+    sketch.update(values)
+    return sketch_result(sketch, operation, percentile)
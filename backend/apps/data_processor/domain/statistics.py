@@ -0,0 +1,151 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import math
+
+# Operations returning several statistics of a field at once
+STATISTICS_OPERATIONS = ("stats", "histogram")
+
+# Histogram bins used when none are requested, and the most allowed
+DEFAULT_HISTOGRAM_BINS = 10
+MAX_HISTOGRAM_BINS = 1000
+
+
+class RunningStats:
+    """
+    Count, sum, mean, min, max and variance of a stream in one pass.
+
+    The variance is accumulated with Welford's algorithm: the running mean
+    and the sum of squared deviations from it (m2) are updated per value,
+    which avoids the catastrophic cancellation of sum(x^2) - sum(x)^2 / n.
+    Two accumulators merge exactly with Chan's formula, so partitions can
+    be summarized independently. The variance is the population variance.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total: Any = 0
+        self.minimum: Any = None
+        self.maximum: Any = None
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: Any) -> None:
+        """Add one value"""
+        if self.count == 0:
+            self.minimum = self.maximum = value
+        elif value < self.minimum:
+            self.minimum = value
+        elif value > self.maximum:
+            self.maximum = value
+        self.count += 1
+        self.total += value
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Add many values"""
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Fold another accumulator into this one"""
+        if other.count == 0:
+            return self
+        if self.count == 0 or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.count == 0 or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self._mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        return self
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """The statistics, or None when no values were added"""
+        if self.count == 0:
+            return None
+        return stats_result(self.count, self.total, self.minimum, self.maximum, self._m2 / self.count)
+
+
+def stats_result(count: int, total: Any, minimum: Any, maximum: Any, variance: float) -> Dict[str, Any]:
+    """The result of the stats operation"""
+    variance = max(variance, 0.0)
+    return {
+        "count": count,
+        "sum": total,
+        "mean": total / count,
+        "min": minimum,
+        "max": maximum,
+        "variance": variance,
+        "stddev": math.sqrt(variance),
+    }
+
+
+def histogram_bounds(minimum: float, maximum: float) -> Tuple[float, float]:
+    """Default histogram range: the values' range, widened by 0.5 each way when it is empty"""
+    if minimum == maximum:
+        return minimum - 0.5, maximum + 0.5
+    return minimum, maximum
+
+
+def histogram_bin(value: float, lower: float, upper: float, bins: int) -> Optional[int]:
+    """
+    Bin of a value: floor((value - lower) * bins / (upper - lower)), with
+    `upper` itself in the last bin. None for values outside [lower, upper]
+    (and NaN). SQL evaluates the same float expression, so both agree.
+    """
+    if not lower <= value <= upper:
+        return None
+    if value == upper:
+        return bins - 1
+    return min(int((value - lower) * bins / (upper - lower)), bins - 1)
+
+
+def histogram_result(lower: float, upper: float, counts: List[int]) -> Dict[str, Any]:
+    """The result of the histogram operation: equal-width bins with their counts"""
+    bins = len(counts)
+    width = (upper - lower) / bins
+    edges = [lower + width * index for index in range(bins)] + [upper]
+    return {
+        "lower": lower,
+        "upper": upper,
+        "bins": [
+            {"lower": edges[index], "upper": edges[index + 1], "count": count}
+            for index, count in enumerate(counts)
+        ],
+    }
+
+
+class Histogram:
+    """Fixed-width histogram of a stream over a known range [lower, upper]"""
+
+    def __init__(self, lower: float, upper: float, bins: int = DEFAULT_HISTOGRAM_BINS):
+        if not lower < upper:
+            raise ValueError(f"lower must be less than upper, got {lower} and {upper}")
+        self.lower = float(lower)
+        self.upper = float(upper)
+        self.counts = [0] * bins
+
+    def add(self, value: Any) -> None:
+        """Count one value; values outside the range are ignored"""
+        index = histogram_bin(float(value), self.lower, self.upper, len(self.counts))
+        if index is not None:
+            self.counts[index] += 1
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Count many values"""
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        """Fold another histogram with the same range and bins into this one"""
+        if (other.lower, other.upper, len(other.counts)) != (self.lower, self.upper, len(self.counts)):
+            raise ValueError("Cannot merge histograms with different bins")
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        return histogram_result(self.lower, self.upper, self.counts)
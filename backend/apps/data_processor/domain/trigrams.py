@@ -0,0 +1,84 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Length of the n-grams indexed; needles shorter than this scan every text
+GRAM_SIZE = 3
+
+
+def trigrams(text: str) -> Set[str]:
+    """The distinct GRAM_SIZE-character substrings of a text"""
+    return {text[start:start + GRAM_SIZE] for start in range(len(text) - GRAM_SIZE + 1)}
+
+
+class TrigramIndex:
+    """
+    Inverted n-gram index answering case-insensitive substring queries.
+
+    Texts are upper-cased once when they are added, and every trigram
+    points at the set of keys (e.g. item positions) whose text contains
+    it. A query upper-cases the needle, intersects the postings of its
+    trigrams starting from the rarest, and confirms each candidate with a
+    plain `in` test, so results are exactly those of
+    `needle.upper() in text.upper()` without touching unrelated texts.
+    Keys can be added and removed one at a time.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, str]] = ()):
+        self._texts: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        for key, text in entries:
+            self.add(key, text)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._texts
+
+    def add(self, key: int, text: str) -> None:
+        """Index `text` under `key`, replacing what the key held before"""
+        if key in self._texts:
+            self.remove(key)
+        text = text.upper()
+        self._texts[key] = text
+        for gram in trigrams(text):
+            self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: int) -> None:
+        """Drop a key from the index (no-op when it is not indexed)"""
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for gram in trigrams(text):
+            keys = self._postings[gram]
+            keys.discard(key)
+            if not keys:
+                del self._postings[gram]
+
+    def candidates(self, needle: str) -> Optional[Set[int]]:
+        """
+        Keys whose text holds every trigram of the upper-cased needle, or
+        None when the needle is too short to narrow anything down.
+        """
+        grams = trigrams(needle.upper())
+        if not grams:
+            return None
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        result = set(postings[0])
+        for keys in postings[1:]:
+            if not result:
+                break
+            result &= keys
+        return result
+
+    def search(self, needle: str) -> List[int]:
+        """Keys whose text contains the needle, ignoring case, in ascending order"""
+        upper = needle.upper()
+        keys = self.candidates(needle)
+        if keys is None:
+            keys = self._texts.keys()
+        texts = self._texts
+        return sorted(key for key in keys if upper in texts[key])
@@ -0,0 +1,162 @@
+from typing import Any, Callable, Dict, Optional
+import logging
+from apps.data_processor.domain.models import DataItem
+from apps.data_processor.domain.schemas import DataItemSchema
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Field annotations the fast path was written against
+FAST_PATH_FIELDS = {
+    "id": Optional[int],
+    "name": Optional[str],
+    "price": Optional[float],
+    "quantity": Optional[int],
+    "category": Optional[str],
+    "numeric_fields": Dict[str, float],
+    "string_fields": Dict[str, str],
+}
+
+# Integer strings longer than this are left to pydantic, which caps them itself
+MAX_FAST_INT_STRING = 100
+
+ItemValidator = Callable[[Any], DataItem]
+
+
+def _numeric(value: Any) -> Optional[float]:
+    """float() of a value pydantic would coerce the same way; None when undecided"""
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int or value_type is str:
+        try:
+            return float(value)
+        except (ValueError, OverflowError):
+            return None
+    return None
+
+
+def _integer(value: Any) -> Optional[int]:
+    """int() of a value pydantic would coerce the same way; None when undecided"""
+    value_type = type(value)
+    if value_type is int:
+        return value
+    if value_type is str and len(value) <= MAX_FAST_INT_STRING:
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _fast_validate(record: Any) -> Optional[DataItem]:
+    """
+    Validate a plain JSON-like product record the way DataItemSchema.parse_obj
+    followed by to_domain() would. Returns None for anything it cannot decide
+    with certainty (invalid records included), leaving it to the schema.
+    """
+    if type(record) is not dict:
+        return None
+
+    # Copy the nested fields, coercing values like Dict[str, float] does
+    numeric_fields = {}
+    if "numeric_fields" in record:
+        raw = record["numeric_fields"]
+        if type(raw) is not dict:
+            return None
+        for key, value in raw.items():
+            number = _numeric(value)
+            if type(key) is not str or number is None:
+                return None
+            numeric_fields[key] = number
+
+    string_fields = {}
+    if "string_fields" in record:
+        raw = record["string_fields"]
+        if type(raw) is not dict:
+            return None
+        for key, value in raw.items():
+            if type(key) is not str or type(value) is not str:
+                return None
+            string_fields[key] = value
+
+    # Top-level frontend fields, in the order process_frontend_fields applies them
+    name = record.get("name")
+    if name is not None:
+        if type(name) is not str:
+            return None
+        if name:
+            string_fields["name"] = name
+
+    price = record.get("price")
+    if price is not None:
+        number = _numeric(price)
+        if number is None:
+            return None
+        numeric_fields["price"] = number
+
+    quantity = record.get("quantity")
+    if quantity is not None:
+        integer = _integer(quantity)
+        if integer is None:
+            return None
+        try:
+            numeric_fields["quantity"] = float(integer)
+        except OverflowError:
+            return None
+
+    category = record.get("category")
+    if category is not None:
+        if type(category) is not str:
+            return None
+        if category:
+            string_fields["category"] = category
+
+    item_id = record.get("id")
+    if item_id is not None and type(item_id) is not int:
+        return None
+
+    return DataItem(id=item_id, numeric_fields=numeric_fields, string_fields=string_fields)
+
+
+def _matches_fast_path(schema) -> bool:
+    """Check that a schema still has the shape _fast_validate was written for"""
+    fields = {name: field.annotation for name, field in schema.__fields__.items()}
+    config = schema.__config__
+    return (
+        fields == FAST_PATH_FIELDS
+        and [validator.__name__ for validator in schema.__pre_root_validators__] == ["process_frontend_fields"]
+        and not schema.__post_root_validators__
+        and config.extra == "allow"
+        and not (config.anystr_strip_whitespace or config.anystr_upper or config.anystr_lower)
+        and not config.min_anystr_length
+        and config.max_anystr_length is None
+        and config.allow_inf_nan
+    )
+
+
+def compile_item_validator(schema=DataItemSchema) -> ItemValidator:
+    """
+    Build a product validator equivalent to schema.parse_obj(record).to_domain().
+
+    Plain records (str/int/float values, dict nested fields) are checked by a
+    specialized function that skips pydantic's model construction, the root
+    validator's dict copies and the per-field validator chains. Everything
+    else, including every invalid record, goes through the schema itself, so
+    accepted values and raised ValidationErrors are identical. If the schema
+    no longer matches the shape the fast path was written for, the schema is
+    used for every record.
+    """
+    if not _matches_fast_path(schema):
+        logger.warning(f"{schema.__name__} changed shape; item validation uses the schema only")
+        return lambda record: schema.parse_obj(record).to_domain()
+
+    def validate_item(record: Any) -> DataItem:
+        item = _fast_validate(record)
+        return item if item is not None else schema.parse_obj(record).to_domain()
+
+    return validate_item
+
+
+# Validator for DataItemSchema, built once at import
+validate_item = compile_item_validator()
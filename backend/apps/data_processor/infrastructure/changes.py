@@ -0,0 +1,150 @@
+from typing import Any, Dict, List, Optional
+from threading import Event, Lock, Thread
+import json
+import logging
+import select
+from django.conf import settings
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from shared.events.broadcaster import Broadcaster, DEFAULT_MAX_PENDING
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# PostgreSQL channel carrying data entry changes between workers
+CHANGES_CHANNEL = "data_entries_changes"
+
+# Change events list at most this many ids; larger batches only carry a count
+# (NOTIFY payloads are limited to 8000 bytes)
+MAX_EVENT_IDS = 500
+
+# Seconds the LISTEN thread waits on the socket, and before reconnecting
+LISTEN_POLL_SECONDS = 5
+LISTEN_RETRY_SECONDS = 5
+
+# session.info key of the changes waiting for the transaction to commit
+_PENDING = "data_entry_changes"
+
+# Process-wide feed of committed data entry changes
+change_broadcaster = Broadcaster(
+    max_pending=getattr(settings, "CHANGE_FEED_MAX_PENDING", DEFAULT_MAX_PENDING)
+)
+
+
+def make_event(kind: str, generation: int, ids: List[int]) -> Dict[str, Any]:
+    """A change event: created/updated/deleted, the dataset generation and the ids"""
+    return {
+        "type": kind,
+        "generation": generation,
+        "ids": list(ids) if len(ids) <= MAX_EVENT_IDS else None,
+        "count": len(ids),
+    }
+
+
+def uses_notify(session: Session) -> bool:
+    """Whether changes fan out through PostgreSQL LISTEN/NOTIFY"""
+    return (getattr(settings, "CHANGE_FEED_NOTIFY", False)
+            and session.get_bind().dialect.name == "postgresql")
+
+
+class ChangeRecorder:
+    """
+    Records the data entry changes of a session's transaction.
+
+    Events are published only once the transaction commits and are dropped
+    on rollback. Locally they go to the broadcaster from an after_commit
+    hook; with LISTEN/NOTIFY they are sent with pg_notify inside the
+    transaction, which PostgreSQL delivers to every worker at commit.
+    """
+
+    def __init__(self, session: Session, broadcaster: Broadcaster = change_broadcaster):
+        self.session = session
+        self.broadcaster = broadcaster
+
+    def record(self, kind: str, generation: int, ids: List[int]) -> None:
+        """Record created, updated or deleted entries"""
+        change = make_event(kind, generation, ids)
+        if uses_notify(self.session):
+            self.session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": CHANGES_CHANNEL, "payload": json.dumps(change)}
+            )
+        else:
+            self.session.info.setdefault(_PENDING, []).append((self.broadcaster, change))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    for broadcaster, change in session.info.pop(_PENDING, ()):
+        broadcaster.publish(change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+class NotifyListener(Thread):
+    """
+    Relays NOTIFY payloads on CHANGES_CHANNEL into a local broadcaster.
+
+    Uses one connection detached from the engine's pool. After a lost
+    connection it publishes a reset event, since notifications sent while
+    it was away are gone and clients must catch up with delta sync.
+    """
+
+    def __init__(self, engine: Engine, broadcaster: Broadcaster = change_broadcaster):
+        super().__init__(name="change-feed-listener", daemon=True)
+        self.engine = engine
+        self.broadcaster = broadcaster
+        self._stopped = Event()
+
+    def stop(self) -> None:
+        """Ask the thread to finish after its current poll"""
+        self._stopped.set()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.listen()
+            except Exception as e:
+                logger.error(f"Change feed listener failed: {str(e)}")
+                self.broadcaster.publish({"type": "reset"})
+                self._stopped.wait(LISTEN_RETRY_SECONDS)
+
+    def listen(self) -> None:
+        """LISTEN and relay notifications until stopped or disconnected"""
+        connection = self.engine.raw_connection()
+        connection.detach()
+        try:
+            dbapi_connection = connection.dbapi_connection
+            dbapi_connection.autocommit = True
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"LISTEN {CHANGES_CHANNEL}")
+            cursor.close()
+            logger.info(f"Listening for changes on {CHANGES_CHANNEL}")
+            while not self._stopped.is_set():
+                if not select.select([dbapi_connection], [], [], LISTEN_POLL_SECONDS)[0]:
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    notification = dbapi_connection.notifies.pop(0)
+                    self.broadcaster.publish(json.loads(notification.payload))
+        finally:
+            connection.close()
+
+
+_listener: Optional[NotifyListener] = None
+_listener_lock = Lock()
+
+
+def ensure_listener(engine: Engine) -> None:
+    """Start this worker's LISTEN thread once, if changes fan out through NOTIFY"""
+    global _listener
+    if not getattr(settings, "CHANGE_FEED_NOTIFY", False) or engine.dialect.name != "postgresql":
+        return
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = NotifyListener(engine)
+            _listener.start()
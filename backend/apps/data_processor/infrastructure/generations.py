@@ -0,0 +1,69 @@
+from typing import Optional, Tuple
+from datetime import datetime
+import logging
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from .models import DataEntry, DatasetGeneration
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class DatasetGenerationStore:
+    """
+    Reads and bumps the generation of a dataset (data_entries by default).
+
+    bump() is called by DataEntryRepository inside the writing transaction,
+    so a new generation becomes visible exactly when the write commits.
+    """
+
+    def __init__(self, session: Session, name: str = DataEntry.__tablename__):
+        self.session = session
+        self.name = name
+
+    def current(self) -> int:
+        """The committed generation; 0 before the first write"""
+        generation = self.session.execute(
+            select(DatasetGeneration.generation).where(DatasetGeneration.name == self.name)
+        ).scalar()
+        return generation or 0
+
+    def state(self) -> Tuple[int, Optional[datetime]]:
+        """The committed generation and when it last changed (UTC), from one lookup"""
+        row = self.session.execute(
+            select(DatasetGeneration.generation, DatasetGeneration.updated_at)
+            .where(DatasetGeneration.name == self.name)
+        ).first()
+        return (row.generation, row.updated_at) if row else (0, None)
+
+    def bump(self) -> int:
+        """
+        Advance the generation by one and return it. On PostgreSQL the row
+        stays locked until the transaction ends, so writers commit in
+        generation order. A missing row (databases created before the table
+        existed) is created by an upsert, so concurrent first writers do
+        not collide on it.
+        """
+        changed_at = datetime.utcnow()
+        dialect = self.session.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            statement = insert(DatasetGeneration).values(
+                name=self.name, generation=1, updated_at=changed_at
+            ).on_conflict_do_update(
+                index_elements=["name"],
+                set_={"generation": DatasetGeneration.generation + 1, "updated_at": changed_at}
+            ).returning(DatasetGeneration.generation)
+            return self.session.execute(statement).scalar_one()
+
+        result = self.session.execute(
+            update(DatasetGeneration)
+            .where(DatasetGeneration.name == self.name)
+            .values(generation=DatasetGeneration.generation + 1, updated_at=changed_at)
+        )
+        if result.rowcount == 0:
+            raise RuntimeError(
+                f"No dataset_generations row for {self.name!r}; run upgrade_schema() to create it"
+            )
+        return self.current()
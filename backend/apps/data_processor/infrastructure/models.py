@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Text, JSON, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from shared.db.base_model import BaseModel
 import logging
@@ -10,9 +11,14 @@ class DataEntry(BaseModel):
     """SQLAlchemy model for storing data entries"""
     __tablename__ = "data_entries"
     
-    # Store numeric and string fields in JSON format
-    numeric_fields = Column(JSON, nullable=False, default=dict)
-    string_fields = Column(JSON, nullable=False, default=dict)
+    # Store numeric and string fields in JSON format (JSONB on PostgreSQL so
+    # the hot keys can be indexed, see infrastructure/schema.py)
+    numeric_fields = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False, default=dict)
+    string_fields = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False, default=dict)
+    
+    # Dataset generation of the write that last created or updated the entry,
+    # the watermark of delta sync (NULL for entries written before it existed)
+    generation = Column(Integer, nullable=True, index=True)
     
     def to_domain(self):
         """Convert to domain model"""
@@ -49,4 +55,56 @@ class DataEntry(BaseModel):
             id=data_item.id,
             numeric_fields=numeric_fields,
             string_fields=string_fields
-        ) 
\ No newline at end of file
+        ) 
+
+
+class AggregateSummary(BaseModel):
+    """
+    SQLAlchemy model for running aggregates of a numeric field.
+    One row per (group_by, group_key, field); the global summary of a field
+    uses an empty group_by. group_key is the JSON encoding of the group
+    value, so the group of entries without the key ("null") stays unique.
+    exact_total is the exact sum as a fraction ("n/d"), so inserts and
+    deletes never accumulate rounding error; total is its nearest float.
+    It is NULL once a non-finite value was summed, until the next rebuild.
+    """
+    __tablename__ = "data_entry_summaries"
+    __table_args__ = (
+        UniqueConstraint("group_by", "group_key", "field", name="uq_data_entry_summaries_scope"),
+    )
+    
+    group_by = Column(String, nullable=False, default="")
+    group_key = Column(String, nullable=False, default="null")
+    field = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0)
+    exact_total = Column(Text, nullable=True)
+    minimum = Column(Float, nullable=True)
+    maximum = Column(Float, nullable=True)
+
+
+class DataEntryTombstone(BaseModel):
+    """
+    SQLAlchemy model for a deleted data entry, kept so delta sync can tell
+    clients which entries to drop. generation is the dataset generation of
+    the delete. Tombstones older than the retention
+    (TOMBSTONE_RETENTION_GENERATIONS) are pruned by later deletes; a client
+    syncing from before it gets a full resync instead.
+    """
+    __tablename__ = "data_entry_tombstones"
+    
+    entry_id = Column(Integer, nullable=False)
+    generation = Column(Integer, nullable=False, index=True)
+
+
+class DatasetGeneration(BaseModel):
+    """
+    SQLAlchemy model for the change counter of a dataset.
+    The generation is bumped in the same transaction as every write to the
+    dataset, so any worker can tell whether results it computed earlier are
+    still current with one primary-key lookup.
+    """
+    __tablename__ = "dataset_generations"
+    
+    name = Column(String, nullable=False, unique=True)
+    generation = Column(Integer, nullable=False, default=0)
\ No newline at end of file
@@ -0,0 +1,276 @@
+from typing import Any, List, Optional
+from decimal import Decimal
+from sqlalchemy import and_, or_, not_, false, null, func, cast, case, select, Integer, Numeric
+from sqlalchemy.sql import Select
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.sql.elements import ColumnElement
+from apps.data_processor.domain.expressions import Expression, Comparison, And, Not
+from apps.data_processor.domain.statistics import stats_result
+from .models import DataEntry
+
+# Dialects whose JSON operators SQLAlchemy can compile for us
+JSON_QUERY_DIALECTS = ("postgresql", "sqlite")
+
+
+def supports_json_queries(session) -> bool:
+    """Check whether the session's database can evaluate JSON path predicates"""
+    return session.get_bind().dialect.name in JSON_QUERY_DIALECTS
+
+
+def numeric_value(key: str) -> ColumnElement:
+    """SQL expression for a numeric_fields key, e.g. (numeric_fields->>'price')::float"""
+    return DataEntry.numeric_fields[key].as_float()
+
+
+def string_value(key: str) -> ColumnElement:
+    """SQL expression for a string_fields key, e.g. string_fields->>'name'"""
+    return DataEntry.string_fields[key].as_string()
+
+
+class ExactNumeric(TypeDecorator):
+    """
+    NUMERIC whose results are kept as the driver returns them: an exact
+    Decimal on PostgreSQL, whose scale tells a sum of ints from one with a
+    float in it, and the int or float SQLite computed, rather than a
+    Decimal rounded to a fixed scale.
+    """
+    impl = Numeric
+    cache_ok = True
+
+    def result_processor(self, dialect, coltype):
+        return None
+
+
+def decimal_value(key: str) -> ColumnElement:
+    """Exact numeric expression for a numeric_fields key, e.g. (numeric_fields->>'price')::numeric"""
+    return cast(DataEntry.numeric_fields[key].as_string(), ExactNumeric)
+
+
+def _compare(expression: ColumnElement, value: Any, operator: str) -> ColumnElement:
+    """Apply an ordering/equality operator to an expression"""
+    if operator == "eq":
+        return expression == value
+    elif operator == "neq":
+        return expression != value
+    elif operator == "gt":
+        return expression > value
+    elif operator == "lt":
+        return expression < value
+    return false()
+
+
+def compile_filter(field: str, value: Any, operator: str = "eq") -> Optional[ColumnElement]:
+    """
+    Compile a field/operator/value triple into a SQL predicate.
+
+    The predicate selects exactly the rows DataSet.filter would keep: numeric
+    keys take precedence over string keys, rows missing the field are dropped,
+    and values that cannot be coerced match nothing. Every branch guards its
+    JSON expression with IS NOT NULL so the predicate never evaluates to NULL.
+    Returns None when the triple cannot be expressed in SQL.
+    """
+    if not isinstance(field, str):
+        return None
+
+    # Special case for ID field
+    if field == "id":
+        try:
+            # bool is an int in Python, but SQL only accepts it with =/!=
+            compare_value = int(value) if not isinstance(value, int) or isinstance(value, bool) else value
+        except (ValueError, TypeError):
+            return false()
+        if operator not in ("eq", "neq", "gt", "lt"):
+            return false()
+        return and_(DataEntry.id.isnot(None), _compare(DataEntry.id, compare_value, operator))
+
+    number = numeric_value(field)
+    text = string_value(field)
+
+    # Numeric branch: the key exists in numeric_fields
+    try:
+        compare_number = float(value) if not isinstance(value, (int, float)) or isinstance(value, bool) else value
+        numeric_predicate = and_(number.isnot(None), _compare(number, compare_number, operator))
+    except (ValueError, TypeError):
+        numeric_predicate = false()
+
+    # String branch: only reached when the key is absent from numeric_fields
+    if operator in ("eq", "neq") and not isinstance(value, str):
+        # A string never equals a non-string value
+        string_match = false() if operator == "eq" else text.isnot(None)
+    elif operator in ("eq", "neq"):
+        string_match = _compare(text, value, operator)
+    elif operator == "contains" and isinstance(value, str):
+        # Case-insensitive contains check
+        string_match = func.upper(text).contains(value.upper(), autoescape=True)
+    else:
+        string_match = false()
+    string_predicate = and_(number.is_(None), text.isnot(None), string_match)
+
+    return or_(numeric_predicate, string_predicate)
+
+
+def compile_expression(expression: Expression) -> Optional[ColumnElement]:
+    """
+    Compile a boolean filter expression into one SQL predicate.
+    compile_filter never yields NULL, so NOT is an exact complement. Returns
+    None when any comparison cannot be expressed in SQL.
+    """
+    if isinstance(expression, Comparison):
+        return compile_filter(expression.field, expression.value, expression.operator)
+    if isinstance(expression, Not):
+        child = compile_expression(expression.child)
+        return not_(child) if child is not None else None
+    children = [compile_expression(child) for child in expression.children]
+    if any(child is None for child in children):
+        return None
+    return and_(*children) if isinstance(expression, And) else or_(*children)
+
+
+def sort_expression(field: str, kind: str) -> ColumnElement:
+    """SQL expression to order by for a field of the given kind (id, numeric or string)"""
+    if kind == "id":
+        return DataEntry.id
+    return numeric_value(field) if kind == "numeric" else string_value(field)
+
+
+def sort_order(key: ColumnElement, ascending: bool = True) -> list:
+    """
+    ORDER BY clauses for keyset pagination.
+    Ties are broken by ascending id in both directions, which is the order
+    the stable sort in DataSet.sort leaves them in.
+    """
+    if key is DataEntry.id:
+        return [DataEntry.id.asc() if ascending else DataEntry.id.desc()]
+    return [key.asc() if ascending else key.desc(), DataEntry.id.asc()]
+
+
+def keyset_condition(key: ColumnElement, ascending: bool, last_key: Any, last_id: int) -> ColumnElement:
+    """Predicate selecting the rows that come strictly after (last_key, last_id) in sort_order"""
+    if key is DataEntry.id:
+        return DataEntry.id > last_id if ascending else DataEntry.id < last_id
+    after = key > last_key if ascending else key < last_key
+    return or_(after, and_(key == last_key, DataEntry.id > last_id))
+
+
+
+def aggregate_expression(field: str, operation: str) -> Optional[ColumnElement]:
+    """
+    SQL aggregate over a numeric_fields key.
+
+    sum and avg run over the exact ::numeric value; min, max and count run
+    over the same float expression the key's expression index is built on,
+    so PostgreSQL can answer min/max from the index. Rows without the key
+    are ignored, as in DataSet.aggregate. Returns None for unknown operations.
+    """
+    if operation == "sum":
+        return func.sum(decimal_value(field))
+    elif operation == "avg":
+        return func.avg(decimal_value(field))
+    elif operation == "min":
+        return func.min(numeric_value(field))
+    elif operation == "max":
+        return func.max(numeric_value(field))
+    elif operation == "count":
+        return func.count(numeric_value(field))
+    return None
+
+
+def compile_aggregate(field: str, operation: str) -> Optional[Select]:
+    """Compile an aggregation over a numeric_fields key into a single-row SELECT"""
+    aggregate = aggregate_expression(field, operation)
+    return select(aggregate) if aggregate is not None else None
+
+
+def compile_group_aggregate(group_by: str, fields: List[str], operations: List[str]) -> Optional[Select]:
+    """
+    Compile a group-by over a string_fields key computing every field/operation
+    pair in one scan. Columns are the group key followed by one aggregate per
+    (field, operation) in nested order; rows without the key form the NULL
+    group, which sorts last.
+    """
+    aggregates = [aggregate_expression(field, operation) for field in fields for operation in operations]
+    if any(aggregate is None for aggregate in aggregates):
+        return None
+    key = string_value(group_by)
+    return select(key, *aggregates).group_by(key).order_by(key.asc().nulls_last())
+
+
+def compile_field_values(field: str, numeric_only: bool = False) -> Select:
+    """
+    Compile a SELECT of the values of one field, for streaming into a sketch.
+    Rows have one column, the numeric value, or two, (numeric value, string
+    value), where the numeric value takes precedence as in DataSet.sort.
+    Rows without the field are left out.
+    """
+    if field == "id" and not numeric_only:
+        return select(DataEntry.id)
+    number = numeric_value(field)
+    if numeric_only:
+        return select(number).where(number.isnot(None))
+    text = string_value(field)
+    return select(number, text).where(or_(number.isnot(None), text.isnot(None)))
+
+
+def compile_stats(field: str, dialect: str) -> Select:
+    """
+    Compile count, sum, min, max and population variance of a numeric_fields
+    key into a single-row SELECT. PostgreSQL computes var_pop over the exact
+    ::numeric value in the same scan; elsewhere the variance is the mean
+    squared deviation from a scalar AVG subquery, the numerically stable
+    two-pass form, rather than the cancellation-prone sum of squares.
+    """
+    value = numeric_value(field)
+    if dialect == "postgresql":
+        variance = func.var_pop(decimal_value(field))
+    else:
+        deviation = value - select(func.avg(value)).scalar_subquery()
+        variance = func.avg(deviation * deviation)
+    return select(func.count(value), func.sum(decimal_value(field)), func.min(value), func.max(value), variance)
+
+
+def stats_row_result(row: Any) -> Optional[dict]:
+    """Convert the row returned by compile_stats to the DataSet.aggregate stats result"""
+    count, total, minimum, maximum, variance = row
+    if not count:
+        return None
+    # The sum stays an int for int fields, as in aggregate_result
+    return stats_result(int(count), aggregate_result("sum", total), minimum, maximum, float(variance or 0))
+
+
+def compile_histogram(field: str, lower: float, upper: float, bins: int, dialect: str) -> Select:
+    """
+    Compile an equal-width histogram of a numeric_fields key over [lower, upper]
+    into a SELECT of (bin, count) rows for the non-empty bins. The bin is
+    floor((value - lower) * bins / (upper - lower)) evaluated in float8 exactly
+    as statistics.histogram_bin does, with `upper` in the last bin. Values
+    outside the range are counted in a NULL bin, so no rows at all means
+    the field has no values.
+    """
+    value = numeric_value(field)
+    scaled = (value - lower) * bins / (upper - lower)
+    if dialect == "postgresql":
+        # PostgreSQL rounds when casting to integer; the others truncate
+        scaled = func.floor(scaled)
+    index = case(
+        (or_(value < lower, value > upper), null()),
+        (value == upper, bins - 1),
+        (scaled >= bins, bins - 1),
+        else_=cast(scaled, Integer)
+    )
+    binned = select(index.label("bin")).where(value.is_not(None)).subquery()
+    return select(binned.c.bin, func.count()).group_by(binned.c.bin)
+
+
+def aggregate_result(operation: str, value: Any) -> Any:
+    """Convert a scalar returned by compile_aggregate to the DataSet.aggregate result"""
+    if value is None:
+        return None
+    if operation == "count":
+        # DataSet.aggregate reports no values as None rather than 0
+        return int(value) or None
+    if isinstance(value, Decimal):
+        # Only ints sum to a scale-0 numeric; DataSet.aggregate keeps them ints
+        if operation in ("sum", "min", "max") and value.is_finite() and value.as_tuple().exponent >= 0:
+            return int(value)
+        return float(value)
+    return value
\ No newline at end of file
@@ -1,36 +1,589 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Iterator, AsyncIterator, Sequence
+from datetime import datetime
+import asyncio
+from itertools import islice
+import csv
+import io
+import json
+from django.conf import settings
+from sqlalchemy import select, insert, delete, text, Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select
 from shared.db.base_repository import BaseRepository
-from apps.data_processor.domain.models import DataItem, DataSet
-from .models import DataEntry
+from apps.data_processor.domain.models import DataItem, DataSet, sort_value, top_k
+from apps.data_processor.domain.expressions import And, Comparison, Expression, compile_predicate
+from apps.data_processor.domain.sketches import APPROXIMATE_OPERATIONS, DEFAULT_PERCENTILE, approximate_aggregate
+from apps.data_processor.domain.statistics import (
+    STATISTICS_OPERATIONS, DEFAULT_HISTOGRAM_BINS, histogram_bounds, histogram_result
+)
+from .models import DataEntry, DataEntryTombstone
+from .summaries import AggregateSummaryStore
+from .generations import DatasetGenerationStore
+from .changes import ChangeRecorder
+from .queries import (
+    compile_filter, compile_expression, supports_json_queries, numeric_value,
+    sort_expression, sort_order, keyset_condition,
+    compile_aggregate, compile_group_aggregate, compile_field_values, aggregate_result,
+    compile_stats, stats_row_result, compile_histogram
+)
+
+# Batches at least this large are loaded with COPY on PostgreSQL
+COPY_THRESHOLD = 5000
+
+# Generations a delta sync can lag behind before it must resync fully
+DEFAULT_TOMBSTONE_RETENTION = 100_000
+
+
+def get_tombstone_retention() -> int:
+    """Generations of tombstones kept for delta sync"""
+    return getattr(settings, "TOMBSTONE_RETENTION_GENERATIONS", DEFAULT_TOMBSTONE_RETENTION)
+
+
+def domain_rows(batch_size: int, where: Optional[ColumnElement] = None) -> Select:
+    """Entries' id and fields (matching `where`) in id order, fetched `batch_size` rows at a time"""
+    statement = select(DataEntry.id, DataEntry.numeric_fields, DataEntry.string_fields)
+    if where is not None:
+        statement = statement.where(where)
+    return statement.order_by(DataEntry.id).execution_options(yield_per=batch_size)
+
+
+def changed_between(since: int, watermark: int) -> ColumnElement:
+    """Condition on entries written after generation `since`, up to `watermark`"""
+    return (DataEntry.generation > since) & (DataEntry.generation <= watermark)
+
+
+def field_value(row: Row) -> Any:
+    """The value of a compile_field_values row: numeric first, else string"""
+    return row[0] if row[0] is not None or len(row) == 1 else row[1]
+
+
+async def astream_batches(session: AsyncSession, statement: Select, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+    """
+    Stream the rows of a SELECT `batch_size` at a time, yielding to the event
+    loop after each batch so that other requests run between them.
+    """
+    result = await session.stream(statement.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        yield rows
+        await asyncio.sleep(0)
+
+
+async def aiter_domain_batches(
+    session: AsyncSession,
+    batch_size: int = 1000,
+    where: Optional[ColumnElement] = None
+) -> AsyncIterator[List[DataItem]]:
+    """Entries (matching `where`) as domain objects in id order, one list per batch"""
+    async for rows in astream_batches(session, domain_rows(batch_size, where), batch_size):
+        yield [DataItem(id=row.id, numeric_fields=row.numeric_fields, string_fields=row.string_fields) for row in rows]
+
+
+async def aiter_domain(session: AsyncSession, batch_size: int = 1000) -> AsyncIterator[DataItem]:
+    """DataEntryRepository.iter_domain for an AsyncSession, awaiting each batch"""
+    async for batch in aiter_domain_batches(session, batch_size):
+        for item in batch:
+            yield item
+
+
+async def aiter_field_values(
+    session: AsyncSession,
+    field: str,
+    numeric_only: bool = False,
+    batch_size: int = 10000
+) -> AsyncIterator[List[Any]]:
+    """DataEntryRepository.iter_field_values for an AsyncSession, one list per batch"""
+    async for rows in astream_batches(session, compile_field_values(field, numeric_only), batch_size):
+        yield [field_value(row) for row in rows]
+
 
 class DataEntryRepository(BaseRepository[DataEntry]):
     """Repository for data entries"""
     
+    copy_threshold = COPY_THRESHOLD
+    
     def __init__(self, session: Session):
         super().__init__(DataEntry, session)
+        self.summaries = AggregateSummaryStore(session)
+        self.generations = DatasetGenerationStore(session)
+        self.changes = ChangeRecorder(session)
+    
+    def on_created(self, instances: List[DataEntry]) -> None:
+        """Fold new entries into the aggregate summaries, stamp them with a new generation and record the change"""
+        self.summaries.apply(added=[(entry.numeric_fields, entry.string_fields) for entry in instances])
+        generation = self.stamp(instances)
+        self.changes.record("created", generation, [entry.id for entry in instances])
+    
+    def on_updated(self, instance: DataEntry, previous: Dict[str, Any]) -> None:
+        """Replace the old values of an updated entry in the aggregate summaries, stamp it and record the change"""
+        self.summaries.apply(
+            added=[(instance.numeric_fields, instance.string_fields)],
+            removed=[(previous.get("numeric_fields"), previous.get("string_fields"))]
+        )
+        generation = self.stamp([instance])
+        self.changes.record("updated", generation, [instance.id])
+    
+    def on_deleted(self, instance: DataEntry) -> None:
+        """Remove a deleted entry from the aggregate summaries, leave a tombstone and record the change"""
+        self.summaries.apply(removed=[(instance.numeric_fields, instance.string_fields)])
+        generation = self.generations.bump()
+        self.session.add(DataEntryTombstone(entry_id=instance.id, generation=generation))
+        self.prune_tombstones(generation)
+        self.changes.record("deleted", generation, [instance.id])
+    
+    def prune_tombstones(self, generation: int) -> None:
+        """Drop the tombstones no delta sync from within the retention of `generation` can need"""
+        self.session.execute(
+            delete(DataEntryTombstone).where(DataEntryTombstone.generation <= generation - get_tombstone_retention())
+        )
+    
+    def tombstone_horizon(self) -> int:
+        """
+        Oldest watermark a delta sync can start from: tombstones at or below
+        it may already be pruned. Read it after the tombstones, since a delete
+        committed in between may have pruned some of them.
+        """
+        return self.generations.current() - get_tombstone_retention()
+    
+    def stamp(self, entries: List[DataEntry]) -> int:
+        """Bump the dataset generation and record it on the written entries"""
+        generation = self.generations.bump()
+        for entry in entries:
+            entry.generation = generation
+        return generation
     
     def create_many(self, data_items: List[DataItem]) -> List[DataEntry]:
-        """Create multiple data entries"""
-        entries = [DataEntry.from_domain(item) for item in data_items]
-        self.session.add_all(entries)
-        self.session.commit()
+        """Create multiple data entries in bulk"""
+        return self.insert_entries([DataEntry.from_domain(item) for item in data_items])
+    
+    def insert_entries(self, entries: List[DataEntry]) -> List[DataEntry]:
+        """
+        Store new, unsaved entries in bulk.
+
+        Rows are written with a multi-row INSERT ... RETURNING id, or with COPY
+        into a staging table for large PostgreSQL batches, and the returned ids
+        are set on the entries instead of refreshing each one. Entries are
+        returned in input order and are not attached to the session.
+        """
+        if not entries:
+            return []
+        
+        # One timestamp for the whole batch, so it is known without a round-trip
+        now = datetime.utcnow()
         for entry in entries:
-            self.session.refresh(entry)
+            entry.created_at = entry.updated_at = now
+        
+        # The generation is taken before inserting so it is written with the
+        # rows; on_created would stamp them again, so the summaries and the
+        # change are recorded directly
+        generation = self.stamp(entries)
+        
+        bind = self.session.get_bind()
+        if (len(entries) >= self.copy_threshold and bind.dialect.name == "postgresql"
+                and bind.dialect.driver == "psycopg2"):
+            self._copy_entries(entries, now, generation)
+        else:
+            self._insert_entries(entries)
+        self.summaries.apply(added=[(entry.numeric_fields, entry.string_fields) for entry in entries])
+        self.changes.record("created", generation, [entry.id for entry in entries])
+        self.session.commit()
         return entries
     
+    def _insert_entries(self, entries: List[DataEntry]) -> None:
+        """
+        Insert entries with multi-row INSERT ... RETURNING id.
+        Returned ids are matched to rows by parameter order; dialects that
+        cannot guarantee that order for batched rows (SQLite) insert one row
+        per statement instead.
+        """
+        rows = []
+        for entry in entries:
+            row = {
+                "numeric_fields": entry.numeric_fields,
+                "string_fields": entry.string_fields,
+                "created_at": entry.created_at,
+                "updated_at": entry.updated_at,
+                "generation": entry.generation,
+            }
+            # Client-supplied ids are kept, the others come from the sequence
+            if entry.id is not None:
+                row["id"] = entry.id
+            rows.append(row)
+        
+        statement = insert(DataEntry).returning(DataEntry.id, sort_by_parameter_order=True)
+        ids = self.session.execute(statement, rows).scalars().all()
+        for entry, entry_id in zip(entries, ids):
+            entry.id = entry_id
+    
+    def _copy_entries(self, entries: List[DataEntry], now: datetime, generation: int) -> None:
+        """
+        Load entries with COPY into a temporary staging table, then move them
+        into data_entries with one INSERT ... SELECT. Ids are drawn from the
+        table's sequence inside the staging table so they can be read back in
+        input order.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for position, entry in enumerate(entries):
+            writer.writerow([
+                position,
+                "" if entry.id is None else entry.id,
+                json.dumps(entry.numeric_fields),
+                json.dumps(entry.string_fields),
+            ])
+        buffer.seek(0)
+        
+        table = DataEntry.__tablename__
+        self.session.execute(text(
+            "CREATE TEMPORARY TABLE data_entries_staging "
+            "(position integer, id integer, numeric_fields jsonb, string_fields jsonb) ON COMMIT DROP"
+        ))
+        # COPY goes through the DBAPI cursor of the session's own transaction
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                "COPY data_entries_staging (position, id, numeric_fields, string_fields) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+        
+        self.session.execute(text(
+            f"UPDATE data_entries_staging SET id = nextval(pg_get_serial_sequence('{table}', 'id')) "
+            "WHERE id IS NULL"
+        ))
+        self.session.execute(text(
+            f"INSERT INTO {table} (id, numeric_fields, string_fields, created_at, updated_at, generation) "
+            "SELECT id, numeric_fields, string_fields, :now, :now, :generation FROM data_entries_staging"
+        ), {"now": now, "generation": generation})
+        ids = self.session.execute(text(
+            "SELECT id FROM data_entries_staging ORDER BY position"
+        )).scalars().all()
+        for entry, entry_id in zip(entries, ids):
+            entry.id = entry_id
+    
+    def changes_since(self, since: int) -> Tuple[int, Optional[List[DataItem]], List[int]]:
+        """
+        Entries written and ids deleted after generation `since`.
+
+        Returns (watermark, changed, deleted), where watermark is the current
+        generation to pass as `since` next time. Writers commit in generation
+        order, so everything up to the watermark is visible and later writes
+        are excluded until the next call. changed is None when `since` is
+        ahead of the dataset (it was reset) or older than the tombstone
+        retention, and the client must resync fully.
+        """
+        watermark = self.generations.current()
+        if since > watermark or since < watermark - get_tombstone_retention():
+            return watermark, None, []
+        
+        changed = self.session.execute(
+            select(DataEntry).where(changed_between(since, watermark)).order_by(DataEntry.id)
+        ).scalars().all()
+        deleted = self.deleted_between(since, watermark)
+        if since < self.tombstone_horizon():
+            return watermark, None, []
+        return watermark, [entry.to_domain() for entry in changed], deleted
+    
+    def deleted_between(self, since: int, watermark: int) -> List[int]:
+        """Ids deleted after generation `since`, up to `watermark`, in id order"""
+        return self.session.execute(
+            select(DataEntryTombstone.entry_id)
+            .where(DataEntryTombstone.generation > since, DataEntryTombstone.generation <= watermark)
+            # An id deleted and then created again (client-supplied ids) is a change
+            .where(DataEntryTombstone.entry_id.not_in(select(DataEntry.id).where(changed_between(since, watermark))))
+            .order_by(DataEntryTombstone.entry_id)
+        ).scalars().all()
+    
     def get_all_as_domain(self) -> DataSet:
         """Get all entries as domain objects"""
         entries = self.get_all()
         return DataSet(items=[entry.to_domain() for entry in entries])
     
-    def filter_by_field(self, field: str, value: Any) -> DataSet:
+    def iter_domain(self, batch_size: int = 1000, where: Optional[ColumnElement] = None) -> Iterator[DataItem]:
         """
-        Filter entries by field value
-        Note: This is a simplified implementation as filtering JSON fields
-        would be more complex in real SQL queries
+        Iterate over all entries (matching `where`) as domain objects in id order.
+        Rows are fetched through a server-side cursor `batch_size` at a time
+        without building ORM instances, so memory stays flat for any table size.
         """
-        entries = self.get_all()
-        domain_items = [entry.to_domain() for entry in entries]
-        dataset = DataSet(items=domain_items)
-        return dataset.filter(field, value) 
\ No newline at end of file
+        for row in self.session.execute(domain_rows(batch_size, where)):
+            yield DataItem(id=row.id, numeric_fields=row.numeric_fields, string_fields=row.string_fields)
+    
+    def filter_as_domain(self, field: str, value: Any, operator: str = "eq") -> DataSet:
+        """
+        Filter entries in the database and return them as domain objects.
+        Falls back to filtering in memory when the predicate cannot be
+        compiled to SQL for this database.
+        """
+        condition = compile_filter(field, value, operator)
+        if condition is None or not supports_json_queries(self.session):
+            return self.get_all_as_domain().filter(field, value, operator)
+        
+        entries = (
+            self.session.query(DataEntry)
+            .filter(condition)
+            .order_by(DataEntry.id)
+            .all()
+        )
+        return DataSet(items=[entry.to_domain() for entry in entries])
+    
+    def compile_filter_expression(self, expression: Expression) -> Optional[ColumnElement]:
+        """
+        The SQL condition of a filter expression, or None when this database
+        cannot evaluate it and the rows have to be filtered in memory.
+        """
+        if not supports_json_queries(self.session):
+            return None
+        return compile_expression(expression)
+    
+    def filter_expression(self, expression: Expression) -> DataSet:
+        """
+        Filter entries by a boolean expression. The expression is compiled
+        once: into a WHERE clause, which the database answers from the
+        expression indexes where they narrow the rows, or, when the database
+        cannot evaluate it, into a predicate applied in one streamed pass.
+        """
+        condition = self.compile_filter_expression(expression)
+        if condition is None:
+            predicate = compile_predicate(expression)
+            return DataSet(items=[item for item in self.iter_domain() if predicate(item)])
+        return DataSet(items=list(self.iter_domain(where=condition)))
+    
+    def aggregate(
+        self,
+        field: str,
+        operation: str = "sum",
+        percentile: float = DEFAULT_PERCENTILE,
+        bins: int = DEFAULT_HISTOGRAM_BINS,
+        lower: Optional[float] = None,
+        upper: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Aggregate a numeric field, returning {"result": value}.
+        Summarized fields are answered from the maintained summary row;
+        otherwise only the single aggregated value leaves the database.
+        stats and histogram are computed by one query each; approximate
+        operations stream the field's values into a sketch.
+        Falls back to aggregating in memory when the query cannot be compiled.
+        """
+        if operation in APPROXIMATE_OPERATIONS and supports_json_queries(self.session):
+            values = self.iter_field_values(field, numeric_only=operation == "approx_percentile")
+            return {"result": approximate_aggregate(values, operation, percentile)}
+        
+        result = self.database_aggregate(field, operation, bins, lower, upper)
+        if result is None:
+            return self.get_all_as_domain().aggregate(field, operation, percentile, bins, lower, upper)
+        return result
+    
+    def database_aggregate(
+        self,
+        field: str,
+        operation: str,
+        bins: int = DEFAULT_HISTOGRAM_BINS,
+        lower: Optional[float] = None,
+        upper: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        The part of aggregate answered by a query or a summary row, or None
+        when the operation needs the rows in memory (approximate operations
+        included, which stream values instead).
+        """
+        if operation in APPROXIMATE_OPERATIONS:
+            return None
+        if not supports_json_queries(self.session) and operation in STATISTICS_OPERATIONS:
+            return None
+        
+        dialect = self.session.get_bind().dialect.name
+        if operation == "stats":
+            return {"result": stats_row_result(self.session.execute(compile_stats(field, dialect)).one())}
+        elif operation == "histogram":
+            return {"result": self.histogram(field, bins, lower, upper)}
+        
+        summary = self.summaries.aggregate(field, operation)
+        if summary is not None:
+            return summary
+        
+        statement = compile_aggregate(field, operation)
+        if statement is None or not supports_json_queries(self.session):
+            return None
+        
+        value = self.session.execute(statement).scalar()
+        return {"result": aggregate_result(operation, value)}
+    
+    def histogram(self, field: str, bins: int, lower: Optional[float], upper: Optional[float]) -> Optional[Dict[str, Any]]:
+        """
+        Equal-width histogram of a numeric field, as DataSet.aggregate returns it.
+        One GROUP BY counts the bins. Without an explicit range, it comes
+        from MIN/MAX, which the summaries or the expression index answer
+        without a scan; with one, the GROUP BY also tells whether there are
+        any values at all.
+        """
+        if lower is None or upper is None:
+            minimum = self.aggregate(field, "min")["result"]
+            if minimum is None:
+                return None
+            lower, upper = histogram_bounds(float(minimum), float(self.aggregate(field, "max")["result"]))
+        
+        counts = [0] * bins
+        empty = True
+        dialect = self.session.get_bind().dialect.name
+        for index, count in self.session.execute(compile_histogram(field, lower, upper, bins, dialect)):
+            empty = False
+            if index is not None:
+                counts[int(index)] = count
+        return None if empty else histogram_result(lower, upper, counts)
+    
+    def iter_field_values(self, field: str, numeric_only: bool = False, batch_size: int = 10000) -> Iterator[Any]:
+        """
+        Iterate over the values of one field (numeric first, else string)
+        through a server-side cursor, so memory stays flat for any table size.
+        """
+        statement = compile_field_values(field, numeric_only).execution_options(yield_per=batch_size)
+        for row in self.session.execute(statement):
+            yield field_value(row)
+    
+    def group_aggregate(self, group_by: str, fields: List[str], operations: List[str]) -> List[Dict[str, Any]]:
+        """
+        Aggregate several fields per group with a single GROUP BY query.
+        Returns the same structure as DataSet.group_aggregate, answered from
+        the summary rows when the group key and fields are summarized.
+        """
+        groups = self.database_group_aggregate(group_by, fields, operations)
+        if groups is None:
+            return self.get_all_as_domain().group_aggregate(group_by, fields, operations)
+        return groups
+    
+    def database_group_aggregate(self, group_by: str, fields: List[str], operations: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """The part of group_aggregate answered by a query or the summary rows, or None"""
+        summary = self.summaries.group_aggregate(group_by, fields, operations)
+        if summary is not None:
+            return summary
+        
+        statement = compile_group_aggregate(group_by, fields, operations)
+        if statement is None or not supports_json_queries(self.session):
+            return None
+        
+        groups = []
+        for row in self.session.execute(statement):
+            values = iter(row[1:])
+            groups.append({
+                "group": row[0],
+                "results": {
+                    field: {operation: aggregate_result(operation, next(values)) for operation in operations}
+                    for field in fields
+                }
+            })
+        return groups
+    
+    def filter_by_field(self, field: str, value: Any, operator: str = "eq") -> DataSet:
+        """Filter entries by field value"""
+        return self.filter_as_domain(field, value, operator)
+    
+    def field_kind(self, field: str) -> str:
+        """Determine whether a field is stored as the id, a numeric key or a string key"""
+        if field == "id":
+            return "id"
+        has_numeric = (
+            self.session.query(DataEntry.id)
+            .filter(numeric_value(field).isnot(None))
+            .limit(1)
+            .first()
+        )
+        return "numeric" if has_numeric is not None else "string"
+    
+    def get_page(
+        self,
+        limit: int,
+        filter_params: Optional[Tuple[str, Any, str]] = None,
+        sort_field: Optional[str] = None,
+        ascending: bool = True,
+        after: Optional[Dict[str, Any]] = None,
+        where: Optional[Expression] = None
+    ) -> Tuple[DataSet, Optional[Dict[str, Any]]]:
+        """
+        Get one page of entries using keyset pagination.
+        
+        Rows are ordered by sort_field (or id) with id as the tie-breaker, and
+        `after` is the {"key", "id"} position of the last row of the previous
+        page, so every page is a bounded index range scan no matter how deep
+        it is. Rows are filtered by a field/value/operator triple or by a
+        boolean expression (`where`); pages always run in SQL when possible,
+        since LIMIT bounds the scan either way. Returns the page and the
+        position to continue from, or None when there are no more rows.
+        """
+        if filter_params:
+            condition = compile_filter(*filter_params)
+        elif where is not None:
+            condition = compile_expression(where)
+        else:
+            condition = None
+        if ((filter_params or where is not None) and condition is None) or not supports_json_queries(self.session):
+            return self._get_page_in_memory(limit, filter_params, sort_field, ascending, after, where)
+        
+        kind = self.field_kind(sort_field) if sort_field else "id"
+        key = sort_expression(sort_field, kind)
+        
+        query = self.session.query(DataEntry, key)
+        if condition is not None:
+            query = query.filter(condition)
+        if kind != "id":
+            query = query.filter(key.isnot(None))
+        if after is not None:
+            query = query.filter(keyset_condition(key, ascending, after["key"], after["id"]))
+        rows = query.order_by(*sort_order(key, ascending)).limit(limit + 1).all()
+        
+        next_position = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_entry, last_key = rows[-1]
+            next_position = {"key": last_key, "id": last_entry.id}
+        return DataSet(items=[entry.to_domain() for entry, _ in rows]), next_position
+    
+    def _get_page_in_memory(
+        self,
+        limit: int,
+        filter_params: Optional[Tuple[str, Any, str]],
+        sort_field: Optional[str],
+        ascending: bool,
+        after: Optional[Dict[str, Any]],
+        where: Optional[Expression] = None
+    ) -> Tuple[DataSet, Optional[Dict[str, Any]]]:
+        """
+        Keyset pagination in memory, used when SQL is not available.
+        Rows are streamed and the page is selected with a bounded heap
+        (top_k) instead of sorting every row, so memory stays proportional
+        to the page size.
+        """
+        if filter_params:
+            field, value, operator = filter_params
+            comparison = Comparison(field, operator, value)
+            where = comparison if where is None else And((comparison, where))
+        predicate = compile_predicate(where) if where is not None else None
+        field = sort_field or "id"
+        
+        def position(item: DataItem) -> Dict[str, Any]:
+            key = item.id if field == "id" else item.numeric_fields.get(field, item.string_fields.get(field))
+            return {"key": key, "id": item.id}
+        
+        def is_after(item: DataItem) -> bool:
+            current = position(item)
+            if field != "id" and current["key"] == after["key"]:
+                return current["id"] > after["id"]
+            key, last_key = (current["id"], after["id"]) if field == "id" else (current["key"], after["key"])
+            return key > last_key if ascending else key < last_key
+        
+        # iter_domain yields rows in id order, which top_k keeps for ties
+        items = (
+            item for item in self.iter_domain()
+            if (predicate is None or predicate(item)) and sort_value(item, field) is not None
+        )
+        if after is not None:
+            items = (item for item in items if is_after(item))
+        if field == "id" and ascending:
+            items = list(islice(items, limit + 1))
+        else:
+            items = top_k(items, field, limit + 1, ascending)
+        
+        next_position = position(items[limit - 1]) if len(items) > limit else None
+        return DataSet(items=items[:limit]), next_position
\ No newline at end of file
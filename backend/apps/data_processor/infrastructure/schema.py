@@ -0,0 +1,155 @@
+from typing import Dict, List, Tuple
+from sqlalchemy import Index, func, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from django.conf import settings
+from shared.db.base_model import Base
+import logging
+from .models import DataEntry, AggregateSummary, DatasetGeneration
+from .queries import numeric_value, string_value
+from .summaries import AggregateSummaryStore
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# JSON columns of data_entries that are stored as JSONB on PostgreSQL
+JSON_COLUMNS = ("numeric_fields", "string_fields")
+
+# Keys that get an expression index when SQLALCHEMY_INDEXED_KEYS is not set
+DEFAULT_INDEXED_KEYS = {
+    "numeric_fields": ("price", "quantity"),
+    "string_fields": ("name", "category"),
+}
+
+_indexes: List[Index] = []
+
+
+def get_indexed_keys() -> Dict[str, Tuple[str, ...]]:
+    """Get the declared indexed keys per JSON column"""
+    return getattr(settings, "SQLALCHEMY_INDEXED_KEYS", DEFAULT_INDEXED_KEYS)
+
+
+def is_indexed(field: str) -> bool:
+    """Check whether predicates on a field can be answered from an index"""
+    if field == "id":
+        return True
+    return any(field in keys for keys in get_indexed_keys().values())
+
+
+def has_trigram_extension(ddl, target, bind: Connection, **kw) -> bool:
+    """Check whether pg_trgm is installed, so trigram indexes can be created"""
+    return bind.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+
+def enable_trigram_extension(engine: Engine) -> bool:
+    """Install pg_trgm when the database allows it; trigram indexes are skipped otherwise"""
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        return True
+    except DBAPIError as e:
+        logger.warning(f"pg_trgm is not available, contains filters will scan: {e}")
+        return False
+
+
+def build_indexes() -> List[Index]:
+    """
+    Declare the PostgreSQL indexes for data_entries.
+
+    Each JSON column gets a GIN index for containment/key-existence queries,
+    and each declared key gets an expression index built from the same
+    expression the query compiler emits, e.g. ((numeric_fields->>'price')::float),
+    so the planner can match filters, sorts and aggregates against it.
+    Declared string keys also get a pg_trgm GIN index on
+    upper(string_fields->>'name'), the expression contains filters compile
+    to, so substring searches are answered from the index. The indexes are
+    attached to the table metadata only once.
+    """
+    if _indexes:
+        return _indexes
+
+    table = DataEntry.__tablename__
+    for column in JSON_COLUMNS:
+        _indexes.append(
+            Index(f"ix_{table}_{column}_gin", getattr(DataEntry, column), postgresql_using="gin")
+        )
+
+    indexed_keys = get_indexed_keys()
+    for key in indexed_keys.get("numeric_fields", ()):
+        _indexes.append(Index(f"ix_{table}_numeric_{key}", numeric_value(key)))
+    for key in indexed_keys.get("string_fields", ()):
+        _indexes.append(Index(f"ix_{table}_string_{key}", string_value(key)))
+
+    # Expression and GIN indexes only make sense on PostgreSQL
+    for index in _indexes:
+        index.ddl_if(dialect="postgresql")
+
+    for key in indexed_keys.get("string_fields", ()):
+        label = f"{key}_upper"
+        index = Index(
+            f"ix_{table}_string_{key}_trgm", func.upper(string_value(key)).label(label),
+            postgresql_using="gin", postgresql_ops={label: "gin_trgm_ops"}
+        )
+        index.ddl_if(dialect="postgresql", callable_=has_trigram_extension)
+        _indexes.append(index)
+    return _indexes
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """
+    Bring an existing database up to the current schema.
+
+    Creates missing tables, adds the delta sync generation column, converts
+    JSON columns to JSONB, installs pg_trgm, creates any declared index that
+    does not exist yet, builds the aggregate summaries when their table (or
+    its exact totals) is new and seeds the dataset generation. Safe to run
+    repeatedly.
+    """
+    indexes = build_indexes()
+    if engine.dialect.name == "postgresql":
+        enable_trigram_extension(engine)
+    new_summaries = not inspect(engine).has_table(AggregateSummary.__tablename__)
+    Base.metadata.create_all(bind=engine)
+
+    table = DataEntry.__tablename__
+    if "generation" not in {column["name"] for column in inspect(engine).get_columns(table)}:
+        logger.info(f"Adding {table}.generation")
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN generation INTEGER"))
+            for index in DataEntry.__table__.indexes:
+                if "generation" in index.columns:
+                    index.create(connection, checkfirst=True)
+
+    summaries = AggregateSummary.__tablename__
+    if "exact_total" not in {column["name"] for column in inspect(engine).get_columns(summaries)}:
+        logger.info(f"Adding {summaries}.exact_total")
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {summaries} ADD COLUMN exact_total TEXT"))
+        # Totals maintained in floating point until now may have drifted
+        new_summaries = True
+
+    if new_summaries:
+        with Session(bind=engine) as session:
+            AggregateSummaryStore(session).rebuild()
+            session.commit()
+
+    with Session(bind=engine) as session:
+        if not session.query(DatasetGeneration).filter_by(name=DataEntry.__tablename__).count():
+            session.add(DatasetGeneration(name=DataEntry.__tablename__, generation=0))
+            session.commit()
+
+    if engine.dialect.name != "postgresql":
+        return
+
+    columns = {column["name"]: column for column in inspect(engine).get_columns(table)}
+    with engine.begin() as connection:
+        for name in JSON_COLUMNS:
+            if columns[name]["type"].__class__.__name__ == "JSON":
+                logger.info(f"Converting {table}.{name} to JSONB")
+                connection.execute(text(
+                    f"ALTER TABLE {table} ALTER COLUMN {name} TYPE JSONB USING {name}::jsonb"
+                ))
+
+        for index in indexes:
+            index.create(connection, checkfirst=True)
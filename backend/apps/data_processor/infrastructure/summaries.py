@@ -0,0 +1,383 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from fractions import Fraction
+import json
+import logging
+import math
+from django.conf import settings
+from sqlalchemy import func, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from .models import AggregateSummary, DataEntry
+from .queries import (
+    numeric_value, string_value, compile_aggregate, compile_group_aggregate, aggregate_result
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Numeric fields and group-by keys summarized when the settings do not say otherwise
+DEFAULT_SUMMARY_FIELDS = ("price", "quantity")
+DEFAULT_SUMMARY_GROUP_BY = ("category",)
+
+# group_by value of the table-wide summary rows
+GLOBAL_SCOPE = ""
+
+# Pseudo-field whose count is the number of entries in a scope
+ROWS_FIELD = "*"
+
+# Scope key: (group_by, group_key, field)
+ScopeKey = Tuple[str, str, str]
+
+# Every finite float is a multiple of 2**-1074, so totals held as integers
+# scaled by 2**1074 add and subtract exactly
+TOTAL_SCALE_BITS = 1074
+
+# Rows read at a time when rebuild() sums the entries
+REBUILD_BATCH_SIZE = 10000
+
+
+def get_summary_fields() -> Tuple[str, ...]:
+    """Numeric fields with a maintained summary"""
+    return tuple(getattr(settings, "AGGREGATE_SUMMARY_FIELDS", DEFAULT_SUMMARY_FIELDS))
+
+
+def get_summary_group_by() -> Tuple[str, ...]:
+    """String fields the summaries are additionally grouped by"""
+    return tuple(getattr(settings, "AGGREGATE_SUMMARY_GROUP_BY", DEFAULT_SUMMARY_GROUP_BY))
+
+
+def encode_group_key(value: Any) -> str:
+    """Encode a group value as a unique, non-null string"""
+    return json.dumps(value)
+
+
+def scaled_value(value: float) -> int:
+    """A finite float as an exact integer multiple of 2**-TOTAL_SCALE_BITS"""
+    numerator, denominator = value.as_integer_ratio()
+    return numerator << (TOTAL_SCALE_BITS + 1 - denominator.bit_length())
+
+
+def total_value(scaled: int) -> float:
+    """The float nearest to a scaled total"""
+    try:
+        return scaled / (1 << TOTAL_SCALE_BITS)
+    except OverflowError:
+        return math.copysign(math.inf, scaled)
+
+
+def encode_total(scaled: int) -> str:
+    """A scaled total as the reduced fraction stored in exact_total"""
+    return str(Fraction(scaled, 1 << TOTAL_SCALE_BITS))
+
+
+def decode_total(text: str) -> int:
+    """The scaled total stored in exact_total"""
+    fraction = Fraction(text)
+    return fraction.numerator * ((1 << TOTAL_SCALE_BITS) // fraction.denominator)
+
+
+class _Delta:
+    """Net change to one summary row from a batch of added and removed entries"""
+
+    def __init__(self):
+        self.count = 0
+        # Scaled sum of the finite values; non-finite ones are summed as floats
+        self.total = 0
+        self.nonfinite = 0.0
+        self.added_min: Optional[float] = None
+        self.added_max: Optional[float] = None
+        self.removed_min: Optional[float] = None
+        self.removed_max: Optional[float] = None
+
+    @property
+    def exact(self) -> bool:
+        return self.nonfinite == 0
+
+    def add(self, value: float, sign: int) -> None:
+        self.count += sign
+        if math.isfinite(value):
+            self.total += sign * scaled_value(value)
+        else:
+            self.nonfinite += sign * value
+        if sign > 0:
+            self.added_min = value if self.added_min is None else min(self.added_min, value)
+            self.added_max = value if self.added_max is None else max(self.added_max, value)
+        else:
+            self.removed_min = value if self.removed_min is None else min(self.removed_min, value)
+            self.removed_max = value if self.removed_max is None else max(self.removed_max, value)
+
+
+class AggregateSummaryStore:
+    """
+    Running count/sum/min/max of the summary fields, globally and per group.
+
+    apply() is called by DataEntryRepository inside the writing transaction, so
+    the summaries always commit (or roll back) together with data_entries.
+    Counts and sums are adjusted incrementally, sums exactly (as scaled
+    integers), so they equal a scan however many writes came before; min/max are widened on insert
+    and recomputed with an indexed MIN/MAX query only when a removed value
+    was the current extreme. A field is maintained once its global row
+    exists, which rebuild() guarantees; until then reads fall back to
+    scanning data_entries.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def _scopes(self, numeric_fields: Dict[str, Any], string_fields: Dict[str, Any]) -> Iterable[Tuple[ScopeKey, Optional[float]]]:
+        """Summary rows touched by one entry, with the value each one accumulates"""
+        scopes = [(GLOBAL_SCOPE, encode_group_key(None))]
+        scopes += [
+            (group_by, encode_group_key((string_fields or {}).get(group_by)))
+            for group_by in get_summary_group_by()
+        ]
+        for group_by, group_key in scopes:
+            yield (group_by, group_key, ROWS_FIELD), None
+            for field in get_summary_fields():
+                if field not in (numeric_fields or {}):
+                    continue
+                try:
+                    value = float(numeric_fields[field])
+                except (ValueError, TypeError):
+                    continue
+                yield (group_by, group_key, field), value
+
+    def apply(
+        self,
+        added: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]] = (),
+        removed: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]] = ()
+    ) -> None:
+        """
+        Fold added and removed entries, given as (numeric_fields, string_fields)
+        pairs, into the summary rows. Must run after the entry changes are
+        flushed so min/max recomputation sees the new state.
+        """
+        deltas: Dict[ScopeKey, _Delta] = {}
+        for sign, entries in ((1, added), (-1, removed)):
+            for numeric_fields, string_fields in entries:
+                for key, value in self._scopes(numeric_fields, string_fields):
+                    delta = deltas.setdefault(key, _Delta())
+                    if value is None:
+                        delta.count += sign
+                    else:
+                        delta.add(value, sign)
+        if not deltas:
+            return
+
+        # Lock the global rows first: they mark which fields are maintained
+        # and serialize concurrent writers on the same summaries
+        fields = {field for _, _, field in deltas}
+        initialized = {
+            row.field for row in self.session.query(AggregateSummary)
+            .filter(AggregateSummary.group_by == GLOBAL_SCOPE, AggregateSummary.field.in_(fields))
+            .with_for_update()
+        }
+        deltas = {key: delta for key, delta in deltas.items() if key[2] in initialized}
+        if not deltas:
+            return
+
+        self._ensure_rows(deltas.keys())
+        rows = {
+            (row.group_by, row.group_key, row.field): row
+            for row in self.session.query(AggregateSummary)
+            .filter(AggregateSummary.field.in_({field for _, _, field in deltas}))
+            .with_for_update()
+        }
+        for key, delta in deltas.items():
+            self._apply_delta(rows[key], delta)
+        self.session.flush()
+
+    def _ensure_rows(self, keys: Iterable[ScopeKey]) -> None:
+        """Create missing summary rows, tolerating concurrent creators"""
+        values = [
+            {"group_by": group_by, "group_key": group_key, "field": field, "count": 0, "total": 0, "exact_total": "0"}
+            for group_by, group_key, field in keys
+        ]
+        dialect = self.session.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            statement = insert(AggregateSummary).values(values).on_conflict_do_nothing(
+                index_elements=["group_by", "group_key", "field"]
+            )
+            self.session.execute(statement)
+            return
+
+        existing = {
+            (row.group_by, row.group_key, row.field)
+            for row in self.session.query(AggregateSummary)
+        }
+        self.session.add_all([
+            AggregateSummary(**value) for value in values
+            if (value["group_by"], value["group_key"], value["field"]) not in existing
+        ])
+        self.session.flush()
+
+    def _apply_delta(self, row: AggregateSummary, delta: _Delta) -> None:
+        """Apply a net change to one summary row"""
+        row.count += delta.count
+        if row.count <= 0 or row.field == ROWS_FIELD:
+            row.count = max(row.count, 0)
+            row.total = 0
+            row.exact_total = "0"
+            row.minimum = row.maximum = None
+            return
+
+        if row.exact_total is not None and delta.exact:
+            scaled = decode_total(row.exact_total) + delta.total
+            row.exact_total = encode_total(scaled)
+            row.total = total_value(scaled)
+        else:
+            # NaN/infinity cannot be summed exactly; float arithmetic until rebuild()
+            row.exact_total = None
+            row.total += total_value(delta.total) + delta.nonfinite
+        lost_minimum = delta.removed_min is not None and row.minimum is not None and delta.removed_min <= row.minimum
+        lost_maximum = delta.removed_max is not None and row.maximum is not None and delta.removed_max >= row.maximum
+        if lost_minimum or lost_maximum:
+            row.minimum, row.maximum = self._recompute_extremes(row)
+            return
+        if delta.added_min is not None:
+            row.minimum = delta.added_min if row.minimum is None else min(row.minimum, delta.added_min)
+            row.maximum = delta.added_max if row.maximum is None else max(row.maximum, delta.added_max)
+
+    def _recompute_extremes(self, row: AggregateSummary) -> Tuple[Optional[float], Optional[float]]:
+        """Recompute min/max of one scope from data_entries"""
+        value = numeric_value(row.field)
+        condition = true()
+        if row.group_by != GLOBAL_SCOPE:
+            group_value = json.loads(row.group_key)
+            key = string_value(row.group_by)
+            condition = key.is_(None) if group_value is None else key == group_value
+        minimum, maximum = self.session.execute(
+            select(func.min(value), func.max(value)).where(condition)
+        ).one()
+        return minimum, maximum
+
+    def rebuild(self) -> None:
+        """Recompute every summary row from data_entries (bootstrap and repair)"""
+        fields = list(get_summary_fields())
+        operations = ["count", "sum", "min", "max"]
+        self.session.query(AggregateSummary).delete()
+
+        rows = [{
+            "group_by": GLOBAL_SCOPE, "group_key": encode_group_key(None), "field": ROWS_FIELD,
+            "count": self.session.execute(select(func.count(DataEntry.id))).scalar() or 0,
+        }]
+        for field in fields:
+            count, total, minimum, maximum = (
+                aggregate_result(operation, self.session.execute(compile_aggregate(field, operation)).scalar())
+                for operation in operations
+            )
+            rows.append({
+                "group_by": GLOBAL_SCOPE, "group_key": encode_group_key(None), "field": field,
+                "count": count or 0, "total": total or 0, "minimum": minimum, "maximum": maximum,
+            })
+
+        for group_by in get_summary_group_by():
+            statement = compile_group_aggregate(group_by, fields, operations)
+            statement = statement.add_columns(func.count())
+            for result in self.session.execute(statement):
+                group_key = encode_group_key(result[0])
+                rows.append({"group_by": group_by, "group_key": group_key, "field": ROWS_FIELD, "count": result[-1]})
+                values = iter(result[1:-1])
+                for field in fields:
+                    count, total, minimum, maximum = (
+                        aggregate_result(operation, next(values)) for operation in operations
+                    )
+                    rows.append({
+                        "group_by": group_by, "group_key": group_key, "field": field,
+                        "count": count or 0, "total": total or 0, "minimum": minimum, "maximum": maximum,
+                    })
+
+        # SQL sums round; sum the values exactly in one streamed pass instead
+        totals: Dict[ScopeKey, _Delta] = {}
+        statement = select(DataEntry.numeric_fields, DataEntry.string_fields).execution_options(
+            yield_per=REBUILD_BATCH_SIZE
+        )
+        for numeric_fields, string_fields in self.session.execute(statement):
+            for key, value in self._scopes(numeric_fields, string_fields):
+                if value is not None:
+                    totals.setdefault(key, _Delta()).add(value, 1)
+        for row in rows:
+            delta = totals.get((row["group_by"], row["group_key"], row["field"]), _Delta())
+            row["total"] = total_value(delta.total) + delta.nonfinite
+            row["exact_total"] = encode_total(delta.total) if delta.exact else None
+
+        self.session.add_all([AggregateSummary(**row) for row in rows])
+        self.session.flush()
+        logger.info(f"Rebuilt {len(rows)} aggregate summary rows")
+
+    @staticmethod
+    def _result(row: AggregateSummary, operation: str) -> Any:
+        """Answer an aggregation from a summary row like DataSet.aggregate would"""
+        if not row.count:
+            return None
+        if operation == "sum":
+            return row.total
+        elif operation == "avg":
+            return row.total / row.count
+        elif operation == "min":
+            return row.minimum
+        elif operation == "max":
+            return row.maximum
+        elif operation == "count":
+            return row.count
+        return None
+
+    def aggregate(self, field: str, operation: str) -> Optional[Dict[str, Any]]:
+        """
+        Answer a table-wide aggregation from the global summary row.
+        Returns None when the field is not summarized.
+        """
+        if field not in get_summary_fields():
+            return None
+        row = (
+            self.session.query(AggregateSummary)
+            .filter_by(group_by=GLOBAL_SCOPE, group_key=encode_group_key(None), field=field)
+            .first()
+        )
+        if row is None:
+            return None
+        return {"result": self._result(row, operation)}
+
+    def group_aggregate(self, group_by: str, fields: List[str], operations: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer a group-by aggregation from the per-group summary rows.
+        Returns None when the group key or any field is not summarized.
+        """
+        if group_by not in get_summary_group_by() or not set(fields) <= set(get_summary_fields()):
+            return None
+        initialized = (
+            self.session.query(func.count(AggregateSummary.id))
+            .filter(AggregateSummary.group_by == GLOBAL_SCOPE, AggregateSummary.field.in_(fields))
+            .scalar()
+        )
+        if initialized < len(set(fields)):
+            return None
+
+        rows = (
+            self.session.query(AggregateSummary)
+            .filter(AggregateSummary.group_by == group_by, AggregateSummary.field.in_(list(fields) + [ROWS_FIELD]))
+            .all()
+        )
+        groups: Dict[str, Dict[str, AggregateSummary]] = {}
+        for row in rows:
+            groups.setdefault(row.group_key, {})[row.field] = row
+
+        results = []
+        for group_key, group_rows in groups.items():
+            # Groups whose entries were all removed no longer exist
+            if ROWS_FIELD not in group_rows or not group_rows[ROWS_FIELD].count:
+                continue
+            results.append({
+                "group": json.loads(group_key),
+                "results": {
+                    field: {
+                        operation: self._result(group_rows[field], operation) if field in group_rows else None
+                        for operation in operations
+                    }
+                    for field in fields
+                }
+            })
+        results.sort(key=lambda group: (group["group"] is None, group["group"] or ""))
+        return results
+
@@ -0,0 +1,197 @@
+from typing import Any, AsyncIterator
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from pydantic import ValidationError
+from rest_framework import status
+from apps.data_processor.application.services import AsyncDataProcessingService
+from apps.data_processor.application.ingestion import ingestion_stats
+from apps.data_processor.domain.models import DataItem
+from apps.data_processor.interfaces.conditional import conditional_get
+from apps.data_processor.interfaces.ndjson import NDJSON_CONTENT_TYPE, wants_ndjson, astream_ndjson
+from apps.data_processor.interfaces.views import (
+    get_process_items, get_pagination_params, get_delta_params,
+    parse_transformation, parse_transform_params, validate_transform_params, transform_body
+)
+from shared.db.engine import create_async_session
+from shared.utils.pagination import InvalidCursorError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def json_response(data: Any, status_code: int = status.HTTP_200_OK) -> JsonResponse:
+    """JSON response with the same body the DRF views render"""
+    return JsonResponse(data, status=status_code, safe=False, encoder=DjangoJSONEncoder)
+
+
+async def ajson_response(data: Any, status_code: int = status.HTTP_200_OK) -> JsonResponse:
+    """json_response encoded in a worker thread, for bodies that grow with the data"""
+    return await sync_to_async(json_response, thread_sensitive=False)(data, status_code)
+
+
+def invalid_parameters(e: ValidationError, error: str = "Invalid parameters") -> JsonResponse:
+    logger.error(f"Validation error: {e.errors()}")
+    return json_response({"error": error, "details": e.errors()}, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncSessionView(View):
+    """
+    Base of the async-native views, the ASGI counterparts of the DRF views.
+
+    Each request borrows an AsyncSession from the async engine as
+    `request.async_db_session` for the duration of the handler, so a worker
+    holds a suspended coroutine rather than a thread per request waiting on
+    the database. Like DRF's APIView they are exempt from CSRF checks.
+    Under WSGI every request would run in a new event loop that the pooled
+    connections do not belong to, so they answer 501 there.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return json_response(
+                {"error": "Async endpoints are only served by the ASGI application (data_processing_api.asgi)"},
+                status.HTTP_501_NOT_IMPLEMENTED
+            )
+        async with create_async_session() as session:
+            request.async_db_session = session
+            return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncDataProcessorView(AsyncSessionView):
+    """Async view for processing data (JSON bodies only)"""
+
+    async def post(self, request, *args, **kwargs):
+        """Process data"""
+        if request.content_type != "application/json":
+            return json_response(
+                {"error": f"Unsupported media type \"{request.content_type}\" in request."},
+                status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        try:
+            with ingestion_stats.stage("parse") as timing:
+                payload = await sync_to_async(json.loads, thread_sensitive=False)(request.body or b"null")
+                timing["items"] = len(payload) if isinstance(payload, list) else 1
+        except ValueError as e:
+            return json_response({"error": f"JSON parse error - {str(e)}"}, status.HTTP_400_BAD_REQUEST)
+
+        # Log the size of the payload rather than the payload itself
+        logger.info(f"Received {timing['items']} item(s) for processing")
+
+        try:
+            data_items = get_process_items(payload)
+        except ValueError as e:
+            return json_response({"error": str(e)}, status.HTTP_400_BAD_REQUEST)
+
+        session = request.async_db_session
+        try:
+            result = await AsyncDataProcessingService(session).ingest(data_items)
+        except ValidationError as e:
+            return invalid_parameters(e, "Invalid data format")
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Error processing data: {str(e)}")
+            return json_response({"error": str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        logger.info(f"Successfully processed {len(result)} products")
+        return await ajson_response(result, status.HTTP_201_CREATED)
+
+
+class AsyncProductsView(AsyncSessionView):
+    """Async view for retrieving all products"""
+
+    @conditional_get
+    async def get(self, request, *args, **kwargs):
+        """
+        Get all products, one keyset page of them, the changes since a delta
+        sync watermark (`since`), or all of them streamed as NDJSON
+        """
+        if 'since' in request.GET:
+            return await self.changes(request)
+
+        if wants_ndjson(request):
+            return self.stream()
+
+        try:
+            pagination = get_pagination_params(request.GET)
+        except ValidationError as e:
+            return invalid_parameters(e)
+
+        try:
+            result = await AsyncDataProcessingService(request.async_db_session).get_products(**pagination)
+            return await ajson_response(result)
+        except InvalidCursorError as e:
+            return json_response({"error": str(e)}, status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error getting all products: {str(e)}")
+            return json_response({"error": str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    async def changes(self, request):
+        """Get products written and ids deleted since the `since` watermark, and the next watermark"""
+        try:
+            delta = get_delta_params(request.GET)
+        except ValidationError as e:
+            return invalid_parameters(e)
+        except ValueError as e:
+            return json_response({"error": str(e)}, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = await AsyncDataProcessingService(request.async_db_session).get_changes(delta.since)
+            return await ajson_response(result)
+        except Exception as e:
+            logger.error(f"Error getting product changes: {str(e)}")
+            return json_response({"error": str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def stream(self):
+        """
+        Stream all products as NDJSON, one product per line. The rows come
+        from a session of their own, which lives as long as the response.
+        """
+        async def rows() -> AsyncIterator[DataItem]:
+            async with create_async_session() as session:
+                async for item in AsyncDataProcessingService(session).iter_products():
+                    yield item
+
+        return StreamingHttpResponse(
+            astream_ndjson(rows()),
+            content_type=NDJSON_CONTENT_TYPE,
+            status=status.HTTP_200_OK
+        )
+
+
+class AsyncTransformDataView(AsyncSessionView):
+    """Async view for transforming data"""
+
+    @conditional_get
+    async def get(self, request, transformation_type, *args, **kwargs):
+        """Transform data based on transformation type and parameters"""
+        try:
+            transformation = parse_transformation(transformation_type)
+            params = parse_transform_params(request.GET)
+        except ValueError as e:
+            return json_response({"error": str(e)}, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            pagination, validated_params = validate_transform_params(transformation, params, request.GET)
+        except ValidationError as e:
+            return invalid_parameters(e)
+
+        try:
+            service = AsyncDataProcessingService(request.async_db_session)
+            result = await service.transform_data(transformation.value, **pagination, **validated_params)
+            return await ajson_response(transform_body(result))
+        except InvalidCursorError as e:
+            return json_response({"error": str(e)}, status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error transforming data: {str(e)}")
+            return json_response({"error": str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,107 @@
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, List, Optional
+import json
+from rest_framework.renderers import BaseRenderer
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+# Lines are buffered into chunks of roughly this many bytes before being
+# handed to the server, so a large export is not written one row at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renderer for newline-delimited JSON.
+    Lets DRF content negotiation accept `Accept: application/x-ndjson` and
+    `?format=ndjson`; streaming views bypass it and return a
+    StreamingHttpResponse, but error responses are still rendered through it.
+    """
+    media_type = NDJSON_CONTENT_TYPE
+    format = "ndjson"
+    charset = "utf-8"
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        return "".join(json.dumps(row) + "\n" for row in rows).encode(self.charset)
+
+
+def wants_ndjson(request) -> bool:
+    """Check whether the client asked for a streamed NDJSON response"""
+    accepted = getattr(request, "accepted_renderer", None)
+    if accepted is not None:
+        if accepted.format == NDJSONRenderer.format:
+            return True
+    # Plain Django requests (async views) are not content-negotiated by DRF
+    elif (request.GET.get("format") == NDJSONRenderer.format
+            or NDJSON_CONTENT_TYPE in request.headers.get("Accept", "")):
+        return True
+    return request.GET.get("stream", "").lower() in ("1", "true")
+
+
+class _ChunkBuffer:
+    """Collects NDJSON lines into chunks of about `chunk_size` bytes"""
+    
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.lines: List[str] = []
+        self.size = 0
+        self.first = True
+    
+    def add(self, row: Any) -> Optional[bytes]:
+        """Buffer one row; returns a chunk when one is ready"""
+        line = json.dumps(row.to_dict() if hasattr(row, "to_dict") else row) + "\n"
+        self.lines.append(line)
+        self.size += len(line)
+        # Flush the first row right away to keep time-to-first-byte low
+        if self.first or self.size >= self.chunk_size:
+            self.first = False
+            return self.flush()
+        return None
+    
+    def flush(self) -> Optional[bytes]:
+        """The buffered lines as a chunk, or None when there are none"""
+        if not self.lines:
+            return None
+        chunk = "".join(self.lines).encode("utf-8")
+        self.lines = []
+        self.size = 0
+        return chunk
+
+
+def stream_ndjson(
+    rows: Iterable[Any],
+    on_close: Optional[Callable[[], None]] = None,
+    chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Serialize rows lazily as NDJSON chunks of about `chunk_size` bytes
+    (0 writes every row as soon as it is produced).
+    `on_close` runs once the stream is exhausted or the client disconnects,
+    which is where the database session backing `rows` gets released.
+    """
+    try:
+        buffer = _ChunkBuffer(chunk_size)
+        for row in rows:
+            chunk = buffer.add(row)
+            if chunk is not None:
+                yield chunk
+        chunk = buffer.flush()
+        if chunk is not None:
+            yield chunk
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+async def astream_ndjson(rows: AsyncIterable[Any], chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """stream_ndjson for async rows, e.g. streamed through an AsyncSession"""
+    buffer = _ChunkBuffer(chunk_size)
+    async for row in rows:
+        chunk = buffer.add(row)
+        if chunk is not None:
+            yield chunk
+    chunk = buffer.flush()
+    if chunk is not None:
+        yield chunk
@@ -0,0 +1,93 @@
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+import asyncio
+import json
+import time
+from asgiref.sync import sync_to_async
+from shared.events.broadcaster import Broadcaster
+
+SSE_CONTENT_TYPE = "text/event-stream"
+
+# Comment line sent when there is nothing to say, so proxies keep the connection
+HEARTBEAT = ": keep-alive\n\n"
+
+# Milliseconds EventSource waits before reconnecting
+RETRY_MILLISECONDS = 1000
+
+
+def format_event(data: Any, event: Optional[str] = None, id: Optional[int] = None, retry: Optional[int] = None) -> str:
+    """One Server-Sent Event; data is JSON-encoded"""
+    lines = []
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def render_changes(changes: List[Dict[str, Any]], lagged: bool) -> List[str]:
+    """Events for drained changes; a lagging subscriber is told to resync first"""
+    messages = []
+    if lagged:
+        messages.append(format_event({"type": "reset"}, event="reset"))
+    for change in changes:
+        messages.append(format_event(change, event=change["type"], id=change.get("generation")))
+    return messages
+
+
+class ChangeStream:
+    """
+    Server-Sent Events for one client: a `hello` event with the current
+    generation, then every change event, with heartbeats while idle. The
+    stream ends after `max_seconds`; EventSource reconnects on its own.
+
+    The client is subscribed before the generation is read, so no change
+    after the `hello` generation is missed, and only once the stream is
+    iterated, so a response that is never sent leaves no subscription.
+    """
+
+    def __init__(self, broadcaster: Broadcaster, read_generation: Callable[[], int],
+                 heartbeat: float, max_seconds: float):
+        self.broadcaster = broadcaster
+        self.read_generation = read_generation
+        self.heartbeat = heartbeat
+        self.max_seconds = max_seconds
+
+    def hello(self, generation: int) -> str:
+        """First event, with the generation to delta sync from"""
+        return format_event({"generation": generation}, event="hello", id=generation, retry=RETRY_MILLISECONDS)
+
+    def timeouts(self) -> Iterator[float]:
+        """Seconds to wait for each next change, until the stream is over"""
+        deadline = time.monotonic() + self.max_seconds
+        while (remaining := deadline - time.monotonic()) > 0:
+            yield min(self.heartbeat, remaining)
+
+    def __iter__(self) -> Iterator[str]:
+        """Blocking stream, for WSGI workers"""
+        subscription = self.broadcaster.subscribe()
+        try:
+            yield self.hello(self.read_generation())
+            for timeout in self.timeouts():
+                if subscription.wait(timeout):
+                    yield from render_changes(*subscription.drain())
+                else:
+                    yield HEARTBEAT
+        finally:
+            self.broadcaster.unsubscribe(subscription)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        """Non-blocking stream, for ASGI servers"""
+        subscription = self.broadcaster.subscribe(asyncio.get_running_loop())
+        try:
+            yield self.hello(await sync_to_async(self.read_generation)())
+            for timeout in self.timeouts():
+                if await subscription.wait_async(timeout):
+                    for message in render_changes(*subscription.drain()):
+                        yield message
+                else:
+                    yield HEARTBEAT
+        finally:
+            self.broadcaster.unsubscribe(subscription)
@@ -0,0 +1,103 @@
+from typing import Any, Dict, Iterator, Optional, Tuple
+import csv
+import json
+from apps.data_processor.interfaces.ndjson import NDJSON_CONTENT_TYPE
+
+CSV_CONTENT_TYPE = "text/csv"
+
+# Upload formats by request Content-Type
+UPLOAD_FORMATS = {
+    NDJSON_CONTENT_TYPE: "ndjson",
+    CSV_CONTENT_TYPE: "csv",
+}
+
+# Longest line accepted in an upload; bounds the memory used per read
+MAX_LINE_BYTES = 1024 * 1024
+
+# A record read from an upload: (line number, parsed record or the error that prevented parsing)
+UploadRecord = Tuple[int, Any]
+
+
+class UploadError(ValueError):
+    """Raised when an upload cannot be read"""
+
+
+def get_upload_format(content_type: Optional[str]) -> Optional[str]:
+    """Map a request Content-Type (parameters ignored) to an upload format"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return UPLOAD_FORMATS.get(media_type)
+
+
+def iter_lines(stream, max_line_bytes: int = MAX_LINE_BYTES) -> Iterator[str]:
+    """
+    Read decoded lines from a binary file-like object one at a time.
+    Raises UploadError for lines longer than `max_line_bytes` or not UTF-8.
+    """
+    number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > max_line_bytes:
+            raise UploadError(f"Line {number} is longer than {max_line_bytes} bytes")
+        try:
+            text = line.decode("utf-8-sig" if number == 1 else "utf-8")
+        except UnicodeDecodeError:
+            raise UploadError(f"Line {number} is not valid UTF-8")
+        yield text
+
+
+def iter_ndjson_records(stream) -> Iterator[UploadRecord]:
+    """
+    Parse an NDJSON upload lazily, one JSON value per line; blank lines are skipped.
+    A line that is not valid JSON is yielded with an UploadError instead of a
+    record, so the rest of the upload can still be processed.
+    """
+    for number, line in enumerate(iter_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, UploadError(f"Invalid JSON: {e}")
+
+
+def iter_csv_records(stream) -> Iterator[UploadRecord]:
+    """
+    Parse a CSV upload lazily. The first row is the header; each following
+    row becomes a dict keyed by it, leaving out empty cells so they count as
+    missing fields. Line numbers are those of the row's first line.
+    """
+    reader = csv.reader(iter_lines(stream))
+    try:
+        header = [column.strip() for column in next(reader)]
+    except StopIteration:
+        return
+    except csv.Error as e:
+        raise UploadError(f"Invalid CSV header: {e}")
+
+    while True:
+        number = reader.line_num + 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            raise UploadError(f"Invalid CSV on line {number}: {e}")
+        if not any(cell.strip() for cell in row):
+            continue
+        if len(row) > len(header):
+            yield number, UploadError(f"Expected {len(header)} columns, got {len(row)}")
+            continue
+        record: Dict[str, Any] = {
+            column: cell for column, cell in zip(header, row) if column and cell != ""
+        }
+        yield number, record
+
+
+def iter_upload_records(stream, upload_format: str) -> Iterator[UploadRecord]:
+    """Parse an upload in the given format ("ndjson" or "csv")"""
+    if upload_format == "csv":
+        return iter_csv_records(stream)
+    return iter_ndjson_records(stream)
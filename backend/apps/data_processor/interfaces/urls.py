@@ -1,8 +1,21 @@
 from django.urls import path
-from .views import DataProcessorView, TransformDataView, AllProductsView
+from .views import (
+    DataProcessorView, DataUploadView, IngestionStatsView, PoolStatsView, CacheStatsView,
+    TransformDataView, AllProductsView, ChangeFeedView
+)
+from .async_views import AsyncDataProcessorView, AsyncTransformDataView, AsyncProductsView
 
 urlpatterns = [
     path('process/', DataProcessorView.as_view(), name='process_data'),
+    path('process/stream/', DataUploadView.as_view(), name='process_data_stream'),
+    path('process/stats/', IngestionStatsView.as_view(), name='ingestion_stats'),
+    path('pool/stats/', PoolStatsView.as_view(), name='pool_stats'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
     path('transform/<str:transformation_type>/', TransformDataView.as_view(), name='transform_data'),
     path('products/', AllProductsView.as_view(), name='get_all_products'),
+    path('products/events/', ChangeFeedView.as_view(), name='product_events'),
+    # Async-native endpoints, served by the ASGI application
+    path('async/process/', AsyncDataProcessorView.as_view(), name='async_process_data'),
+    path('async/transform/<str:transformation_type>/', AsyncTransformDataView.as_view(), name='async_transform_data'),
+    path('async/products/', AsyncProductsView.as_view(), name='async_get_all_products'),
 ] 
\ No newline at end of file
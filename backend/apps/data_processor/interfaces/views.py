@@ -1,85 +1,100 @@
+from typing import Any, Dict, List, Tuple
 from rest_framework import status, views
 from rest_framework.response import Response
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from rest_framework.settings import api_settings
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.views import View
 from django.conf import settings
 import logging
-import json
 from apps.data_processor.application.services import DataProcessingService
+from apps.data_processor.application.ingestion import IngestionPipeline, ingestion_stats
+from apps.data_processor.application.cache import transform_cache
 from apps.data_processor.infrastructure.serializers import DataItemSerializer, DataSetSerializer
+from apps.data_processor.infrastructure.generations import DatasetGenerationStore
+from apps.data_processor.infrastructure.changes import change_broadcaster, ensure_listener
 from apps.data_processor.domain.models import TransformationType
 from apps.data_processor.domain.schemas import (
-    DataSetSchema, FilterParamsSchema, SortParamsSchema, 
-    AggregateParamsSchema, TransformationTypeEnum
+    FilterParamsSchema, FilterExpressionParamsSchema, SortParamsSchema, 
+    AggregateParamsSchema, GroupParamsSchema, TransformationTypeEnum, PaginationParamsSchema,
+    UploadParamsSchema, DeltaParamsSchema
 )
+from apps.data_processor.interfaces.ndjson import (
+    NDJSONRenderer, NDJSON_CONTENT_TYPE, wants_ndjson, stream_ndjson
+)
+from apps.data_processor.interfaces.conditional import conditional_get
+from apps.data_processor.interfaces.sse import SSE_CONTENT_TYPE, ChangeStream
+from apps.data_processor.interfaces.uploads import (
+    UPLOAD_FORMATS, get_upload_format, iter_upload_records
+)
+from shared.utils.pagination import InvalidCursorError
+from shared.db.engine import get_engine, get_pool_stats, create_session
 from pydantic import ValidationError
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Configure SQLAlchemy
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_session(request):
+    """
+    Get the request's SQLAlchemy session, lent by SQLAlchemySessionMiddleware
+    and closed by it once the response is complete
+    """
+    return request.db_session
+
+def get_process_items(payload) -> List[Dict[str, Any]]:
+    """
+    The items of a process request (one object or a list of them).
+    Raises ValueError with the client-facing message when there are none
+    or one has no name.
+    """
+    # Check if request data is empty
+    if not payload:
+        raise ValueError("No data provided")
+    
+    data_items = payload if isinstance(payload, list) else [payload]
+    
+    # Ensure each item has required fields
+    for item in data_items:
+        if not item.get('name'):
+            raise ValueError("Product name is required")
+        
+        # Log the processed item
+        logger.debug(f"Processing product: {item.get('name')}")
+    return data_items
 
 class DataProcessorView(views.APIView):
     """View for processing and transforming data"""
     
-    def get_session(self):
-        """Get SQLAlchemy session"""
-        session = SessionLocal()
-        try:
-            return session
-        finally:
-            session.close()
-    
     def post(self, request, *args, **kwargs):
         """Process data"""
         try:
-            # Log received data for debugging
-            logger.info(f"Received data for processing: {json.dumps(request.data)}")
+            with ingestion_stats.stage("parse") as timing:
+                payload = request.data
+                timing["items"] = len(payload) if isinstance(payload, list) else 1
             
-            # Check if request data is empty
-            if not request.data:
-                return Response(
-                    {"error": "No data provided"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-                
-            # Validate input data with Pydantic
-            if isinstance(request.data, list):
-                data_items = request.data
-            else:
-                data_items = [request.data]
-                
-            # Ensure each item has required fields
-            for item in data_items:
-                # Extract required fields if missing
-                if not item.get('name'):
-                    return Response(
-                        {"error": "Product name is required"}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                    
-                # Log the processed item
-                logger.debug(f"Processing product: {item.get('name')}")
-                
-            data_set_schema = DataSetSchema(items=data_items)
+            # Log the size of the payload rather than the payload itself
+            logger.info(f"Received {timing['items']} item(s) for processing")
             
-            # Convert validated data to domain model
-            domain_data_set = data_set_schema.to_domain()
+            try:
+                data_items = get_process_items(payload)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Create session and service
-            session = SessionLocal()
+            # Get the request session and create the pipeline
+            session = get_session(request)
             try:
-                service = DataProcessingService(session)
+                pipeline = IngestionPipeline(session)
                 
-                # Process data
-                result = service.process_data(domain_data_set.to_dict())
+                # Validate each item once, then insert straight from the validated schemas
+                entries = pipeline.validate(data_items)
+                result = pipeline.serialize(pipeline.insert(entries))
                 
                 # Log the result
                 logger.info(f"Successfully processed {len(result)} products")
                 
                 return Response(result, status=status.HTTP_201_CREATED)
+            except ValidationError:
+                raise
             except Exception as e:
                 session.rollback()
                 logger.error(f"Error processing data: {str(e)}")
@@ -87,8 +102,6 @@ class DataProcessorView(views.APIView):
                     {"error": str(e)},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
-            finally:
-                session.close()
         except ValidationError as e:
             logger.error(f"Validation error: {e.errors()}")
             return Response(
@@ -96,127 +109,346 @@ class DataProcessorView(views.APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+class DataUploadView(views.APIView):
+    """View for streamed ingestion of large NDJSON/CSV uploads"""
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer]
+    
+    def post(self, request, *args, **kwargs):
+        """
+        Read the request body incrementally and store it in chunks, each one
+        validated and committed on its own. The response streams one NDJSON
+        progress event per chunk followed by a summary; request.data is never
+        touched, so the body is not buffered.
+        """
+        upload_format = get_upload_format(request.content_type)
+        if upload_format is None:
+            return Response(
+                {"error": f"Unsupported content type: {request.content_type}. Supported types are: {', '.join(UPLOAD_FORMATS)}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        
+        try:
+            upload_params = UploadParamsSchema(**request.query_params.dict())
+        except ValidationError as e:
+            logger.error(f"Validation error: {e.errors()}")
+            return Response(
+                {"error": "Invalid parameters", "details": e.errors()},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        logger.info(f"Receiving {upload_format} upload in chunks of {upload_params.chunk_size}")
+        session = get_session(request)
+        records = iter_upload_records(request.stream, upload_format) if request.stream else iter(())
+        events = self.progress(session, records, upload_params.chunk_size)
+        return StreamingHttpResponse(
+            stream_ndjson(events, chunk_size=0),
+            content_type=NDJSON_CONTENT_TYPE,
+            status=status.HTTP_200_OK
+        )
+    
+    @staticmethod
+    def progress(session, records, chunk_size):
+        """
+        Progress events of an upload. Chunks committed before a failure stay
+        stored; the failure is reported as a final error event, since the
+        response status has already been sent.
+        """
+        service = DataProcessingService(session)
+        try:
+            yield from service.process_stream(records, chunk_size)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error processing upload: {str(e)}")
+            yield {"error": str(e)}
+
+class IngestionStatsView(views.APIView):
+    """View for the per-stage ingestion timing counters"""
+    
+    def get(self, request, *args, **kwargs):
+        """Get cumulative calls, items, seconds and CPU seconds per ingestion stage"""
+        return Response({"stages": ingestion_stats.snapshot()}, status=status.HTTP_200_OK)
+    
+    def delete(self, request, *args, **kwargs):
+        """Reset the counters"""
+        ingestion_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class PoolStatsView(views.APIView):
+    """View for the SQLAlchemy connection pool usage"""
+    
+    def get(self, request, *args, **kwargs):
+        """Get connections in use, saturation and checkout wait times of this worker's pool"""
+        return Response(get_pool_stats(), status=status.HTTP_200_OK)
+    
+    def delete(self, request, *args, **kwargs):
+        """Reset the checkout counters"""
+        stats = getattr(get_engine().pool, "stats", None)
+        if stats is not None:
+            stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class CacheStatsView(views.APIView):
+    """View for the transform result cache counters"""
+    
+    def get(self, request, *args, **kwargs):
+        """Get hits, misses, evictions, expirations, invalidations and size of this worker's cache"""
+        return Response(transform_cache.stats(), status=status.HTTP_200_OK)
+    
+    def delete(self, request, *args, **kwargs):
+        """Empty the cache and reset the counters"""
+        transform_cache.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+def read_generation() -> int:
+    """Current dataset generation, read with a short-lived session"""
+    with create_session() as session:
+        return DatasetGenerationStore(session).current()
+
+class ChangeFeedView(View):
+    """
+    Server-Sent Events feed of committed product inserts, updates and deletes.
+    Under ASGI an idle client costs a suspended coroutine, not a worker thread.
+    """
+    
+    async def get(self, request, *args, **kwargs):
+        """Stream change events; each carries the generation to delta sync from"""
+        ensure_listener(get_engine())
+        stream = ChangeStream(
+            change_broadcaster, read_generation,
+            heartbeat=getattr(settings, 'CHANGE_FEED_HEARTBEAT', 15),
+            max_seconds=getattr(settings, 'CHANGE_FEED_MAX_SECONDS', 300)
+        )
+        # WSGI servers can only send a sync iterator
+        content = stream.__aiter__() if isinstance(request, ASGIRequest) else iter(stream)
+        response = StreamingHttpResponse(content, content_type=SSE_CONTENT_TYPE)
+        response['Cache-Control'] = 'no-cache'
+        # Keep nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+def get_pagination_params(query_params) -> dict:
+    """
+    Validate keyset pagination parameters (`limit`, `cursor`).
+    Returns an empty dict when the request is not paginated; a cursor without
+    a limit uses the REST_FRAMEWORK PAGE_SIZE setting.
+    """
+    raw = {key: query_params[key] for key in ('limit', 'cursor') if key in query_params}
+    if not raw:
+        return {}
+    pagination = PaginationParamsSchema(**raw)
+    return {
+        "limit": pagination.limit or settings.REST_FRAMEWORK['PAGE_SIZE'],
+        "cursor": pagination.cursor,
+    }
+
+def get_delta_params(query_params) -> DeltaParamsSchema:
+    """
+    Validate the delta sync watermark (`since`). Raises ValueError when it
+    is combined with pagination, pydantic's ValidationError when it is invalid.
+    """
+    if 'limit' in query_params or 'cursor' in query_params:
+        raise ValueError("Delta sync (since) cannot be combined with pagination (limit, cursor)")
+    return DeltaParamsSchema(since=query_params['since'])
+
 class AllProductsView(views.APIView):
     """View for retrieving all products"""
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer]
     
+    @conditional_get
     def get(self, request, *args, **kwargs):
-        """Get all products without transformation"""
-        # Create session and service
-        session = SessionLocal()
+        """
+        Get all products without transformation, optionally one keyset page at
+        a time, or only the changes since a delta sync watermark (`since`)
+        """
+        if 'since' in request.query_params:
+            return self.changes(request)
+        
+        if wants_ndjson(request):
+            return self.stream(request)
+        
+        try:
+            pagination = get_pagination_params(request.query_params)
+        except ValidationError as e:
+            logger.error(f"Validation error: {e.errors()}")
+            return Response(
+                {"error": "Invalid parameters", "details": e.errors()},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Get the request session and create the service
+        session = get_session(request)
         try:
             service = DataProcessingService(session)
             
-            # Get all data as domain objects
-            dataset = service.repository.get_all_as_domain()
-            
-            # Convert to dictionary representation
-            result = {"data": dataset.to_dict()}
+            # Get all data (or one page) as dictionaries
+            result = service.get_products(**pagination)
             
             return Response(result, status=status.HTTP_200_OK)
+        except InvalidCursorError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error getting all products: {str(e)}")
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        finally:
-            session.close()
-
-class TransformDataView(views.APIView):
-    """View for transforming data"""
     
-    def get(self, request, transformation_type, *args, **kwargs):
-        """Transform data based on transformation type and parameters"""
-        # Validate transformation type
+    def changes(self, request):
+        """Get products written and ids deleted since the `since` watermark, and the next watermark"""
         try:
-            # Use Pydantic enum for validation
-            transformation = TransformationTypeEnum(transformation_type)
-        except ValueError:
+            delta = get_delta_params(request.query_params)
+        except ValidationError as e:
+            logger.error(f"Validation error: {e.errors()}")
             return Response(
-                {"error": f"Invalid transformation type: {transformation_type}. Valid types are: {', '.join([t.value for t in TransformationTypeEnum])}"},
+                {"error": "Invalid parameters", "details": e.errors()},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Extract parameters from query string
-        params = {}
-        for key, value in request.query_params.items():
-            # Process special fields with proper type conversion
-            if key == 'field' and value in ('id', 'price', 'quantity'):
-                params[key] = value
-            # Convert string values to appropriate types
-            elif key == 'value':
-                field = request.query_params.get('field', '')
-                # Handle ID field specifically to ensure it's an integer
-                if field == 'id':
-                    try:
-                        params[key] = int(value)
-                    except (ValueError, TypeError):
-                        return Response(
-                            {"error": "ID values must be valid integers"},
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-                # Handle price and quantity fields to ensure they're floats
-                elif field in ('price', 'quantity'):
-                    try:
-                        params[key] = float(value)
-                    except (ValueError, TypeError):
-                        return Response(
-                            {"error": f"{field.capitalize()} values must be valid numbers"},
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-                else:
-                    # Default handling for other fields
-                    if value.isdigit():
-                        params[key] = int(value)
-                    elif value.replace('.', '', 1).isdigit() and value.count('.') < 2:
-                        params[key] = float(value)
-                    elif value.lower() in ('true', 'false'):
-                        params[key] = value.lower() == 'true'
-                    else:
-                        params[key] = value
-            else:
-                # Default handling for other parameters
-                if value.isdigit():
+        try:
+            service = DataProcessingService(get_session(request))
+            return Response(service.get_changes(delta.since), status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error getting product changes: {str(e)}")
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def stream(self, request):
+        """
+        Stream all products as NDJSON, one product per line.
+        The request session stays open for the lifetime of the response; the
+        middleware closes it once the last row is written or the client goes away.
+        """
+        service = DataProcessingService(get_session(request))
+        rows = service.repository.iter_domain()
+        return StreamingHttpResponse(
+            stream_ndjson(rows),
+            content_type=NDJSON_CONTENT_TYPE,
+            status=status.HTTP_200_OK
+        )
+
+def parse_transformation(transformation_type: str) -> TransformationTypeEnum:
+    """The requested transformation; raises ValueError listing the valid ones"""
+    try:
+        # Use Pydantic enum for validation
+        return TransformationTypeEnum(transformation_type)
+    except ValueError:
+        raise ValueError(
+            f"Invalid transformation type: {transformation_type}. Valid types are: {', '.join([t.value for t in TransformationTypeEnum])}"
+        )
+
+def coerce_query_value(value: str) -> Any:
+    """Convert a query string value to an int, float or bool when it looks like one"""
+    if value.isdigit():
+        return int(value)
+    elif value.replace('.', '', 1).isdigit() and value.count('.') < 2:
+        return float(value)
+    elif value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    return value
+
+def parse_transform_params(query_params) -> Dict[str, Any]:
+    """
+    Extract the transform parameters from the query string with proper type
+    conversion. Raises ValueError with the client-facing message when the
+    `value` of an id, price or quantity filter is not a number.
+    """
+    params = {}
+    for key, value in query_params.items():
+        # Process special fields with proper type conversion
+        if key == 'field' and value in ('id', 'price', 'quantity'):
+            params[key] = value
+        # Convert string values to appropriate types
+        elif key == 'value':
+            field = query_params.get('field', '')
+            # Handle ID field specifically to ensure it's an integer
+            if field == 'id':
+                try:
                     params[key] = int(value)
-                elif value.replace('.', '', 1).isdigit() and value.count('.') < 2:
+                except (ValueError, TypeError):
+                    raise ValueError("ID values must be valid integers")
+            # Handle price and quantity fields to ensure they're floats
+            elif field in ('price', 'quantity'):
+                try:
                     params[key] = float(value)
-                elif value.lower() in ('true', 'false'):
-                    params[key] = value.lower() == 'true'
-                else:
-                    params[key] = value
+                except (ValueError, TypeError):
+                    raise ValueError(f"{field.capitalize()} values must be valid numbers")
+            else:
+                params[key] = coerce_query_value(value)
+        else:
+            params[key] = coerce_query_value(value)
+    return params
+
+def validate_transform_params(transformation, params: Dict[str, Any], query_params) -> Tuple[dict, dict]:
+    """
+    Validate the pagination and the transformation parameters.
+    Returns (pagination, validated parameters); aggregations are never
+    paginated. Raises pydantic's ValidationError.
+    """
+    # Pagination parameters are validated separately from the transformation ones
+    page_params = {key: query_params[key] for key in ('limit', 'cursor') if key in params}
+    for key in page_params:
+        params.pop(key)
+    pagination = get_pagination_params(page_params)
+    
+    # Validate parameters based on transformation type
+    validated_params = {}
+    if transformation == TransformationTypeEnum.FILTER and 'where' in params:
+        validated_params = FilterExpressionParamsSchema(**params).dict()
+    elif transformation == TransformationTypeEnum.FILTER:
+        validated_params = FilterParamsSchema(**params).dict()
+    elif transformation == TransformationTypeEnum.SORT:
+        validated_params = SortParamsSchema(**params).dict()
+    elif transformation == TransformationTypeEnum.AGGREGATE:
+        validated_params = AggregateParamsSchema(**params).dict()
+    elif transformation == TransformationTypeEnum.GROUP:
+        validated_params = GroupParamsSchema(**params).dict()
+    
+    if transformation in (TransformationTypeEnum.AGGREGATE, TransformationTypeEnum.GROUP):
+        pagination = {}
+    return pagination, validated_params
+
+def transform_body(result: Dict[str, Any]) -> Dict[str, Any]:
+    """The transform result as sent; an empty one carries a message for the frontend"""
+    if "data" in result and not result["data"]:
+        return {"data": [], "message": "No products found matching your criteria."}
+    return result
+
+class TransformDataView(views.APIView):
+    """View for transforming data"""
+    
+    @conditional_get
+    def get(self, request, transformation_type, *args, **kwargs):
+        """Transform data based on transformation type and parameters"""
+        try:
+            transformation = parse_transformation(transformation_type)
+            params = parse_transform_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Validate parameters based on transformation type
-            validated_params = {}
-            if transformation == TransformationTypeEnum.FILTER:
-                filter_schema = FilterParamsSchema(**params)
-                validated_params = filter_schema.dict()
-            elif transformation == TransformationTypeEnum.SORT:
-                validated_params = SortParamsSchema(**params).dict()
-            elif transformation == TransformationTypeEnum.AGGREGATE:
-                validated_params = AggregateParamsSchema(**params).dict()
+            pagination, validated_params = validate_transform_params(transformation, params, request.query_params)
             
-            # Create session and service
-            session = SessionLocal()
+            # Get the request session and create the service
+            session = get_session(request)
             try:
                 service = DataProcessingService(session)
                 
                 # Transform data
-                result = service.transform_data(transformation.value, **validated_params)
-                
-                # Add empty data response if no products found for better frontend handling
-                if "data" in result and (not result["data"] or len(result["data"]) == 0):
-                    return Response({"data": [], "message": "No products found matching your criteria."}, status=status.HTTP_200_OK)
+                result = service.transform_data(transformation.value, **pagination, **validated_params)
                 
-                return Response(result, status=status.HTTP_200_OK)
+                return Response(transform_body(result), status=status.HTTP_200_OK)
+            except InvalidCursorError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             except Exception as e:
                 logger.error(f"Error transforming data: {str(e)}")
                 return Response(
                     {"error": str(e)},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
-            finally:
-                session.close()
         except ValidationError as e:
             logger.error(f"Validation error: {e.errors()}")
             return Response(
@@ -0,0 +1,20 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from apps.data_processor.infrastructure.schema import upgrade_schema
+from apps.data_processor.application.cache import transform_cache
+
+
+@pytest.fixture
+def sqlite_session():
+    """SQLAlchemy session bound to a throwaway in-memory SQLite database"""
+    # Cached results belong to the previous test's database
+    transform_cache.clear()
+    engine = create_engine("sqlite://")
+    upgrade_schema(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import threading
+import pytest
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from apps.data_processor.application.cache import transform_cache
+from apps.data_processor.infrastructure.schema import upgrade_schema
+from shared.db import engine as db_engine
+from shared.db.engine import set_engine, set_async_engine
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+PRODUCTS = [
+    {"name": "Product A", "price": 25.99, "quantity": 10, "category": "Electronics"},
+    {"name": "Product B", "price": 15.50, "quantity": 5, "category": "Books"},
+    {"name": "Product C", "price": 99.99, "quantity": 2, "category": "Electronics"},
+]
+
+
+@pytest.fixture
+def async_engine(tmp_path):
+    """
+    Process-wide sync and async engines over one SQLite file. The async engine
+    does not pool, since every test runs its requests in an event loop of its own.
+    """
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    transform_cache.clear()
+    engine = create_engine(url)
+    upgrade_schema(engine)
+    previous = db_engine._engine, db_engine._async_engine
+    db_engine._engine = None
+    set_engine(engine)
+    set_async_engine(create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"), poolclass=NullPool))
+    try:
+        yield engine
+    finally:
+        set_engine(None)
+        set_async_engine(None)
+        db_engine._engine, db_engine._async_engine = previous
+
+
+def run(scenario):
+    """Run an async test scenario with a fresh AsyncClient"""
+    return asyncio.run(scenario(AsyncClient()))
+
+
+async def post_products(client, products=PRODUCTS):
+    return await client.post(reverse("async_process_data"), json.dumps(products), content_type="application/json")
+
+
+class TestAsyncViews:
+    """Test cases for the async-native endpoints over aiosqlite"""
+
+    def test_process_and_list(self, async_engine):
+        async def scenario(client):
+            response = await post_products(client)
+            assert response.status_code == 201
+            created = response.json()
+            assert [item["name"] for item in created] == ["Product A", "Product B", "Product C"]
+
+            response = await client.get(reverse("async_get_all_products"))
+            assert response.status_code == 200
+            assert response.json()["data"] == created
+        run(scenario)
+
+    def test_process_errors(self, async_engine):
+        async def scenario(client):
+            url = reverse("async_process_data")
+            response = await client.post(url, "{not json", content_type="application/json")
+            assert response.status_code == 400
+            response = await client.post(url, json.dumps([{"price": 1}]), content_type="application/json")
+            assert response.json() == {"error": "Product name is required"}
+            response = await client.post(url, json.dumps([{"name": "A", "price": "abc"}]), content_type="application/json")
+            assert response.status_code == 400
+            assert response.json()["error"] == "Invalid data format"
+            response = await client.post(url, "name=A", content_type="application/x-www-form-urlencoded")
+            assert response.status_code == 415
+        run(scenario)
+
+    def test_transforms_match_sync_views(self, async_engine, monkeypatch):
+        """
+        The async views answer exactly what the sync views compute, and so do
+        their in-memory paths for databases without JSON path support
+        """
+        from apps.data_processor.application import services
+
+        queries = [
+            ("filter", "field=category&value=Electronics"),
+            ("filter", "field=price&value=20&operator=gt"),
+            ("filter", "where=price lt 50 and not category eq Books"),
+            ("sort", "field=price&ascending=false"),
+            ("aggregate", "field=price&operation=avg"),
+            ("aggregate", "field=price&operation=stats"),
+            ("aggregate", "field=price&operation=histogram&bins=2"),
+            ("aggregate", "field=price&operation=approx_distinct"),
+            ("aggregate", "field=category&operation=approx_percentile"),
+            ("group", "group_by=category&fields=price"),
+        ]
+
+        async def transform_all(client):
+            bodies = []
+            for transformation, query in queries:
+                url = reverse("async_transform_data", kwargs={"transformation_type": transformation})
+                response = await client.get(f"{url}?{query}")
+                assert response.status_code == 200
+                bodies.append(response.json())
+            return bodies
+
+        async def scenario(client):
+            await post_products(client)
+            bodies = await transform_all(client)
+            transform_cache.clear()
+            monkeypatch.setattr(services, "supports_json_queries", lambda session: False)
+            assert await transform_all(client) == bodies
+            return bodies
+
+        bodies = run(scenario)
+        assert [item["name"] for item in bodies[2]["data"]] == ["Product A"]
+        assert [item["name"] for item in bodies[3]["data"]] == ["Product C", "Product A", "Product B"]
+        assert bodies[5]["result"]["count"] == 3
+        assert bodies[7]["result"] == 3
+        assert [group["group"] for group in bodies[9]["groups"]] == ["Books", "Electronics"]
+
+        transform_cache.clear()
+        client = Client()
+        for (transformation, query), body in zip(queries, bodies):
+            url = reverse("transform_data", kwargs={"transformation_type": transformation})
+            assert client.get(f"{url}?{query}").json() == body
+
+    def test_transform_errors(self, async_engine):
+        async def scenario(client):
+            url = reverse("async_transform_data", kwargs={"transformation_type": "explode"})
+            assert (await client.get(url)).status_code == 400
+            url = reverse("async_transform_data", kwargs={"transformation_type": "filter"})
+            response = await client.get(f"{url}?field=id&value=abc")
+            assert response.json() == {"error": "ID values must be valid integers"}
+            response = await client.get(f"{url}?field=price&value=1&operator=between")
+            assert response.json()["error"] == "Invalid parameters"
+            response = await client.get(f"{url}?where=id eq 1e400")
+            assert response.status_code == 400
+            response = await client.get(f"{url}?field=price&value=1&limit=1&cursor=garbage")
+            assert response.status_code == 400
+        run(scenario)
+
+    def test_pagination_and_delta_sync(self, async_engine):
+        async def scenario(client):
+            await post_products(client)
+            url = reverse("async_get_all_products")
+            first = (await client.get(f"{url}?limit=2")).json()
+            second = (await client.get(f"{url}?limit=2&cursor={first['next_cursor']}")).json()
+            assert [item["name"] for item in first["data"] + second["data"]] == ["Product A", "Product B", "Product C"]
+            assert second["next_cursor"] is None
+
+            delta = (await client.get(f"{url}?since=0")).json()
+            assert delta["reset"] and len(delta["data"]) == 3
+            await post_products(client, [{"name": "Product D", "price": 1}])
+            changes = (await client.get(f"{url}?since={delta['watermark']}")).json()
+            assert [item["name"] for item in changes["data"]] == ["Product D"]
+            assert (await client.get(f"{url}?since=1&limit=2")).status_code == 400
+        run(scenario)
+
+    def test_conditional_get(self, async_engine):
+        """ETags come from the dataset generation, read through the async session"""
+        async def scenario(client):
+            await post_products(client)
+            url = reverse("async_transform_data", kwargs={"transformation_type": "sort"}) + "?field=price"
+            response = await client.get(url)
+            etag = response["ETag"]
+            assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+            await post_products(client, [{"name": "Product D", "price": 1}])
+            assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 200
+        run(scenario)
+
+    def test_ndjson_stream(self, async_engine):
+        async def scenario(client):
+            await post_products(client)
+            response = await client.get(reverse("async_get_all_products") + "?stream=1")
+            assert response["Content-Type"] == "application/x-ndjson"
+            lines = b"".join([chunk async for chunk in response.streaming_content]).splitlines()
+            return [json.loads(line)["name"] for line in lines]
+
+        assert run(scenario) == ["Product A", "Product B", "Product C"]
+
+    def test_concurrent_requests(self, async_engine):
+        """Many requests are in flight on one event loop at once"""
+        async def scenario(client):
+            await post_products(client)
+            url = reverse("async_transform_data", kwargs={"transformation_type": "filter"})
+            responses = await asyncio.gather(*[
+                client.get(f"{url}?field=price&value={value}&operator=gt") for value in range(100)
+            ])
+            return [len(response.json()["data"]) for response in responses]
+
+        counts = run(scenario)
+        assert counts == [3] * 16 + [2] * 10 + [1] * 74
+
+    def test_transform_work_does_not_block_the_loop(self, async_engine, monkeypatch):
+        """
+        The CPU-bound steps of a transform run in a worker thread: while the
+        sort is held there, a cheap request is answered on the event loop
+        """
+        from apps.data_processor.application.services import AsyncDataProcessingService
+
+        compute = AsyncDataProcessingService._compute
+        gate = threading.Event()
+        threads = []
+
+        async def scenario(client):
+            await post_products(client)
+            loop = asyncio.get_running_loop()
+            started = asyncio.Event()
+
+            def held(function):
+                def run(*args):
+                    threads.append(threading.get_ident())
+                    loop.call_soon_threadsafe(started.set)
+                    gate.wait(10)
+                    return function(*args)
+                return run
+
+            async def held_compute(function, *args):
+                return await compute(held(function), *args)
+
+            monkeypatch.setattr(AsyncDataProcessingService, "_compute", staticmethod(held_compute))
+            sort_url = reverse("async_transform_data", kwargs={"transformation_type": "sort"}) + "?field=price"
+            large = asyncio.ensure_future(client.get(sort_url))
+            await asyncio.wait_for(started.wait(), 10)
+
+            response = await client.get(reverse("async_get_all_products") + "?limit=1")
+            assert response.status_code == 200
+            assert not large.done()
+            gate.set()
+
+            response = await large
+            assert [item["name"] for item in response.json()["data"]] == ["Product B", "Product A", "Product C"]
+            return threading.get_ident()
+
+        try:
+            loop_thread = run(scenario)
+        finally:
+            gate.set()
+        assert threads and loop_thread not in threads
+
+    def test_wsgi_requests_are_refused(self, async_engine):
+        """Under WSGI the async engine's pooled connections would cross event loops"""
+        response = Client().get(reverse("async_get_all_products"))
+        assert response.status_code == 501
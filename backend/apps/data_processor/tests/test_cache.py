@@ -0,0 +1,154 @@
+import pytest
+from apps.data_processor.application.cache import ResultCache, make_key, transform_cache
+from apps.data_processor.application.services import DataProcessingService
+from apps.data_processor.domain.models import DataItem
+from apps.data_processor.domain.schemas import AggregationOperationEnum
+
+
+class FakeClock:
+    """Clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResultCache:
+    """Test cases for the generation-versioned LRU/TTL cache"""
+
+    def test_hit_and_miss_counters(self):
+        """A stored value is a hit at the same generation"""
+        cache = ResultCache()
+        assert cache.get("a", 0) is None
+        cache.put("a", 0, {"result": 1})
+
+        assert cache.get("a", 0) == {"result": 1}
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+    def test_least_recently_used_is_evicted(self):
+        """The entry count is bounded and recently read entries survive"""
+        cache = ResultCache(max_entries=2)
+        cache.put("a", 0, 1)
+        cache.put("b", 0, 2)
+        cache.get("a", 0)
+        cache.put("c", 0, 3)
+
+        assert cache.get("b", 0) is None
+        assert cache.get("a", 0) == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_row_budget(self):
+        """Entries are evicted to stay within the row budget; oversized results are not stored"""
+        cache = ResultCache(max_rows=3)
+        cache.put("a", 0, {"data": [1, 2]})
+        cache.put("b", 0, {"data": [3, 4]})
+        cache.put("big", 0, {"data": [1, 2, 3, 4]})
+
+        assert cache.get("a", 0) is None
+        assert cache.get("b", 0) == {"data": [3, 4]}
+        assert cache.get("big", 0) is None
+        assert cache.stats()["rows"] == 2
+
+    def test_entries_expire(self):
+        """Entries older than the TTL are misses"""
+        clock = FakeClock()
+        cache = ResultCache(ttl=10, clock=clock)
+        cache.put("a", 0, 1)
+        clock.now = 9
+        assert cache.get("a", 0) == 1
+        clock.now = 10
+
+        assert cache.get("a", 0) is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_new_generation_invalidates(self):
+        """A newer generation drops every older entry"""
+        cache = ResultCache()
+        cache.put("a", 0, 1)
+        cache.put("b", 0, 2)
+
+        assert cache.get("a", 1) is None
+        stats = cache.stats()
+        assert (stats["generation"], stats["entries"], stats["invalidations"]) == (1, 0, 2)
+
+    def test_stale_generation_bypasses_cache(self):
+        """A request that read an older generation neither reads nor stores"""
+        cache = ResultCache()
+        cache.put("a", 2, "new")
+        cache.put("b", 1, "old")
+
+        assert cache.get("a", 1) is None
+        assert cache.get("b", 2) is None
+        assert cache.get("a", 2) == "new"
+
+    def test_values_are_copied(self):
+        """Mutating a stored or served value does not change the cached entry"""
+        cache = ResultCache()
+        value = {"data": [{"id": 1, "name": "A"}]}
+        cache.put("a", 0, value)
+        value["data"].clear()
+
+        served = cache.get("a", 0)
+        served["data"][0]["name"] = "B"
+
+        assert cache.get("a", 0) == {"data": [{"id": 1, "name": "A"}]}
+
+    def test_make_key_is_canonical(self):
+        """Parameter order does not matter and enums are keyed by value"""
+        first = make_key("aggregate", None, None, {"field": "price", "operation": AggregationOperationEnum.SUM})
+        second = make_key("aggregate", None, None, {"operation": "sum", "field": "price"})
+        assert first == second
+
+
+class TestCachedTransforms:
+    """Test cases for transform caching in the service"""
+
+    @pytest.fixture
+    def service(self, sqlite_session):
+        """Create a service over a seeded database"""
+        service = DataProcessingService(sqlite_session)
+        service.repository.create_many([DataItem(string_fields={"name": "A"}, numeric_fields={"price": 1.0})])
+        return service
+
+    def aggregate(self, service):
+        """Sum of prices through the cached service path"""
+        return service.transform_data("aggregate", field="price", operation=AggregationOperationEnum.SUM)
+
+    def test_repeated_transform_is_served_from_cache(self, service, monkeypatch):
+        """The second identical transform does not recompute"""
+        self.aggregate(service)
+        monkeypatch.setattr(service, "_transform_data", lambda *args, **kwargs: pytest.fail("recomputed"))
+
+        assert self.aggregate(service) == {"result": 1.0}
+        assert transform_cache.stats()["hits"] == 1
+
+    def test_writes_invalidate_cached_results(self, service):
+        """Create, update and delete each bump the generation"""
+        repository = service.repository
+        generation = repository.generations.current()
+        assert self.aggregate(service) == {"result": 1.0}
+
+        created = repository.create_many([DataItem(string_fields={"name": "B"}, numeric_fields={"price": 2.0})])[0]
+        assert self.aggregate(service) == {"result": 3.0}
+
+        repository.update(created.id, {"numeric_fields": {"price": 5.0}})
+        assert self.aggregate(service) == {"result": 6.0}
+
+        repository.delete(created.id)
+        assert self.aggregate(service) == {"result": 1.0}
+        assert repository.generations.current() == generation + 3
+
+    def test_bump_creates_missing_generation_row(self, service):
+        """A database without the generation row gets one from the first write, by upsert"""
+        from sqlalchemy import delete
+        from apps.data_processor.infrastructure.models import DatasetGeneration
+
+        repository = service.repository
+        repository.session.execute(delete(DatasetGeneration))
+        assert repository.generations.current() == 0
+        assert repository.generations.bump() == 1
+        assert repository.generations.bump() == 2
+        assert repository.generations.state()[1] is not None
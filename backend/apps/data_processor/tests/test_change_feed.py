@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import pytest
+from apps.data_processor.domain.models import DataItem
+from apps.data_processor.infrastructure.changes import ChangeRecorder, MAX_EVENT_IDS, make_event
+from apps.data_processor.infrastructure.repositories import DataEntryRepository
+from apps.data_processor.interfaces.sse import ChangeStream, HEARTBEAT
+from shared.events.broadcaster import Broadcaster
+from shared.middleware.disconnect import CancelOnDisconnect
+
+
+class TestBroadcaster:
+    """Test cases for the in-process change broadcaster"""
+
+    def test_sync_subscriber_is_woken_from_another_thread(self):
+        """Events published elsewhere reach a blocked subscriber"""
+        broadcaster = Broadcaster()
+        subscription = broadcaster.subscribe()
+        threading.Thread(target=broadcaster.publish, args=({"type": "created"},)).start()
+
+        assert subscription.wait(5)
+        assert subscription.drain() == ([{"type": "created"}], False)
+
+    def test_async_subscriber_is_woken_from_another_thread(self):
+        """An async subscriber waits without blocking its loop"""
+        broadcaster = Broadcaster()
+
+        async def consume():
+            subscription = broadcaster.subscribe(asyncio.get_running_loop())
+            assert not await subscription.wait_async(0.01)
+            threading.Thread(target=broadcaster.publish, args=({"type": "deleted"},)).start()
+            assert await subscription.wait_async(5)
+            return subscription.drain()
+
+        assert asyncio.run(consume()) == ([{"type": "deleted"}], False)
+
+    def test_slow_subscriber_lags_instead_of_growing(self):
+        """Overflowing the pending limit drops events and flags the subscriber"""
+        broadcaster = Broadcaster(max_pending=2)
+        subscription = broadcaster.subscribe()
+        for generation in range(3):
+            broadcaster.publish({"generation": generation})
+
+        assert subscription.drain() == ([], True)
+        broadcaster.publish({"generation": 3})
+        assert subscription.drain() == ([{"generation": 3}], False)
+
+    def test_unsubscribed_receive_nothing(self):
+        """Unsubscribing stops delivery"""
+        broadcaster = Broadcaster()
+        subscription = broadcaster.subscribe()
+        broadcaster.unsubscribe(subscription)
+        broadcaster.publish({"type": "created"})
+
+        assert subscription.drain() == ([], False)
+        assert broadcaster.stats() == {"subscribers": 0, "published": 1}
+
+
+class TestChangeRecorder:
+    """Test cases for publishing repository changes on commit"""
+
+    @pytest.fixture
+    def feed(self, sqlite_session):
+        """A repository publishing into its own broadcaster, and a subscription to it"""
+        repository = DataEntryRepository(sqlite_session)
+        broadcaster = Broadcaster()
+        repository.changes = ChangeRecorder(sqlite_session, broadcaster)
+        return repository, broadcaster.subscribe()
+
+    def test_writes_publish_after_commit(self, feed):
+        """Create, update and delete each publish one event with their generation"""
+        repository, subscription = feed
+        created = repository.create_many([DataItem(numeric_fields={"price": 1.0}), DataItem()])
+        repository.update(created[0].id, {"numeric_fields": {"price": 2.0}})
+        repository.delete(created[1].id)
+
+        events, _ = subscription.drain()
+        assert [(event["type"], event["generation"], event["ids"]) for event in events] == [
+            ("created", 1, [created[0].id, created[1].id]),
+            ("updated", 2, [created[0].id]),
+            ("deleted", 3, [created[1].id]),
+        ]
+
+    def test_rollback_publishes_nothing(self, feed, sqlite_session):
+        """Changes of a rolled back transaction are never announced"""
+        repository, subscription = feed
+        repository.create({"numeric_fields": {}, "string_fields": {}})
+        subscription.drain()
+
+        repository.changes.record("updated", 99, [1])
+        sqlite_session.rollback()
+        sqlite_session.commit()
+
+        assert subscription.drain() == ([], False)
+
+    def test_large_batches_only_carry_a_count(self):
+        """Events stay small enough for a NOTIFY payload"""
+        event = make_event("created", 1, list(range(MAX_EVENT_IDS + 1)))
+        assert event["ids"] is None
+        assert event["count"] == MAX_EVENT_IDS + 1
+
+
+class TestChangeStream:
+    """Test cases for the Server-Sent Events stream"""
+
+    def test_sync_stream(self):
+        """hello with the generation, then changes, then heartbeats until the lifetime ends"""
+        broadcaster = Broadcaster()
+        stream = iter(ChangeStream(broadcaster, lambda: 7, heartbeat=0.05, max_seconds=0.2))
+
+        assert next(stream).endswith('event: hello\ndata: {"generation": 7}\n\n')
+        broadcaster.publish(make_event("created", 8, [1]))
+        assert next(stream).startswith("id: 8\nevent: created\n")
+        assert next(stream) == HEARTBEAT
+        list(stream)
+        assert broadcaster.stats()["subscribers"] == 0
+
+    def test_async_stream_unsubscribes_when_closed(self):
+        """Closing the async stream (client gone) drops the subscription"""
+        broadcaster = Broadcaster()
+
+        async def consume():
+            stream = ChangeStream(broadcaster, lambda: 0, heartbeat=5, max_seconds=60).__aiter__()
+            await stream.__anext__()
+            broadcaster.publish({"type": "reset"})
+            message = await stream.__anext__()
+            await stream.aclose()
+            return message
+
+        assert asyncio.run(consume()).startswith("event: reset\n")
+        assert broadcaster.stats()["subscribers"] == 0
+
+
+class TestCancelOnDisconnect:
+    """Test cases for the ASGI disconnect watcher"""
+
+    def test_endless_stream_is_cancelled(self):
+        """A streaming app is cancelled once the client disconnects"""
+        cancelled = []
+
+        async def endless(scope, receive, send):
+            assert (await receive())["body"] == b"payload"
+            try:
+                while True:
+                    await send({"type": "http.response.body", "body": b".", "more_body": True})
+                    await asyncio.sleep(0.01)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def run():
+            gone = asyncio.Event()
+            messages = [{"type": "http.request", "body": b"payload", "more_body": False}]
+
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await gone.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                pass
+
+            app = CancelOnDisconnect(endless, path_prefixes=["/events/"])
+            task = asyncio.ensure_future(app({"type": "http", "path": "/events/"}, receive, send))
+            await asyncio.sleep(0.05)
+            gone.set()
+            await asyncio.wait_for(task, 1)
+
+        asyncio.run(run())
+        assert cancelled == [True]
@@ -0,0 +1,120 @@
+import random
+import pytest
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.domain.columnar import ColumnarDataSet
+
+
+def random_items(count, seed=7):
+    """Random products with missing keys, ties, ints and floats mixed"""
+    rng = random.Random(seed)
+    categories = ["Electronics", "Books", "Digital", "Other", "Toys"]
+    items = []
+    for index in range(count):
+        numeric_fields = {}
+        if rng.random() > 0.1:
+            numeric_fields["price"] = rng.choice([rng.randint(0, 50), round(rng.uniform(0, 50), 2)])
+        if rng.random() > 0.1:
+            numeric_fields["quantity"] = rng.randint(0, 20)
+        string_fields = {"name": f"Product {rng.randint(0, count)}"}
+        if rng.random() > 0.1:
+            string_fields["category"] = rng.choice(categories)
+        items.append(DataItem(
+            id=index + 1 if rng.random() > 0.05 else None,
+            numeric_fields=numeric_fields,
+            string_fields=string_fields
+        ))
+    return items
+
+
+class TestColumnarDataSet:
+    """Differential tests: ColumnarDataSet must behave exactly like DataSet"""
+    
+    @pytest.fixture
+    def items(self):
+        return random_items(500)
+    
+    @pytest.fixture
+    def datasets(self, items):
+        return DataSet(items=items), ColumnarDataSet.from_items(items)
+    
+    def test_round_trip(self, datasets):
+        """Materialized rows keep their keys and original value types"""
+        rows, columns = datasets
+        assert columns.to_dict() == rows.to_dict()
+        assert [
+            {key: type(value) for key, value in item.numeric_fields.items()} for item in columns.items
+        ] == [
+            {key: type(value) for key, value in item.numeric_fields.items()} for item in rows.items
+        ]
+    
+    @pytest.mark.parametrize("field,value,operator", [
+        ("id", 100, "eq"), ("id", 100, "neq"), ("id", 100, "gt"), ("id", 100, "lt"),
+        ("id", "abc", "eq"), ("id", None, "eq"), ("id", 100, "contains"),
+        ("price", 25, "eq"), ("price", 25, "neq"), ("price", 25.5, "gt"), ("price", 10, "lt"),
+        ("price", "12", "gt"), ("price", "abc", "gt"), ("price", 10, "contains"),
+        ("quantity", 3, "eq"),
+        ("category", "Books", "eq"), ("category", "Books", "neq"), ("category", 5, "neq"),
+        ("category", "oo", "contains"), ("name", "product 1", "contains"), ("name", 1, "contains"),
+        ("missing", 1, "eq"), ("price", 10, "invalid_op"),
+    ])
+    def test_filter(self, datasets, field, value, operator):
+        """Filter keeps the same rows in the same order"""
+        rows, columns = datasets
+        assert columns.filter(field, value, operator).to_dict() == rows.filter(field, value, operator).to_dict()
+    
+    def test_filter_prefers_numeric_keys(self):
+        """A key present in numeric_fields shadows the string key, like DataSet"""
+        items = [
+            DataItem(id=1, numeric_fields={"code": 7}, string_fields={"code": "seven"}),
+            DataItem(id=2, string_fields={"code": "seven"}),
+        ]
+        rows, columns = DataSet(items=items), ColumnarDataSet.from_items(items)
+        for operator in ("eq", "neq"):
+            assert columns.filter("code", "seven", operator).to_dict() == rows.filter("code", "seven", operator).to_dict()
+    
+    @pytest.mark.parametrize("field", ["id", "price", "quantity", "category", "name", "missing"])
+    @pytest.mark.parametrize("ascending", [True, False])
+    def test_sort(self, datasets, field, ascending):
+        """Sort returns the same rows in the same order, including ties"""
+        rows, columns = datasets
+        assert columns.sort(field, ascending).to_dict() == rows.sort(field, ascending).to_dict()
+    
+    def test_sort_mixed_types_raises_like_dataset(self):
+        """Mixing numeric and string values for one field fails the same way"""
+        items = [DataItem(id=1, numeric_fields={"code": 7}), DataItem(id=2, string_fields={"code": "x"})]
+        with pytest.raises(TypeError):
+            DataSet(items=items).sort("code")
+        with pytest.raises(TypeError):
+            ColumnarDataSet.from_items(items).sort("code")
+    
+    @pytest.mark.parametrize("field", ["price", "quantity", "name", "missing"])
+    @pytest.mark.parametrize("operation", ["sum", "avg", "min", "max", "count", "invalid_op"])
+    def test_aggregate(self, datasets, field, operation):
+        """Aggregates agree with DataSet, with the same result types"""
+        rows, columns = datasets
+        expected = rows.aggregate(field, operation)["result"]
+        result = columns.aggregate(field, operation)["result"]
+        assert type(result) is type(expected)
+        assert result == pytest.approx(expected)
+    
+    @pytest.mark.parametrize("values", [
+        [2 ** 53 + 1, 1, -3],
+        [2 ** 62] * 3,
+        [2 ** 53] * 2048,
+        [10 ** 400, 1],
+    ])
+    def test_large_ints_are_exact(self, values):
+        """Ints float64 cannot hold, or whose sum overflows int64, keep Python's exact results"""
+        items = [DataItem(id=index, numeric_fields={"count": value}) for index, value in enumerate(values)]
+        rows, columns = DataSet(items=items), ColumnarDataSet.from_items(items)
+        for operation in ["sum", "min", "max", "count"]:
+            assert columns.aggregate("count", operation) == rows.aggregate("count", operation)
+        assert columns.sort("count", False).to_dict() == rows.sort("count", False).to_dict()
+        assert columns.to_dict() == rows.to_dict()
+    
+    def test_empty(self):
+        """Empty datasets behave like empty DataSets"""
+        columns = ColumnarDataSet.from_items([])
+        assert len(columns.filter("price", 10)) == 0
+        assert len(columns.sort("price")) == 0
+        assert columns.aggregate("price", "sum") == {"result": None}
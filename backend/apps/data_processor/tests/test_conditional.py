@@ -0,0 +1,91 @@
+import pytest
+from django.test import RequestFactory
+from apps.data_processor.domain.models import DataItem
+from apps.data_processor.infrastructure.repositories import DataEntryRepository
+from apps.data_processor.interfaces.views import AllProductsView, TransformDataView
+
+
+class TestConditionalRequests:
+    """Test cases for ETag / Last-Modified revalidation of read views"""
+
+    @pytest.fixture
+    def repository(self, sqlite_session):
+        """Create a repository over a seeded database"""
+        repository = DataEntryRepository(sqlite_session)
+        repository.create_many([DataItem(numeric_fields={"price": 1.0}, string_fields={"name": "A"})])
+        return repository
+
+    def get(self, session, path, view=None, **headers):
+        """Run a GET request through a view with the given session"""
+        request = RequestFactory().get(path, **headers)
+        request.db_session = session
+        if view is None:
+            return AllProductsView.as_view()(request)
+        return TransformDataView.as_view()(request, transformation_type=view)
+
+    def test_matching_etag_is_not_modified(self, repository):
+        """A repeated poll with the ETag gets an empty 304 without loading rows"""
+        first = self.get(repository.session, "/api/data/products/")
+        assert first.status_code == 200
+        assert "no-cache" in first["Cache-Control"]
+
+        # Loading entries would fail; the validators never touch them
+        repository.session.execute = _only_generation_lookups(repository.session.execute)
+        second = self.get(repository.session, "/api/data/products/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        assert second.status_code == 304
+        assert second["ETag"] == first["ETag"]
+        assert second.content == b""
+
+    def test_if_modified_since_is_not_trusted(self, repository):
+        """
+        Last-Modified has one-second resolution, so a write later in the same
+        second would keep the date; If-Modified-Since alone gets the body
+        """
+        first = self.get(repository.session, "/api/data/products/")
+        repository.create_many([DataItem(numeric_fields={"price": 2.0}, string_fields={"name": "B"})])
+        second = self.get(
+            repository.session, "/api/data/products/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        assert second.status_code == 200
+        assert len(second.data["data"]) == 2
+
+    def test_write_changes_etag(self, repository):
+        """Any write makes the previous ETag stale"""
+        first = self.get(repository.session, "/api/data/products/")
+        repository.create_many([DataItem(numeric_fields={"price": 2.0}, string_fields={"name": "B"})])
+
+        second = self.get(repository.session, "/api/data/products/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        assert second.status_code == 200
+        assert second["ETag"] != first["ETag"]
+        assert len(second.data["data"]) == 2
+
+    def test_etag_depends_on_query(self, repository):
+        """Different parameters get different ETags; their order does not matter"""
+        session = repository.session
+        path = "/api/data/transform/aggregate/"
+        by_sum = self.get(session, f"{path}?field=price&operation=sum", "aggregate")
+        by_max = self.get(session, f"{path}?field=price&operation=max", "aggregate")
+        reordered = self.get(
+            session, f"{path}?operation=sum&field=price", "aggregate", HTTP_IF_NONE_MATCH=by_sum["ETag"]
+        )
+
+        assert by_sum["ETag"] != by_max["ETag"]
+        assert reordered.status_code == 304
+
+    def test_errors_carry_no_validators(self, repository):
+        """Invalid requests are not cacheable"""
+        response = self.get(
+            repository.session, "/api/data/transform/aggregate/?field=price&operation=bogus", "aggregate"
+        )
+        assert response.status_code == 400
+        assert not response.has_header("ETag")
+
+
+def _only_generation_lookups(execute):
+    """Wrap Session.execute so any statement on data_entries fails"""
+    def guarded(statement, *args, **kwargs):
+        assert "data_entries" not in str(statement), "entries were loaded"
+        return execute(statement, *args, **kwargs)
+    return guarded
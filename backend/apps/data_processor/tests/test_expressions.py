@@ -0,0 +1,214 @@
+import random
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+from apps.data_processor.application.cache import make_key
+from apps.data_processor.domain.expressions import (
+    And, Comparison, ExpressionError, MAX_EXPRESSION_NODES, Not, Or,
+    compile_predicate, parse_dsl, parse_expression
+)
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.domain.schemas import FilterExpressionParamsSchema
+from apps.data_processor.infrastructure.queries import compile_expression
+from apps.data_processor.infrastructure.repositories import DataEntryRepository
+from apps.data_processor.infrastructure.models import DataEntry
+
+# Items mixing numeric and string values for the same keys, and missing keys
+ITEMS = [
+    DataItem(id=1, numeric_fields={"price": 40.0, "quantity": 3}, string_fields={"name": "Phone", "category": "Electronics"}),
+    DataItem(id=2, numeric_fields={"price": 400.0, "quantity": 1}, string_fields={"name": "TV", "category": "Electronics"}),
+    DataItem(id=3, numeric_fields={"price": 5.0, "quantity": 0}, string_fields={"name": "Cable", "category": "Electronics"}),
+    DataItem(id=4, numeric_fields={"price": 12.0}, string_fields={"name": "Book", "category": "Books"}),
+    DataItem(id=5, numeric_fields={}, string_fields={"name": "Gift card", "price": "varies"}),
+    DataItem(id=6, numeric_fields={"quantity": 50}, string_fields={"category": "books"}),
+]
+
+# Comparisons covering every operator and type combination DataSet.filter handles
+COMPARISONS = [
+    Comparison(field, operator, value)
+    for field, values in {
+        "price": [12, 40.0, "5", "varies", True],
+        "quantity": [0, 3, "x"],
+        "category": ["Electronics", "Books", "book", 1],
+        "name": ["TV", "ca", "Phone"],
+        "id": [2, 4],
+        "missing": [1, "a"],
+    }.items()
+    for value in values
+    for operator in ("eq", "neq", "gt", "lt", "contains")
+]
+
+
+def random_expression(rng: random.Random, depth: int = 0):
+    """A random boolean expression over COMPARISONS"""
+    roll = rng.random()
+    if depth >= 3 or roll < 0.4:
+        return rng.choice(COMPARISONS)
+    if roll < 0.55:
+        return Not(random_expression(rng, depth + 1))
+    children = tuple(random_expression(rng, depth + 1) for _ in range(rng.randint(2, 3)))
+    return And(children) if roll < 0.8 else Or(children)
+
+
+def expected_ids(expression, dataset: DataSet) -> set:
+    """Ids selected by an expression, by set algebra over DataSet.filter results"""
+    if isinstance(expression, Comparison):
+        return {item.id for item in dataset.filter(expression.field, expression.value, expression.operator).items}
+    if isinstance(expression, Not):
+        return {item.id for item in dataset.items} - expected_ids(expression.child, dataset)
+    results = [expected_ids(child, dataset) for child in expression.children]
+    return set.intersection(*results) if isinstance(expression, And) else set.union(*results)
+
+
+class TestParsing:
+    """Test cases for the query DSL and JSON expression forms"""
+
+    def test_precedence(self):
+        """not binds tighter than and, which binds tighter than or"""
+        expression = parse_dsl('category eq Books or price lt 50 and not quantity = 0')
+        assert expression == Or((
+            Comparison("category", "eq", "Books"),
+            And((Comparison("price", "lt", 50), Not(Comparison("quantity", "eq", 0)))),
+        ))
+
+    def test_parentheses_and_literals(self):
+        """Quoted strings, numbers, booleans and parentheses"""
+        expression = parse_dsl("(name contains 'it\\'s' OR \"price\" > 1.5e1) AND active eq true")
+        assert expression == And((
+            Or((Comparison("name", "contains", "it's"), Comparison("price", "gt", 15.0))),
+            Comparison("active", "eq", True),
+        ))
+
+    def test_json_form(self):
+        """JSON expressions, given as objects or text, parse to the same tree"""
+        data = {"and": [{"field": "category", "value": "Books"}, {"not": {"field": "price", "operator": "gt", "value": 20}}]}
+        expected = And((Comparison("category", "eq", "Books"), Not(Comparison("price", "gt", 20))))
+        assert parse_expression(data) == expected
+        assert parse_expression('{"and": [{"field": "category", "value": "Books"}, '
+                                '{"not": {"field": "price", "operator": "gt", "value": 20}}]}') == expected
+
+    def test_id_values_are_integers(self):
+        """id comparisons coerce their value like FilterParamsSchema"""
+        assert parse_dsl('id eq "7"') == Comparison("id", "eq", 7)
+        with pytest.raises(ExpressionError):
+            parse_dsl("id eq seven")
+        with pytest.raises(ExpressionError):
+            parse_dsl("id eq 1e400")
+
+    @pytest.mark.parametrize("source", [
+        "", "price", "price lt", "price between 1", "price lt 5 and", "(price lt 5", "price lt 5)",
+        "price lt 5 category eq Books", "price ~ 5", '{"and": []}', '{"field": "price"}',
+        '{"field": "price", "value": [1]}', '{"xor": [{"field": "a", "value": 1}]}', "{bad json",
+    ])
+    def test_invalid_expressions(self, source):
+        """Malformed expressions raise ExpressionError"""
+        with pytest.raises(ExpressionError):
+            parse_expression(source)
+
+    def test_size_is_bounded(self):
+        """Oversized expressions are rejected"""
+        source = " or ".join(f"price eq {value}" for value in range(MAX_EXPRESSION_NODES))
+        with pytest.raises(ExpressionError):
+            parse_dsl(source)
+        with pytest.raises(ExpressionError):
+            parse_dsl("not " * (MAX_EXPRESSION_NODES + 1) + "price eq 1")
+
+    def test_str_round_trips(self):
+        """str() of an expression is valid DSL for the same expression"""
+        rng = random.Random(7)
+        for _ in range(200):
+            expression = random_expression(rng)
+            assert parse_dsl(str(expression)) == expression
+
+    def test_schema_reports_validation_errors(self):
+        """The params schema turns parse errors into ValidationError"""
+        assert FilterExpressionParamsSchema(where="price lt 5").where == Comparison("price", "lt", 5)
+        with pytest.raises(ValidationError):
+            FilterExpressionParamsSchema(where="price lt")
+        with pytest.raises(ValidationError):
+            FilterExpressionParamsSchema(where="price lt 5", field="price")
+
+    def test_cache_keys_differ_per_expression(self):
+        """Expressions that differ only in a field get different cache keys"""
+        first = make_key("filter", None, None, {"where": parse_dsl("price eq 5")})
+        second = make_key("filter", None, None, {"where": parse_dsl("quantity eq 5")})
+        assert first != second
+
+
+class TestEvaluation:
+    """Test cases for compiling expressions to predicates and SQL"""
+
+    @pytest.fixture
+    def repository(self, sqlite_session):
+        """Create a repository holding ITEMS"""
+        repository = DataEntryRepository(sqlite_session)
+        repository.create_many(ITEMS)
+        return repository
+
+    @pytest.mark.parametrize("comparison", COMPARISONS, ids=str)
+    def test_predicate_matches_dataset_filter(self, comparison):
+        """A compiled comparison keeps exactly what DataSet.filter keeps"""
+        predicate = compile_predicate(comparison)
+        expected = DataSet(items=ITEMS).filter(comparison.field, comparison.value, comparison.operator)
+        assert [item.id for item in ITEMS if predicate(item)] == [item.id for item in expected.items]
+
+    def test_random_expressions_agree(self, repository):
+        """Predicate, SQL and set algebra over DataSet.filter select the same rows"""
+        rng = random.Random(2024)
+        dataset = DataSet(items=ITEMS)
+        session = repository.session
+        for _ in range(300):
+            expression = random_expression(rng)
+            expected = expected_ids(expression, dataset)
+            predicate = compile_predicate(expression)
+            sql_ids = set(session.execute(select(DataEntry.id).where(compile_expression(expression))).scalars())
+
+            assert {item.id for item in ITEMS if predicate(item)} == expected, str(expression)
+            assert sql_ids == expected, str(expression)
+
+    def test_expression_is_compiled_once(self, repository, monkeypatch):
+        """The WHERE clause is compiled once per request and runs in SQL"""
+        from apps.data_processor.infrastructure import repositories
+
+        calls = []
+
+        def counting_compile(expression):
+            calls.append(expression)
+            return compile_expression(expression)
+
+        monkeypatch.setattr(repositories, "compile_expression", counting_compile)
+        monkeypatch.setattr(repositories, "compile_predicate", lambda expression: pytest.fail("evaluated in memory"))
+        expression = parse_dsl("price lt 50 or color eq red")
+        assert [item.id for item in repository.filter_expression(expression).items] == sorted(
+            expected_ids(expression, DataSet(items=ITEMS))
+        )
+        assert calls == [expression]
+
+    def test_memory_without_json_queries(self, repository, monkeypatch):
+        """Memory only when the database cannot evaluate the expression"""
+        from apps.data_processor.infrastructure import repositories
+
+        expression = parse_dsl("color eq red or not price lt 50")
+        monkeypatch.setattr(repositories, "supports_json_queries", lambda session: False)
+        assert repository.compile_filter_expression(expression) is None
+        assert [item.id for item in repository.filter_expression(expression).items] == sorted(
+            expected_ids(expression, DataSet(items=ITEMS))
+        )
+
+    @pytest.mark.parametrize("source", ["price lt 50 and quantity gt 0", "name contains a or color eq red"])
+    def test_filter_expression(self, repository, source):
+        """Matching items come back in id order"""
+        expression = parse_dsl(source)
+        result = repository.filter_expression(expression)
+        assert [item.id for item in result.items] == sorted(expected_ids(expression, DataSet(items=ITEMS)))
+
+    def test_pages_follow_expression(self, repository):
+        """Keyset pages over an expression cover the whole result once"""
+        expression = parse_dsl("category contains o or price gt 100")
+        ids, after = [], None
+        while True:
+            page, after = repository.get_page(2, where=expression, after=after)
+            ids.extend(item.id for item in page.items)
+            if after is None:
+                break
+        assert ids == sorted(expected_ids(expression, DataSet(items=ITEMS)))
@@ -0,0 +1,119 @@
+import random
+import pytest
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.domain.indexed import IndexedDataSet
+
+FILTERS = [
+    ("id", 40, "eq"), ("id", 40, "neq"), ("id", "40", "gt"), ("id", 40.5, "lt"), ("id", "abc", "eq"),
+    ("id", 40, "contains"),
+    ("price", 25, "eq"), ("price", 25.0, "neq"), ("price", 25.5, "gt"), ("price", "10", "lt"),
+    ("price", "abc", "gt"), ("price", float("nan"), "neq"), ("price", float("nan"), "eq"),
+    ("price", True, "gt"), ("price", 10, "contains"), ("price", 10, "invalid_op"),
+    ("quantity", 3, "eq"), ("quantity", 3, "neq"),
+    ("category", "Books", "eq"), ("category", "Books", "neq"), ("category", 5, "neq"),
+    ("category", "oo", "contains"), ("category", "BOOK", "contains"), ("category", 1, "contains"),
+    ("name", "product 1", "contains"), ("name", "Product 7", "eq"),
+    ("mixed", 5, "gt"), ("mixed", "a", "eq"), ("mixed", "a", "neq"),
+    ("missing", 1, "eq"), ("missing", 1, "neq"),
+]
+
+SORTS = ["id", "price", "quantity", "category", "name", "nan", "missing"]
+
+
+def random_item(rng: random.Random, item_id):
+    """A product with missing keys, ties, ints and floats, and shadowed keys"""
+    numeric_fields = {}
+    string_fields = {"name": f"Product {rng.randint(0, 60)}"}
+    if rng.random() > 0.1:
+        numeric_fields["price"] = rng.choice([rng.randint(0, 50), round(rng.uniform(0, 50), 1)])
+    if rng.random() > 0.1:
+        numeric_fields["quantity"] = rng.randint(0, 5)
+    if rng.random() > 0.1:
+        string_fields["category"] = rng.choice(["Electronics", "Books", "Digital", "Other", "Toys"])
+    if rng.random() < 0.05:
+        numeric_fields["nan"] = rng.choice([float("nan"), 1.0])
+    # Numeric in some items and a string in others; numeric keys shadow string keys
+    if rng.random() < 0.5:
+        numeric_fields["mixed"] = rng.randint(0, 9)
+    if rng.random() < 0.5:
+        string_fields["mixed"] = rng.choice("abc")
+    return DataItem(id=item_id, numeric_fields=numeric_fields, string_fields=string_fields)
+
+
+def assert_same(indexed, dataset, call):
+    """Both raise the same exception type or return equal DataSets"""
+    try:
+        expected = call(dataset)
+    except Exception as e:
+        with pytest.raises(type(e)):
+            call(indexed)
+        return
+    assert call(indexed) == expected
+
+
+class TestIndexedDataSet:
+    """Differential tests: IndexedDataSet must behave exactly like DataSet"""
+
+    @pytest.fixture
+    def items(self):
+        rng = random.Random(5)
+        items = [random_item(rng, item_id) for item_id in rng.sample(range(1, 1000), 300)]
+        items.append(random_item(rng, None))
+        return items
+
+    @pytest.mark.parametrize("field,value,operator", FILTERS)
+    def test_filter(self, items, field, value, operator):
+        """Filters keep the same items in the same order"""
+        indexed = IndexedDataSet(items)
+        assert_same(indexed, DataSet(items=items), lambda data: data.filter(field, value, operator))
+
+    @pytest.mark.parametrize("field", SORTS)
+    @pytest.mark.parametrize("ascending", [True, False])
+    @pytest.mark.parametrize("limit", [None, 0, 7])
+    def test_sort(self, items, field, ascending, limit):
+        """Sorts order items and ties the same way, or raise the same error"""
+        indexed = IndexedDataSet(items)
+        assert_same(indexed, DataSet(items=items), lambda data: data.sort(field, ascending, limit=limit))
+
+    def test_incremental_updates(self):
+        """Appends and removals keep every index equal to a fresh scan"""
+        rng = random.Random(9)
+        indexed = IndexedDataSet([random_item(rng, item_id) for item_id in range(1, 50)])
+        indexed.index_substrings("name")
+        # Warm the sorted value orders so later appends maintain them
+        indexed.sort("category")
+        next_id = 50
+        for step in range(400):
+            if rng.random() < 0.55 or not len(indexed):
+                indexed.append(random_item(rng, next_id))
+                next_id += 1
+            else:
+                removed = indexed.remove(rng.choice([item.id for item in indexed.items]))
+                assert indexed.get(removed.id) is None
+            if step % 20:
+                continue
+            dataset = DataSet(items=indexed.items)
+            for field, value, operator in FILTERS:
+                assert_same(indexed, dataset, lambda data: data.filter(field, value, operator))
+            for field in SORTS:
+                for ascending in (True, False):
+                    assert_same(indexed, dataset, lambda data: data.sort(field, ascending, limit=10))
+
+    def test_id_map(self, items):
+        """Items are found and removed by id; ids are unique"""
+        indexed = IndexedDataSet(items)
+        target = items[10]
+        assert indexed.get(target.id) is target
+        assert indexed.remove(target.id) is target
+        assert len(indexed) == len(items) - 1
+        with pytest.raises(KeyError):
+            indexed.remove(target.id)
+        with pytest.raises(ValueError):
+            indexed.append(DataItem(id=items[0].id))
+
+    def test_substring_index(self, items):
+        """contains through the trigram index matches the scan"""
+        indexed = IndexedDataSet(items)
+        indexed.index_substrings("category")
+        for value in ("oo", "elec", "BOOKS", "", 3):
+            assert indexed.filter("category", value, "contains") == DataSet(items=items).filter("category", value, "contains")
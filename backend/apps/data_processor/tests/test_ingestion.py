@@ -0,0 +1,73 @@
+import pytest
+from pydantic import ValidationError
+from apps.data_processor.application.ingestion import IngestionPipeline, IngestionStats
+from apps.data_processor.application.services import DataProcessingService
+from apps.data_processor.domain.schemas import DataItemSchema, DataSetSchema
+
+
+class TestIngestionPipeline:
+    """Test cases for the single-pass ingestion pipeline"""
+
+    @pytest.fixture
+    def pipeline(self, sqlite_session):
+        """Create a pipeline with its own counters"""
+        return IngestionPipeline(sqlite_session, stats=IngestionStats())
+
+    def test_ingest_matches_schema_conversion(self, pipeline):
+        """Stored rows match what DataItemSchema.to_domain would produce"""
+        records = [
+            {"name": "Product A", "price": "10.5", "quantity": 3, "category": "Books"},
+            {"name": "Product B", "numeric_fields": {"weight": 2}, "string_fields": {"color": "red"}},
+        ]
+
+        result = pipeline.ingest(records)
+
+        expected = [DataItemSchema.parse_obj(record).to_domain().to_dict() for record in records]
+        assert [{key: value for key, value in row.items() if key != "id"} for row in result] == expected
+        assert [row["id"] for row in result] == [1, 2]
+
+    def test_each_record_is_validated_once(self, pipeline, monkeypatch):
+        """The pipeline validates every record exactly once"""
+        from apps.data_processor.application import ingestion
+        calls = []
+        validate_item = ingestion.validate_item
+        monkeypatch.setattr(ingestion, "validate_item", lambda record: calls.append(record) or validate_item(record))
+
+        pipeline.ingest([{"name": "A", "price": 1}, {"name": "B", "price": 2}])
+
+        assert len(calls) == 2
+
+    def test_validation_errors_match_dataset_schema(self, pipeline):
+        """Errors of every invalid record are reported under ("items", index)"""
+        records = [{"name": "A", "price": "x"}, {"name": "B"}, {"name": "C", "numeric_fields": {"a": "b"}}]
+
+        with pytest.raises(ValidationError) as pipeline_error:
+            pipeline.validate(records)
+        with pytest.raises(ValidationError) as schema_error:
+            DataSetSchema(items=records)
+
+        assert pipeline_error.value.errors() == schema_error.value.errors()
+
+    def test_stage_counters(self, pipeline):
+        """Each stage records its calls, items and time"""
+        pipeline.ingest([{"name": "A"}, {"name": "B"}])
+        with pipeline.stats.stage("parse") as timing:
+            timing["items"] = 5
+
+        stages = pipeline.stats.snapshot()
+        assert list(stages) == ["parse", "validate", "insert", "serialize"]
+        assert stages["validate"]["calls"] == 1
+        assert stages["validate"]["items"] == 2
+        assert stages["parse"]["items"] == 5
+        assert all(values["seconds"] >= 0 for values in stages.values())
+
+        pipeline.stats.reset()
+        assert pipeline.stats.snapshot() == {}
+
+    def test_process_data_skips_unnamed_items(self, sqlite_session):
+        """The service still skips items without a name"""
+        service = DataProcessingService(sqlite_session)
+
+        result = service.process_data([{"price": 1}, {"name": "Named", "price": 2}])
+
+        assert result == [{"id": 1, "price": 2.0, "name": "Named"}]
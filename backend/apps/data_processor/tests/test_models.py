@@ -1,5 +1,5 @@
 import pytest
-from apps.data_processor.domain.models import DataItem, DataSet, TransformationType
+from apps.data_processor.domain.models import DataItem, DataSet, TransformationType, top_k
 
 class TestDataItem:
     """Test cases for DataItem domain model"""
@@ -253,6 +253,21 @@ class TestDataSet:
         # Item with ID 5 should be excluded (no price field)
         assert 5 not in [item.id for item in result.items if item.id is not None]
     
+    @pytest.mark.parametrize("field", ["id", "price", "quantity", "name", "category", "non_existent"])
+    @pytest.mark.parametrize("ascending", [True, False])
+    @pytest.mark.parametrize("limit", [0, 1, 2, 5, 10])
+    def test_sort_with_limit(self, dataset, field, ascending, limit):
+        """A limited sort returns the head of the full sort, ties in the same order"""
+        expected = dataset.sort(field, ascending).items[:limit]
+        assert dataset.sort(field, ascending, limit=limit).items == expected
+    
+    def test_top_k_consumes_a_stream(self, sample_items):
+        """top_k selects from any iterable without materializing it"""
+        stream = (item for item in sample_items)
+        result = top_k(stream, "quantity", 2, ascending=False)
+        assert [item.numeric_fields["quantity"] for item in result] == [10, 5]
+        assert next(stream, None) is None
+    
     def test_aggregate_sum(self, dataset):
         """Test sum aggregation"""
         result = dataset.aggregate("price", "sum")
@@ -312,6 +327,28 @@ class TestDataSet:
         result = empty_dataset.aggregate("price", "sum")
         assert result["result"] is None
     
+    def test_group_aggregate(self, dataset):
+        """Test group-by aggregation of several fields and operations"""
+        operations = ["sum", "avg", "min", "max", "count"]
+        groups = dataset.group_aggregate("category", ["price", "quantity"], operations)
+        
+        assert [group["group"] for group in groups] == ["Books", "Digital", "Electronics", "Other"]
+        for group in groups:
+            members = dataset.filter("category", group["group"])
+            for field in ("price", "quantity"):
+                for operation in operations:
+                    assert group["results"][field][operation] == members.aggregate(field, operation)["result"]
+        
+        # Groups without any value for a field report None
+        other = groups[-1]["results"]["price"]
+        assert other["count"] == 1
+        assert groups[0]["results"]["price"]["sum"] == 5.99
+    
+    def test_group_aggregate_missing_group_key(self, dataset):
+        """Test that items without the group key form a trailing None group"""
+        groups = dataset.group_aggregate("brand", ["price"], ["count"])
+        assert groups == [{"group": None, "results": {"price": {"count": 5}}}]
+    
     def test_to_dict(self, dataset):
         """Test converting dataset to list of dictionaries"""
         result = dataset.to_dict()
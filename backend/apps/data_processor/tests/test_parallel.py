@@ -0,0 +1,112 @@
+import random
+import pytest
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.domain.parallel import ParallelDataSet, shutdown_executor
+
+FILTERS = [
+    ("id", 40, "eq"), ("id", 40, "neq"), ("id", "40", "gt"), ("id", 40.5, "lt"), ("id", "abc", "eq"),
+    ("price", 25, "eq"), ("price", 25.0, "neq"), ("price", 25.5, "gt"), ("price", "10", "lt"),
+    ("price", "abc", "gt"), ("price", float("nan"), "neq"), ("price", 10, "contains"),
+    ("category", "Books", "eq"), ("category", "Books", "neq"), ("category", 5, "neq"),
+    ("category", "oo", "contains"), ("category", "BOOK", "contains"), ("category", 1, "contains"),
+    ("name", "product 1", "contains"), ("name", "Produkt ß", "eq"), ("name", "SS", "contains"),
+    ("mixed", 5, "gt"), ("mixed", "a", "eq"), ("mixed", "a", "neq"),
+    ("nan", 0.5, "gt"), ("missing", 1, "eq"), ("missing", 1, "neq"),
+]
+
+AGGREGATES = ["sum", "avg", "min", "max", "count", "stats"]
+
+
+def random_item(rng: random.Random, item_id):
+    """A product with missing keys, ties, ints and floats, non-ASCII strings and shadowed keys"""
+    numeric_fields = {}
+    string_fields = {"name": rng.choice([f"Product {rng.randint(0, 60)}", "Produkt ß", "Café"])}
+    if rng.random() > 0.1:
+        numeric_fields["price"] = rng.choice([rng.randint(0, 50), round(rng.uniform(0, 50), 1)])
+    if rng.random() > 0.1:
+        numeric_fields["quantity"] = rng.randint(0, 5)
+    if rng.random() > 0.1:
+        string_fields["category"] = rng.choice(["Electronics", "Books", "Digital", "Other", "Toys"])
+    if rng.random() < 0.05:
+        numeric_fields["nan"] = rng.choice([float("nan"), 1.0])
+    if rng.random() < 0.5:
+        numeric_fields["mixed"] = rng.randint(0, 9)
+    if rng.random() < 0.5:
+        string_fields["mixed"] = rng.choice("abc")
+    return DataItem(id=item_id, numeric_fields=numeric_fields, string_fields=string_fields)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def executor():
+    """Share one pool across the module and stop it afterwards"""
+    yield
+    shutdown_executor()
+
+
+class TestParallelDataSet:
+    """Differential tests: ParallelDataSet must return what DataSet returns"""
+
+    @pytest.fixture(scope="class")
+    def items(self):
+        rng = random.Random(7)
+        items = [random_item(rng, item_id) for item_id in rng.sample(range(1, 2000), 500)]
+        items.insert(250, random_item(rng, None))
+        return items
+
+    @pytest.fixture(scope="class")
+    def parallel(self, items):
+        with ParallelDataSet(items, workers=3, threshold=0) as parallel:
+            assert parallel.is_parallel
+            yield parallel
+
+    @pytest.mark.parametrize("field,value,operator", FILTERS)
+    def test_filter(self, items, parallel, field, value, operator):
+        """Filters keep the same items in the same order"""
+        assert parallel.filter(field, value, operator) == DataSet(items=items).filter(field, value, operator)
+
+    @pytest.mark.parametrize("field", ["price", "quantity", "mixed", "nan", "missing"])
+    @pytest.mark.parametrize("operation", AGGREGATES)
+    def test_aggregate(self, items, parallel, field, operation):
+        """Partials combine to DataSet's result, with the original type of min/max"""
+        expected = DataSet(items=items).aggregate(field, operation)["result"]
+        actual = parallel.aggregate(field, operation)["result"]
+        if isinstance(expected, float) and operation in ("sum", "avg"):
+            assert actual == pytest.approx(expected, nan_ok=True)
+        else:
+            # repr tells 1 from 1.0 and matches NaN
+            assert repr(actual) == repr(expected)
+
+    def test_first_extreme_wins_ties(self):
+        """min/max report the first extreme across partitions, like min()/max()"""
+        items = [DataItem(id=index, numeric_fields={"price": 1.0 if index % 2 else 1}) for index in range(1, 9)]
+        with ParallelDataSet(items, workers=4, threshold=0) as parallel:
+            assert type(parallel.aggregate("price", "min")["result"]) is float
+            assert type(parallel.aggregate("price", "max")["result"]) is float
+
+    def test_large_int_sums_are_exact(self):
+        """Partition sums of ints do not wrap around int64"""
+        items = [DataItem(id=index, numeric_fields={"count": 2 ** 53}) for index in range(4096)]
+        items.append(DataItem(id=4096, numeric_fields={"count": 2 ** 60 + 1}))
+        with ParallelDataSet(items[:-1], workers=2, threshold=0) as parallel:
+            assert parallel.aggregate("count", "sum") == {"result": 2 ** 65}
+        with ParallelDataSet(items, workers=2, threshold=0) as parallel:
+            assert parallel.aggregate("count", "sum") == DataSet(items=items).aggregate("count", "sum")
+
+    def test_fallbacks(self):
+        """Small datasets, bools and non-string values run on the DataSet"""
+        items = [DataItem(id=index, numeric_fields={"flag": index % 2 == 0}) for index in range(10)]
+        assert not ParallelDataSet(items, workers=2).is_parallel
+        assert not ParallelDataSet(items, workers=1, threshold=0).is_parallel
+        with ParallelDataSet(items, workers=2, threshold=0) as parallel:
+            assert parallel.aggregate("flag", "sum") == {"result": 5}
+            assert parallel.aggregate("flag", "max") == {"result": True}
+        items.append(DataItem(id=10, string_fields={"code": 5}))
+        assert not ParallelDataSet(items, workers=2, threshold=0).is_parallel
+
+    def test_close(self, items):
+        """Closing releases the shared memory and later calls run in-process"""
+        parallel = ParallelDataSet(items, workers=2, threshold=0)
+        expected = parallel.filter("category", "Books")
+        parallel.close()
+        assert not parallel.is_parallel
+        assert parallel.filter("category", "Books") == expected
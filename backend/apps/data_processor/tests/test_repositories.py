@@ -0,0 +1,520 @@
+import pytest
+from sqlalchemy import select
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.infrastructure.repositories import DataEntryRepository
+
+
+class TestDataEntryRepository:
+    """Test cases for the SQL-backed repository paths"""
+    
+    @pytest.fixture
+    def repository(self, sqlite_session):
+        """Create a repository populated with sample products"""
+        repository = DataEntryRepository(sqlite_session)
+        repository.create_many([
+            DataItem(numeric_fields={"price": 10.99, "quantity": 5},
+                     string_fields={"name": "Product A", "category": "Electronics"}),
+            DataItem(numeric_fields={"price": 5.99, "quantity": 10},
+                     string_fields={"name": "Product B", "category": "Books"}),
+            DataItem(numeric_fields={"price": 15.99, "quantity": 2},
+                     string_fields={"name": "Product C", "category": "Electronics"}),
+            DataItem(numeric_fields={"price": 0, "quantity": 0},
+                     string_fields={"name": "Free Product", "category": "Digital"}),
+            DataItem(numeric_fields={"quantity": 1},
+                     string_fields={"name": "Incomplete 100% Product", "category": "Other"}),
+            DataItem(numeric_fields={"price": 100, "quantity": 1, "name": 7},
+                     string_fields={"name": "Shadowed", "category": "Other"}),
+        ])
+        return repository
+    
+    @pytest.mark.parametrize("field,value,operator", [
+        ("id", 3, "eq"),
+        ("id", 3, "neq"),
+        ("id", 3, "gt"),
+        ("id", 3, "lt"),
+        ("id", "x", "eq"),
+        ("price", 10.99, "eq"),
+        ("price", 10.99, "neq"),
+        ("price", 10, "gt"),
+        ("price", 10, "lt"),
+        ("price", 0, "eq"),
+        ("price", "abc", "eq"),
+        ("price", 10, "contains"),
+        ("category", "Electronics", "eq"),
+        ("category", "Electronics", "neq"),
+        ("category", 5, "eq"),
+        ("category", 5, "neq"),
+        ("name", "product", "contains"),
+        ("name", "100%", "contains"),
+        ("name", "Shadowed", "eq"),
+        ("name", 7, "eq"),
+        ("non_existent", 10, "eq"),
+        ("price", 10, "invalid_op"),
+    ])
+    def test_filter_matches_in_memory(self, repository, field, value, operator):
+        """SQL filtering returns the same rows as DataSet.filter"""
+        expected = repository.get_all_as_domain().filter(field, value, operator)
+        result = repository.filter_as_domain(field, value, operator)
+        assert [item.id for item in result.items] == [item.id for item in expected.items]
+    
+    def test_filter_by_field(self, repository):
+        """filter_by_field delegates to the SQL path"""
+        result = repository.filter_by_field("category", "Other")
+        assert isinstance(result, DataSet)
+        assert [item.string_fields["name"] for item in result.items] == [
+            "Incomplete 100% Product", "Shadowed"
+        ]
+
+    
+    @pytest.mark.parametrize("field", ["price", "quantity", "name", "missing"])
+    @pytest.mark.parametrize("operation", ["sum", "avg", "min", "max", "count"])
+    def test_aggregate_matches_in_memory(self, repository, field, operation, monkeypatch):
+        """SQL aggregation returns the same result as DataSet.aggregate, ints for int sums"""
+        from apps.data_processor.infrastructure import summaries
+        
+        # Answer from the query rather than the summary rows
+        monkeypatch.setattr(summaries, "get_summary_fields", lambda: ())
+        expected = repository.get_all_as_domain().aggregate(field, operation)["result"]
+        result = repository.aggregate(field, operation)["result"]
+        if expected is None:
+            assert result is None
+        else:
+            assert result == pytest.approx(expected)
+            if operation != "avg":
+                assert type(result) is type(expected)
+    
+    def test_aggregate_result_keeps_int_sums(self):
+        """PostgreSQL's numeric sums of ints have scale 0; sums with a float in them do not"""
+        from decimal import Decimal
+        from apps.data_processor.infrastructure.queries import aggregate_result
+        assert type(aggregate_result("sum", Decimal("17"))) is int
+        assert aggregate_result("sum", Decimal("17")) == 17
+        assert type(aggregate_result("sum", Decimal("17.0"))) is float
+        assert aggregate_result("sum", Decimal("3.5")) == 3.5
+        assert type(aggregate_result("avg", Decimal("17"))) is float
+        assert aggregate_result("sum", Decimal("NaN")) != aggregate_result("sum", Decimal("NaN"))
+    
+    @pytest.mark.parametrize("field", ["id", "price", "quantity", "name", "category", "missing"])
+    @pytest.mark.parametrize("operation", ["approx_distinct", "approx_percentile"])
+    def test_approximate_aggregate_matches_in_memory(self, repository, field, operation):
+        """Sketches over streamed SQL values agree with DataSet.aggregate"""
+        expected = repository.get_all_as_domain().aggregate(field, operation, 75)["result"]
+        assert repository.aggregate(field, operation, 75)["result"] == expected
+    
+    @pytest.mark.parametrize("field", ["price", "quantity", "name", "missing"])
+    @pytest.mark.parametrize("options", [
+        {"operation": "stats"},
+        {"operation": "histogram"},
+        {"operation": "histogram", "bins": 4, "lower": 1.0, "upper": 11.0},
+        {"operation": "histogram", "bins": 3, "lower": 1000.0, "upper": 2000.0},
+    ])
+    def test_statistics_match_in_memory(self, repository, field, options):
+        """stats and histogram queries return the same result as DataSet.aggregate"""
+        expected = repository.get_all_as_domain().aggregate(field, **options)["result"]
+        result = repository.aggregate(field, **options)["result"]
+        if expected is None:
+            assert result is None
+        else:
+            assert result == pytest.approx(expected)
+        if options["operation"] == "stats" and expected is not None:
+            assert type(result["sum"]) is type(expected["sum"])
+    
+    @pytest.mark.parametrize("field", ["price", "missing"])
+    def test_histogram_with_range_runs_one_query(self, repository, field, monkeypatch):
+        """With both bounds given, the GROUP BY alone also detects a field without values"""
+        statements = []
+        execute = repository.session.execute
+        monkeypatch.setattr(repository.session, "execute", lambda statement, *args, **kwargs: (
+            statements.append(statement), execute(statement, *args, **kwargs)
+        )[1])
+        result = repository.aggregate(field, "histogram", bins=2, lower=0.0, upper=1.0)["result"]
+        assert len(statements) == 1
+        assert (result is None) == (field == "missing")
+    
+    @pytest.mark.parametrize("group_by", ["category", "name", "missing"])
+    def test_group_aggregate_matches_in_memory(self, repository, group_by):
+        """One GROUP BY query returns the same groups and statistics as DataSet.group_aggregate"""
+        fields, operations = ["price", "quantity"], ["sum", "avg", "min", "max", "count"]
+        expected = repository.get_all_as_domain().group_aggregate(group_by, fields, operations)
+        result = repository.group_aggregate(group_by, fields, operations)
+        
+        assert [group["group"] for group in result] == [group["group"] for group in expected]
+        for group, expected_group in zip(result, expected):
+            for field in fields:
+                for operation in operations:
+                    expected_value = expected_group["results"][field][operation]
+                    if expected_value is None:
+                        assert group["results"][field][operation] is None
+                    else:
+                        assert group["results"][field][operation] == pytest.approx(expected_value)
+    
+    def walk_pages(self, fetch_page, limit):
+        """Follow keyset positions until the last page and collect the ids"""
+        ids, after = [], None
+        while True:
+            page, after = fetch_page(limit, after)
+            assert len(page.items) <= limit
+            ids.extend(item.id for item in page.items)
+            if after is None:
+                return ids
+    
+    @pytest.mark.parametrize("sort_field,ascending", [
+        (None, True), ("id", False), ("price", True), ("price", False),
+        ("quantity", True), ("quantity", False), ("category", True), ("category", False),
+    ])
+    @pytest.mark.parametrize("limit", [1, 2, 4, 10])
+    def test_keyset_pages_match_sort(self, repository, sort_field, ascending, limit):
+        """Concatenated keyset pages equal the fully sorted result, in SQL and in memory"""
+        expected = [item.id for item in repository.get_all_as_domain().sort(sort_field or "id", ascending).items]
+        
+        def fetch_sql(limit, after):
+            return repository.get_page(limit, sort_field=sort_field, ascending=ascending, after=after)
+        
+        def fetch_memory(limit, after):
+            return repository._get_page_in_memory(limit, None, sort_field, ascending, after)
+        
+        assert self.walk_pages(fetch_sql, limit) == expected
+        assert self.walk_pages(fetch_memory, limit) == expected
+    
+    def test_keyset_pages_with_filter(self, repository):
+        """Filtered pages walk the matching rows in id order"""
+        expected = [item.id for item in repository.filter_as_domain("category", "Electronics", "neq").items]
+        
+        def fetch(limit, after):
+            return repository.get_page(limit, filter_params=("category", "Electronics", "neq"), after=after)
+        
+        assert self.walk_pages(fetch, 2) == expected
+    
+    @pytest.mark.parametrize("sort_field,ascending", [(None, True), ("id", False), ("price", False), ("category", True)])
+    def test_in_memory_pages_with_filters(self, repository, sort_field, ascending):
+        """Streamed in-memory pages filter and order rows like SQL pages"""
+        from apps.data_processor.domain.expressions import parse_dsl
+        where = parse_dsl("quantity lt 6 or category eq Books")
+        for filter_params, expression in [(("category", "Electronics", "neq"), None), (None, where),
+                                          (("id", "2", "gt"), where)]:
+            def fetch_sql(limit, after):
+                return repository.get_page(limit, filter_params, sort_field, ascending, after, expression)
+            
+            def fetch_memory(limit, after):
+                return repository._get_page_in_memory(limit, filter_params, sort_field, ascending, after, expression)
+            
+            assert self.walk_pages(fetch_memory, 2) == self.walk_pages(fetch_sql, 2)
+    
+    def test_service_cursor_round_trip(self, sqlite_session, repository):
+        """Cursors returned by the service resume where the previous page stopped"""
+        from apps.data_processor.application.services import DataProcessingService
+        from shared.utils.pagination import InvalidCursorError
+        service = DataProcessingService(sqlite_session)
+        
+        first = service.transform_data("sort", limit=4, field="price", ascending=False)
+        second = service.transform_data("sort", limit=4, cursor=first["next_cursor"], field="price", ascending=False)
+        prices = [item["price"] for item in first["data"] + second["data"]]
+        assert prices == [100, 15.99, 10.99, 5.99, 0]
+        assert second["next_cursor"] is None
+        
+        # A cursor is only valid for the query it was issued for
+        with pytest.raises(InvalidCursorError):
+            service.transform_data("sort", limit=4, cursor=first["next_cursor"], field="price", ascending=True)
+        with pytest.raises(InvalidCursorError):
+            service.get_products(limit=4, cursor="not-a-cursor")
+    
+    @pytest.mark.parametrize("position", [
+        None, 5, "abc", [1, 2], {}, {"key": 1}, {"key": 1, "id": 2, "extra": 3}, {"key": 1, "id": "2"},
+        {"key": 1, "id": 2.5}, {"key": 1, "id": True}, {"key": [1], "id": 2}, {"key": None, "id": 2},
+        {"key": {"a": 1}, "id": 2}, {"key": 1, "id": 2 ** 63},
+    ])
+    def test_cursor_position_is_validated(self, sqlite_session, repository, position):
+        """A cursor for the right query but with a malformed position is an invalid cursor"""
+        from apps.data_processor.application.services import DataProcessingService
+        from shared.utils.pagination import InvalidCursorError, encode_cursor
+        service = DataProcessingService(sqlite_session)
+        
+        scope = {"transformation": "sort", "field": "price", "ascending": True}
+        with pytest.raises(InvalidCursorError):
+            service.transform_data("sort", limit=2, cursor=encode_cursor(position, scope), field="price", ascending=True)
+
+    
+    def test_iter_domain_streams_as_ndjson(self, repository):
+        """Streaming rows yields the same products as loading them all, and releases the session"""
+        import json
+        from apps.data_processor.interfaces.ndjson import stream_ndjson
+        closed = []
+        
+        chunks = list(stream_ndjson(repository.iter_domain(batch_size=2), on_close=lambda: closed.append(True)))
+        lines = b"".join(chunks).decode("utf-8").splitlines()
+        
+        assert [json.loads(line) for line in lines] == repository.get_all_as_domain().to_dict()
+        assert closed == [True]
+    
+    def test_create_many_returns_ids_in_order(self, repository):
+        """Bulk inserts return stored entries in input order, keeping client-supplied ids"""
+        entries = repository.create_many([
+            DataItem(numeric_fields={"price": 1}, string_fields={"name": "First"}),
+            DataItem(id=500, numeric_fields={"price": 2}, string_fields={"name": "Second"}),
+            DataItem(numeric_fields={"price": 3}, string_fields={"name": "Third"}),
+        ])
+        
+        assert [entry.string_fields["name"] for entry in entries] == ["First", "Second", "Third"]
+        assert entries[1].id == 500
+        assert all(entry.created_at is not None for entry in entries)
+        stored = {item.id: item.to_dict() for item in repository.get_all_as_domain().items}
+        assert [stored[entry.id] for entry in entries] == [entry.to_domain().to_dict() for entry in entries]
+    
+    def test_create_many_does_not_refresh_rows(self, sqlite_session, repository):
+        """Bulk inserts do not read each row back with a SELECT"""
+        from sqlalchemy import event
+        statements = []
+        engine = sqlite_session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            counts = []
+            for rows in (10, 200):
+                statements.clear()
+                repository.create_many([DataItem(numeric_fields={"price": i}) for i in range(rows)])
+                counts.append(sum(statement.startswith("SELECT") for statement in statements))
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        
+        assert counts[0] == counts[1]
+
+
+class TestSchema:
+    """Test cases for schema upgrades and index declarations"""
+    
+    def test_is_indexed(self):
+        """Declared keys and id are reported as indexed"""
+        from apps.data_processor.infrastructure.schema import is_indexed
+        assert is_indexed("id") is True
+        assert is_indexed("price") is True
+        assert is_indexed("category") is True
+        assert is_indexed("non_existent") is False
+    
+    def test_upgrade_schema_is_idempotent(self, sqlite_session):
+        """Upgrading twice leaves a usable table behind"""
+        from apps.data_processor.infrastructure.schema import upgrade_schema
+        engine = sqlite_session.get_bind()
+        upgrade_schema(engine)
+        upgrade_schema(engine)
+        
+        repository = DataEntryRepository(sqlite_session)
+        repository.create_many([DataItem(numeric_fields={"price": 1.5}, string_fields={"name": "A"})])
+        assert len(repository.filter_as_domain("price", 1, "gt").items) == 1
+    
+    def test_upgrade_adds_generation_column(self):
+        """Tables created before delta sync get the generation column"""
+        from sqlalchemy import create_engine, inspect, text
+        from apps.data_processor.infrastructure.schema import upgrade_schema
+        engine = create_engine("sqlite://")
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE data_entries (id INTEGER PRIMARY KEY, created_at DATETIME NOT NULL, "
+                "updated_at DATETIME NOT NULL, numeric_fields JSON NOT NULL, string_fields JSON NOT NULL)"
+            ))
+        
+        upgrade_schema(engine)
+        
+        assert "generation" in {column["name"] for column in inspect(engine).get_columns("data_entries")}
+        assert "ix_data_entries_generation" in {index["name"] for index in inspect(engine).get_indexes("data_entries")}
+    
+    def test_upgrade_rebuilds_inexact_summaries(self):
+        """Summaries kept before exact totals get the column and are rebuilt from the entries"""
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.orm import Session
+        from apps.data_processor.infrastructure.schema import upgrade_schema
+        engine = create_engine("sqlite://")
+        upgrade_schema(engine)
+        with Session(engine) as session:
+            DataEntryRepository(session).create_many([
+                DataItem(numeric_fields={"price": 0.1}), DataItem(numeric_fields={"price": 0.2})
+            ])
+            session.commit()
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE data_entry_summaries DROP COLUMN exact_total"))
+            connection.execute(text("UPDATE data_entry_summaries SET total = 99"))
+        
+        upgrade_schema(engine)
+        
+        with Session(engine) as session:
+            assert DataEntryRepository(session).summaries.aggregate("price", "sum") == {"result": 0.30000000000000004}
+
+
+class TestDeltaSync:
+    """Test cases for changes since a generation watermark"""
+    
+    @pytest.fixture
+    def repository(self, sqlite_session):
+        """Create a repository with one committed batch"""
+        repository = DataEntryRepository(sqlite_session)
+        repository.create_many([
+            DataItem(numeric_fields={"price": 1.0}, string_fields={"name": "A"}),
+            DataItem(numeric_fields={"price": 2.0}, string_fields={"name": "B"}),
+        ])
+        return repository
+    
+    def test_changes_since_watermark(self, repository):
+        """Only rows written and ids deleted after the watermark are returned"""
+        watermark, _, _ = repository.changes_since(0)
+        created = repository.create_many([DataItem(numeric_fields={"price": 3.0}, string_fields={"name": "C"})])
+        repository.update(1, {"numeric_fields": {"price": 5.0}})
+        repository.delete(2)
+        
+        new_watermark, changed, deleted = repository.changes_since(watermark)
+        
+        assert new_watermark == watermark + 3
+        assert [(item.id, item.numeric_fields["price"]) for item in changed] == [(1, 5.0), (created[0].id, 3.0)]
+        assert deleted == [2]
+        assert repository.changes_since(new_watermark) == (new_watermark, [], [])
+    
+    def test_recreated_id_is_not_deleted(self, repository):
+        """An id deleted and stored again is reported as changed only"""
+        watermark, _, _ = repository.changes_since(0)
+        repository.delete(2)
+        repository.create_many([DataItem(id=2, numeric_fields={"price": 4.0}, string_fields={"name": "B"})])
+        
+        _, changed, deleted = repository.changes_since(watermark)
+        
+        assert [item.id for item in changed] == [2]
+        assert deleted == []
+    
+    def test_unknown_watermark_requires_reset(self, repository):
+        """A watermark ahead of the dataset asks for a full resync"""
+        watermark, changed, _ = repository.changes_since(100)
+        assert watermark == 1
+        assert changed is None
+    
+    def test_tombstones_are_pruned_after_retention(self, sqlite_session, repository, settings):
+        """Deletes prune tombstones older than the retention and older watermarks must resync"""
+        from apps.data_processor.application.services import DataProcessingService
+        from apps.data_processor.infrastructure.models import DataEntryTombstone
+        settings.TOMBSTONE_RETENTION_GENERATIONS = 2
+        watermark, _, _ = repository.changes_since(0)
+        repository.delete(1)
+        recent, _, _ = repository.changes_since(0)
+        repository.create_many([DataItem(numeric_fields={"price": 3.0}, string_fields={"name": "C"})])
+        repository.delete(2)
+        
+        tombstones = sqlite_session.execute(select(DataEntryTombstone.entry_id)).scalars().all()
+        assert tombstones == [2]
+        assert repository.changes_since(watermark)[1] is None
+        assert repository.changes_since(recent)[2] == [2]
+        
+        service = DataProcessingService(sqlite_session)
+        result = service.get_changes(watermark)
+        assert (result["reset"], [row["name"] for row in result["data"]]) == (True, ["C"])
+        result = service.get_changes(recent)
+        assert (result["reset"], result["deleted"]) == (False, [2])
+    
+    def test_service_full_sync(self, sqlite_session, repository):
+        """Watermark 0 returns every product and the current watermark"""
+        from apps.data_processor.application.services import DataProcessingService
+        result = DataProcessingService(sqlite_session).get_changes(0)
+        assert [row["name"] for row in result["data"]] == ["A", "B"]
+        assert (result["watermark"], result["reset"], result["deleted"]) == (1, True, [])
+
+
+class TestAggregateSummaryStore:
+    """Test cases for the incrementally maintained aggregate summaries"""
+    
+    OPERATIONS = ["sum", "avg", "min", "max", "count"]
+    
+    @pytest.fixture
+    def repository(self, sqlite_session):
+        repository = DataEntryRepository(sqlite_session)
+        repository.create_many([
+            DataItem(numeric_fields={"price": 10.0, "quantity": 5}, string_fields={"name": "A", "category": "Books"}),
+            DataItem(numeric_fields={"price": 2.5, "quantity": 1}, string_fields={"name": "B", "category": "Books"}),
+            DataItem(numeric_fields={"price": 40.0}, string_fields={"name": "C", "category": "Toys"}),
+        ])
+        repository.create_many([
+            DataItem(numeric_fields={"quantity": 7}, string_fields={"name": "D"}),
+        ])
+        return repository
+    
+    def assert_matches_scan(self, repository):
+        """Summary answers equal a full recomputation over the current rows"""
+        dataset = repository.get_all_as_domain()
+        for field in ("price", "quantity"):
+            for operation in self.OPERATIONS:
+                summary = repository.summaries.aggregate(field, operation)["result"]
+                expected = dataset.aggregate(field, operation)["result"]
+                assert summary == (pytest.approx(expected) if expected is not None else None)
+        
+        groups = repository.summaries.group_aggregate("category", ["price", "quantity"], self.OPERATIONS)
+        expected_groups = dataset.group_aggregate("category", ["price", "quantity"], self.OPERATIONS)
+        assert [group["group"] for group in groups] == [group["group"] for group in expected_groups]
+        for group, expected_group in zip(groups, expected_groups):
+            for field, results in expected_group["results"].items():
+                for operation, expected in results.items():
+                    actual = group["results"][field][operation]
+                    assert actual == (pytest.approx(expected) if expected is not None else None)
+    
+    def test_create_many_updates_summaries(self, repository):
+        """Inserted batches are folded into the global and per-group rows"""
+        self.assert_matches_scan(repository)
+        assert repository.aggregate("price", "max") == {"result": 40.0}
+    
+    def test_update_and_delete_recompute_extremes(self, repository):
+        """Removing the current min/max recomputes it; emptied groups disappear"""
+        toys = repository.filter_as_domain("category", "Toys").items[0]
+        cheapest = repository.filter_as_domain("price", 2.5).items[0]
+        
+        repository.update(cheapest.id, {"numeric_fields": {"price": 3.5, "quantity": 1}})
+        self.assert_matches_scan(repository)
+        assert repository.aggregate("price", "min") == {"result": 3.5}
+        
+        repository.delete(toys.id)
+        self.assert_matches_scan(repository)
+        assert repository.aggregate("price", "max") == {"result": 10.0}
+        groups = repository.group_aggregate("category", ["price"], ["count"])
+        assert [group["group"] for group in groups] == ["Books", None]
+    
+    def test_rebuild_matches_incremental(self, repository):
+        """Rebuilding from data_entries gives the same answers as incremental maintenance"""
+        before = {
+            (field, operation): repository.summaries.aggregate(field, operation)
+            for field in ("price", "quantity") for operation in self.OPERATIONS
+        }
+        repository.summaries.rebuild()
+        repository.session.commit()
+        after = {
+            (field, operation): repository.summaries.aggregate(field, operation)
+            for field in ("price", "quantity") for operation in self.OPERATIONS
+        }
+        assert after == before
+        self.assert_matches_scan(repository)
+    
+    def test_sums_do_not_drift(self, sqlite_session):
+        """Totals stay exact through inserts and deletes of values of very different magnitudes"""
+        import math
+        import random
+        repository = DataEntryRepository(sqlite_session)
+        big, one = repository.create_many([
+            DataItem(numeric_fields={"price": 1e16}, string_fields={"category": "Books"}),
+            DataItem(numeric_fields={"price": 1}, string_fields={"category": "Books"}),
+        ])
+        repository.delete(big.id)
+        dataset = repository.get_all_as_domain()
+        assert repository.summaries.aggregate("price", "sum") == dataset.aggregate("price", "sum") == {"result": 1}
+        assert repository.group_aggregate("category", ["price"], ["sum"])[0]["results"]["price"]["sum"] == 1
+        
+        rng = random.Random(8)
+        magnitudes = [1e16, 1e8, 1, 0.1, 1e-3, 3e-9]
+        live = [one.id]
+        for _ in range(60):
+            if live and rng.random() < 0.4:
+                repository.delete(live.pop(rng.randrange(len(live))))
+            else:
+                created = repository.create_many([
+                    DataItem(
+                        numeric_fields={"price": rng.choice([-1, 1]) * rng.choice(magnitudes) * rng.randint(1, 9)},
+                        string_fields={"category": rng.choice(["Books", "Toys"])}
+                    )
+                    for _ in range(rng.randint(1, 3))
+                ])
+                live.extend(item.id for item in created)
+            values = [item.numeric_fields["price"] for item in repository.get_all_as_domain().items]
+            result = repository.summaries.aggregate("price", "sum")["result"]
+            assert result == (math.fsum(values) if values else None)
+            assert result == pytest.approx(repository.get_all_as_domain().aggregate("price", "sum")["result"])
+        self.assert_matches_scan(repository)
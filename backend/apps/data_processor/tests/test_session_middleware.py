@@ -0,0 +1,152 @@
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from shared.db import engine as db_engine
+from shared.db.engine import InstrumentedQueuePool, set_engine, get_pool_stats
+from shared.middleware.sqlalchemy_session import SQLAlchemySessionMiddleware
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    """Process-wide engine over a SQLite file with a small instrumented pool"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool, pool_size=2, max_overflow=1, pool_timeout=0.1
+    )
+    # Detach the current engine without disposing it, and restore it afterwards
+    previous = db_engine._engine
+    db_engine._engine = None
+    set_engine(engine)
+    try:
+        yield engine
+    finally:
+        set_engine(None)
+        db_engine._engine = previous
+
+
+class TestSQLAlchemySessionMiddleware:
+    """Test cases for the request-scoped session middleware"""
+
+    def run(self, view):
+        """Run a request through the middleware; returns the response and the lent session"""
+        request = RequestFactory().get("/")
+        response = SQLAlchemySessionMiddleware(view)(request)
+        return response, request.db_session
+
+    def test_session_is_returned_after_response(self, pooled_engine):
+        """The connection goes back to the pool once the view has answered"""
+        def view(request):
+            request.db_session.execute(text("SELECT 1"))
+            assert pooled_engine.pool.checkedout() == 1
+            return HttpResponse("ok")
+
+        self.run(view)
+        assert pooled_engine.pool.checkedout() == 0
+
+    def test_unused_session_never_checks_out(self, pooled_engine):
+        """Requests that do not query do not touch the pool"""
+        self.run(lambda request: HttpResponse("ok"))
+        assert pooled_engine.pool.stats.checkouts == 0
+
+    def test_streaming_session_closes_after_last_chunk(self, pooled_engine):
+        """Streaming responses keep the session until the content is consumed or closed"""
+        def view(request):
+            session = request.db_session
+            rows = (str(value) for value in session.execute(text("SELECT 1 UNION ALL SELECT 2")).scalars())
+            return StreamingHttpResponse(rows)
+
+        response, _ = self.run(view)
+        assert pooled_engine.pool.checkedout() == 1
+        assert b"".join(response.streaming_content) == b"12"
+        response.close()
+        assert pooled_engine.pool.checkedout() == 0
+
+    def test_async_streaming_session_closes_after_last_chunk(self, pooled_engine):
+        """Async streaming content (ASGI) is wrapped too"""
+        import asyncio
+
+        async def chunks():
+            yield b"a"
+            yield b"b"
+
+        def view(request):
+            request.db_session.execute(text("SELECT 1"))
+            return StreamingHttpResponse(chunks())
+
+        response, _ = self.run(view)
+        assert response.is_async
+        assert pooled_engine.pool.checkedout() == 1
+
+        async def consume():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        assert asyncio.run(consume()) == b"ab"
+        assert pooled_engine.pool.checkedout() == 0
+
+    def test_session_closes_on_error(self, pooled_engine):
+        """An exception in the view still returns the connection"""
+        def view(request):
+            request.db_session.execute(text("SELECT 1"))
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            self.run(view)
+        assert pooled_engine.pool.checkedout() == 0
+
+
+    def test_async_middleware(self, pooled_engine):
+        """Under ASGI the middleware is a coroutine and still returns the connection"""
+        import asyncio
+        from asgiref.sync import iscoroutinefunction, sync_to_async
+
+        def query(request):
+            request.db_session.execute(text("SELECT 1"))
+            assert pooled_engine.pool.checkedout() == 1
+
+        async def view(request):
+            # Sync views run on a thread under ASGI
+            await sync_to_async(query)(request)
+            return HttpResponse("ok")
+
+        middleware = SQLAlchemySessionMiddleware(view)
+        assert iscoroutinefunction(middleware)
+        asyncio.run(middleware(RequestFactory().get("/")))
+        assert pooled_engine.pool.checkedout() == 0
+
+    def test_static_files_middleware_is_async_capable(self):
+        """WhiteNoise would otherwise put every ASGI request on a thread"""
+        import asyncio
+        from asgiref.sync import iscoroutinefunction
+        from shared.middleware.static_files import AsyncWhiteNoiseMiddleware
+
+        async def view(request):
+            return HttpResponse("ok")
+
+        middleware = AsyncWhiteNoiseMiddleware(view)
+        assert iscoroutinefunction(middleware)
+        assert asyncio.run(middleware(RequestFactory().get("/"))).content == b"ok"
+
+
+class TestPoolStats:
+    """Test cases for the instrumented pool"""
+
+    def test_saturation_and_timeouts(self, pooled_engine):
+        """Checkouts, waits, saturation and timeouts are reported"""
+        connections = [pooled_engine.connect() for _ in range(3)]
+        with pytest.raises(PoolTimeoutError):
+            pooled_engine.connect()
+
+        stats = get_pool_stats()
+        assert stats["checked_out"] == 3
+        assert stats["saturation"] == 1.0
+        assert stats["checkouts"] == 3
+        assert stats["timeouts"] == 1
+        assert stats["wait_seconds_max"] >= 0.1
+
+        for connection in connections:
+            connection.close()
+        stats = get_pool_stats()
+        assert stats["checked_out"] == 0
+        assert stats["peak_saturation"] == 1.0
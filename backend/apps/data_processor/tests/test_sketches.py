@@ -0,0 +1,153 @@
+import random
+import pytest
+from pydantic import ValidationError
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.domain.columnar import ColumnarDataSet
+from apps.data_processor.domain.schemas import AggregateParamsSchema, GroupParamsSchema
+from apps.data_processor.domain.sketches import HyperLogLog, KLLSketch, approximate_aggregate
+
+
+def rank_error(values, value, q):
+    """Distance between q and the range of normalized ranks `value` occupies in sorted values"""
+    below = sum(1 for v in values if v < value) / len(values)
+    through = sum(1 for v in values if v <= value) / len(values)
+    return 0.0 if below <= q <= through else min(abs(q - below), abs(q - through))
+
+
+class TestHyperLogLog:
+    """Test cases for the distinct-count sketch"""
+
+    @pytest.mark.parametrize("cardinality", [1, 10, 100, 1000, 20000, 200000])
+    def test_error_within_bound(self, cardinality):
+        """Estimates stay within 4 standard errors (and are exact-ish when small)"""
+        sketch = HyperLogLog()
+        sketch.update(f"value-{i}" for i in range(cardinality))
+        assert abs(sketch.count() - cardinality) <= max(4 * sketch.standard_error * cardinality, 0.5)
+
+    def test_duplicates_do_not_count(self):
+        sketch = HyperLogLog()
+        sketch.update([1, 1.0, True, "1", "a", "a"] * 1000)
+        assert round(sketch.count()) == 3
+
+    def test_merge_equals_single_sketch(self):
+        """Merged partition sketches are identical to one sketch of all values"""
+        values = list(range(50000))
+        whole = HyperLogLog()
+        whole.update(values)
+        parts = [HyperLogLog() for _ in range(4)]
+        for index, part in enumerate(parts):
+            part.update(values[index::4] + values[:100])
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(part)
+        assert merged.registers == whole.registers
+
+    def test_merge_rejects_other_precision(self):
+        with pytest.raises(ValueError):
+            HyperLogLog(12).merge(HyperLogLog(14))
+
+    def test_empty(self):
+        sketch = HyperLogLog()
+        assert sketch.is_empty()
+        assert sketch.count() == 0
+
+
+class TestKLLSketch:
+    """Test cases for the quantile sketch"""
+
+    DISTRIBUTIONS = {
+        "uniform": lambda rng: rng.random(),
+        "normal": lambda rng: rng.gauss(0, 1),
+        "skewed": lambda rng: rng.expovariate(1) ** 3,
+        "ties": lambda rng: rng.randint(0, 9),
+    }
+
+    @pytest.mark.parametrize("distribution", sorted(DISTRIBUTIONS))
+    def test_rank_error_within_bound(self, distribution):
+        """Every reported quantile has a true rank within 2% of the requested one"""
+        rng = random.Random(7)
+        values = [self.DISTRIBUTIONS[distribution](rng) for _ in range(50000)]
+        sketch = KLLSketch(seed=1)
+        sketch.update(values)
+        assert sum(len(level) for level in sketch.levels) < 4 * sketch.k
+        ordered = sorted(values)
+        for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+            assert rank_error(ordered, sketch.quantile(q), q) <= 0.02
+
+    def test_merge_keeps_rank_error(self):
+        rng = random.Random(3)
+        values = [rng.uniform(0, 1000) for _ in range(40000)]
+        sketches = [KLLSketch(seed=index) for index in range(5)]
+        for index, sketch in enumerate(sketches):
+            sketch.update(values[index::5])
+        merged = sketches[0]
+        for sketch in sketches[1:]:
+            merged.merge(sketch)
+        assert merged.count == len(values)
+        ordered = sorted(values)
+        for q in (0.05, 0.5, 0.95):
+            assert rank_error(ordered, merged.quantile(q), q) <= 0.02
+
+    def test_small_inputs_are_exact(self):
+        """Below capacity nothing is compacted, so quantiles are exact nearest ranks"""
+        sketch = KLLSketch()
+        sketch.update([5, 1, 4, 2, 3])
+        assert [sketch.quantile(q) for q in (0, 0.2, 0.5, 0.8, 1)] == [1, 1, 3, 4, 5]
+
+    def test_extremes_are_exact(self):
+        rng = random.Random(11)
+        values = [rng.random() for _ in range(30000)]
+        sketch = KLLSketch()
+        sketch.update(values)
+        assert sketch.quantile(0) == min(values)
+        assert sketch.quantile(1) == max(values)
+
+    def test_empty(self):
+        assert KLLSketch().quantile(0.5) is None
+        assert approximate_aggregate([], "approx_percentile") is None
+        assert approximate_aggregate([], "approx_distinct") is None
+
+
+class TestApproximateAggregation:
+    """Test cases for approximate aggregations on datasets"""
+
+    @pytest.fixture
+    def dataset(self):
+        rng = random.Random(2)
+        return DataSet(items=[
+            DataItem(
+                id=i,
+                numeric_fields={"price": rng.randint(0, 499)} if i % 10 else {},
+                string_fields={"category": f"c{i % 37}"}
+            )
+            for i in range(1, 5001)
+        ])
+
+    def test_distinct(self, dataset):
+        exact = len({item.numeric_fields["price"] for item in dataset.items if "price" in item.numeric_fields})
+        result = dataset.aggregate("price", "approx_distinct")["result"]
+        assert abs(result - exact) <= 4 * HyperLogLog().standard_error * exact
+        assert dataset.aggregate("category", "approx_distinct")["result"] == 37
+        assert dataset.aggregate("missing", "approx_distinct")["result"] is None
+
+    @pytest.mark.parametrize("percentile", [0, 10, 50, 90, 100])
+    def test_percentile(self, dataset, percentile):
+        prices = sorted(item.numeric_fields["price"] for item in dataset.items if "price" in item.numeric_fields)
+        result = dataset.aggregate("price", "approx_percentile", percentile)["result"]
+        assert rank_error(prices, result, percentile / 100) <= 0.02
+
+    def test_columnar_matches_dataset(self, dataset):
+        columnar = ColumnarDataSet.from_dataset(dataset)
+        for field in ("price", "category", "id"):
+            for operation in ("approx_distinct", "approx_percentile"):
+                assert columnar.aggregate(field, operation, 90) == dataset.aggregate(field, operation, 90)
+
+    def test_schema(self):
+        params = AggregateParamsSchema(field="price", operation="approx_percentile", percentile=95)
+        assert params.percentile == 95
+        assert AggregateParamsSchema(field="price", operation="approx_percentile").percentile == 50
+        with pytest.raises(ValidationError):
+            AggregateParamsSchema(field="price", operation="approx_percentile", percentile=101)
+        with pytest.raises(ValidationError):
+            GroupParamsSchema(group_by="category", fields=["price"], operations=["approx_distinct"])
+        assert "approx_distinct" not in GroupParamsSchema(group_by="category", fields=["price"]).operations
@@ -0,0 +1,145 @@
+import random
+import statistics
+import pytest
+from pydantic import ValidationError
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.domain.columnar import ColumnarDataSet
+from apps.data_processor.domain.schemas import AggregateParamsSchema, GroupParamsSchema
+from apps.data_processor.domain.statistics import RunningStats, Histogram, histogram_bin
+
+
+class TestRunningStats:
+    """Test cases for the single-pass statistics accumulator"""
+
+    def test_matches_exact_statistics(self):
+        rng = random.Random(4)
+        values = [rng.uniform(-100, 100) for _ in range(5000)]
+        stats = RunningStats()
+        stats.update(values)
+        result = stats.result()
+        assert result["count"] == len(values)
+        assert result["sum"] == pytest.approx(sum(values))
+        assert result["mean"] == pytest.approx(statistics.fmean(values))
+        assert (result["min"], result["max"]) == (min(values), max(values))
+        assert result["variance"] == pytest.approx(statistics.pvariance(values))
+        assert result["stddev"] == pytest.approx(statistics.pstdev(values))
+
+    def test_stable_with_large_offset(self):
+        """A large common offset cancels catastrophically in sum(x^2) - sum(x)^2 / n, but not here"""
+        values = [1e9 + value for value in (4, 7, 13, 16)] * 1000
+        stats = RunningStats()
+        stats.update(values)
+        assert stats.result()["variance"] == pytest.approx(22.5)
+
+    def test_merge_equals_single_pass(self):
+        rng = random.Random(9)
+        values = [rng.gauss(50, 10) for _ in range(3000)]
+        whole = RunningStats()
+        whole.update(values)
+        parts = [RunningStats() for _ in range(3)]
+        for index, part in enumerate(parts):
+            part.update(values[index * 1000:(index + 1) * 1000])
+        merged = RunningStats().merge(parts[0]).merge(parts[1]).merge(parts[2])
+        assert merged.result() == pytest.approx(whole.result())
+
+    def test_keeps_integer_types(self):
+        stats = RunningStats()
+        stats.update([3, 1, 2])
+        assert stats.result() == {"count": 3, "sum": 6, "mean": 2.0, "min": 1, "max": 3,
+                                  "variance": pytest.approx(2 / 3), "stddev": pytest.approx((2 / 3) ** 0.5)}
+
+    def test_empty(self):
+        assert RunningStats().result() is None
+
+
+class TestHistogram:
+    """Test cases for the fixed-width histogram"""
+
+    def test_bins(self):
+        histogram = Histogram(0, 10, bins=5)
+        histogram.update([-1, 0, 1.99, 2, 5, 9.99, 10, 11, float("nan")])
+        result = histogram.result()
+        assert [bin["count"] for bin in result["bins"]] == [2, 1, 1, 0, 2]
+        assert [(bin["lower"], bin["upper"]) for bin in result["bins"]] == [(0, 2), (2, 4), (4, 6), (6, 8), (8, 10)]
+
+    def test_bin_formula(self):
+        """Every value inside the range lands in a bin, the upper bound in the last one"""
+        rng = random.Random(1)
+        for _ in range(1000):
+            lower = rng.uniform(-10, 10)
+            upper = lower + rng.uniform(0.001, 10)
+            bins = rng.randint(1, 50)
+            value = rng.choice([lower, upper, rng.uniform(lower, upper)])
+            assert 0 <= histogram_bin(value, lower, upper, bins) < bins
+        assert histogram_bin(10, 0, 10, 4) == 3
+        assert histogram_bin(10.5, 0, 10, 4) is None
+
+    def test_merge(self):
+        first, second = Histogram(0, 1, 4), Histogram(0, 1, 4)
+        first.update([0.1, 0.6])
+        second.update([0.3, 0.9, 1.0])
+        assert [bin["count"] for bin in first.merge(second).result()["bins"]] == [1, 1, 1, 2]
+        with pytest.raises(ValueError):
+            first.merge(Histogram(0, 2, 4))
+
+    def test_rejects_empty_range(self):
+        with pytest.raises(ValueError):
+            Histogram(1, 1)
+
+
+class TestStatisticsAggregation:
+    """Test cases for the stats and histogram operations on datasets"""
+
+    @pytest.fixture
+    def dataset(self):
+        rng = random.Random(6)
+        return DataSet(items=[
+            DataItem(
+                id=i,
+                numeric_fields={"price": rng.choice([rng.randint(0, 100), round(rng.uniform(-5, 100), 2)])} if i % 7 else {},
+                string_fields={"name": f"Product {i}"}
+            )
+            for i in range(1, 2001)
+        ])
+
+    def test_stats_agree_with_single_operations(self, dataset):
+        result = dataset.aggregate("price", "stats")["result"]
+        for operation, key in (("count", "count"), ("sum", "sum"), ("avg", "mean"), ("min", "min"), ("max", "max")):
+            assert result[key] == pytest.approx(dataset.aggregate("price", operation)["result"])
+        prices = [item.numeric_fields["price"] for item in dataset.items if "price" in item.numeric_fields]
+        assert result["variance"] == pytest.approx(statistics.pvariance(prices))
+
+    def test_histogram_counts_every_value(self, dataset):
+        result = dataset.aggregate("price", "histogram", bins=12)["result"]
+        assert len(result["bins"]) == 12
+        assert sum(bin["count"] for bin in result["bins"]) == dataset.aggregate("price", "count")["result"]
+        assert (result["lower"], result["upper"]) == (
+            dataset.aggregate("price", "min")["result"], dataset.aggregate("price", "max")["result"]
+        )
+
+    def test_histogram_of_a_constant(self):
+        dataset = DataSet(items=[DataItem(id=i, numeric_fields={"price": 3}) for i in range(1, 4)])
+        result = dataset.aggregate("price", "histogram", bins=2)["result"]
+        assert result["bins"] == [{"lower": 2.5, "upper": 3.0, "count": 0}, {"lower": 3.0, "upper": 3.5, "count": 3}]
+
+    @pytest.mark.parametrize("options", [
+        {"operation": "stats"},
+        {"operation": "histogram"},
+        {"operation": "histogram", "bins": 9, "lower": 10.0, "upper": 60.0},
+    ])
+    def test_columnar_matches_dataset(self, dataset, options):
+        expected = dataset.aggregate("price", **options)["result"]
+        assert ColumnarDataSet.from_dataset(dataset).aggregate("price", **options)["result"] == pytest.approx(expected)
+
+    def test_missing_field(self, dataset):
+        assert dataset.aggregate("missing", "stats")["result"] is None
+        assert dataset.aggregate("missing", "histogram")["result"] is None
+
+    def test_schema(self):
+        params = AggregateParamsSchema(field="price", operation="histogram", bins=20, lower=0, upper=5)
+        assert (params.bins, params.lower, params.upper) == (20, 0, 5)
+        for invalid in ({"bins": 0}, {"lower": 1}, {"lower": 2, "upper": 1}, {"lower": 0, "upper": float("inf")}):
+            with pytest.raises(ValidationError):
+                AggregateParamsSchema(field="price", operation="histogram", **invalid)
+        with pytest.raises(ValidationError):
+            GroupParamsSchema(group_by="category", fields=["price"], operations=["stats"])
@@ -0,0 +1,82 @@
+import random
+import pytest
+from apps.data_processor.domain.models import DataItem, DataSet
+from apps.data_processor.domain.trigrams import TrigramIndex, trigrams
+
+# Alphabet small enough for random needles to hit, with case and length traps
+ALPHABET = "abcAB ßİé%_"
+
+
+def random_text(rng: random.Random, size: int) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(size))
+
+
+class TestTrigramIndex:
+    """Test cases for the in-memory trigram index"""
+
+    def test_trigrams(self):
+        """Distinct three-character substrings"""
+        assert trigrams("abab") == {"aba", "bab"}
+        assert trigrams("ab") == set()
+
+    def test_search_matches_upper_contains(self):
+        """Results equal `needle.upper() in text.upper()` for any needle length"""
+        rng = random.Random(11)
+        texts = {key: random_text(rng, rng.randint(0, 12)) for key in range(300)}
+        index = TrigramIndex(texts.items())
+        for _ in range(300):
+            needle = random_text(rng, rng.randint(0, 5))
+            expected = [key for key, text in texts.items() if needle.upper() in text.upper()]
+            assert index.search(needle) == expected, needle
+
+    def test_incremental_updates(self):
+        """Adding, replacing and removing keys keeps postings exact"""
+        index = TrigramIndex([(1, "Phone case"), (2, "Headphones")])
+        assert index.search("PHONE") == [1, 2]
+
+        index.add(1, "Laptop")
+        index.add(3, "phonebook")
+        index.remove(2)
+        index.remove(42)
+        assert index.search("phone") == [3]
+        assert index.search("top") == [1]
+        assert len(index) == 2 and 2 not in index
+        assert "ONE" in index._postings and "HEA" not in index._postings
+
+    def test_candidates_narrow_the_search(self):
+        """Only texts holding every trigram of the needle are candidates"""
+        index = TrigramIndex([(1, "Electronics"), (2, "Books"), (3, "Toys")])
+        assert index.candidates("tron") == {1}
+        assert index.candidates("zzz") == set()
+        assert index.candidates("to") is None
+
+
+class TestDataSetSubstringIndex:
+    """Test cases for contains filters on an indexed DataSet"""
+
+    @pytest.fixture
+    def items(self):
+        """Items where the field is missing, numeric or a string"""
+        return [
+            DataItem(id=1, string_fields={"name": "Wireless Phone"}),
+            DataItem(id=2, string_fields={"category": "phones"}),
+            DataItem(id=3, numeric_fields={"name": 7}, string_fields={"name": "Shadowed phone"}),
+            DataItem(id=4, string_fields={"name": "iPhone charger"}),
+            DataItem(id=5, string_fields={"name": "Cable"}),
+        ]
+
+    @pytest.mark.parametrize("field", ["name", "category", "id", "missing"])
+    @pytest.mark.parametrize("value", ["phone", "PH", "", "charger", "x", 5])
+    def test_indexed_filter_matches_scan(self, items, field, value):
+        """An indexed contains filter keeps the same items, in order"""
+        expected = DataSet(items=items).filter(field, value, "contains")
+        dataset = DataSet(items=items)
+        dataset.index_substrings(field)
+        assert dataset.filter(field, value, "contains") == expected
+
+    def test_index_is_built_once(self, items):
+        """The index is cached on the DataSet"""
+        dataset = DataSet(items=items)
+        assert dataset.index_substrings("name") is dataset.index_substrings("name")
+        assert len(dataset.index_substrings("name")) == 3
+        assert dataset == DataSet(items=items)
@@ -0,0 +1,82 @@
+import io
+import pytest
+from apps.data_processor.application.services import DataProcessingService
+from apps.data_processor.interfaces.uploads import (
+    UploadError, get_upload_format, iter_lines, iter_ndjson_records, iter_csv_records
+)
+
+
+class TestUploadReaders:
+    """Test cases for the incremental NDJSON/CSV readers"""
+
+    def test_get_upload_format(self):
+        """Content types map to formats, ignoring parameters"""
+        assert get_upload_format("application/x-ndjson") == "ndjson"
+        assert get_upload_format("text/csv; charset=utf-8") == "csv"
+        assert get_upload_format("application/json") is None
+        assert get_upload_format(None) is None
+
+    def test_ndjson_records(self):
+        """Blank lines are skipped and malformed lines are reported in place"""
+        stream = io.BytesIO(b'{"name": "A"}\n\nnot json\n{"name": "B"}')
+        records = list(iter_ndjson_records(stream))
+
+        assert [line for line, _ in records] == [1, 3, 4]
+        assert records[0][1] == {"name": "A"}
+        assert isinstance(records[1][1], UploadError)
+        assert records[2][1] == {"name": "B"}
+
+    def test_csv_records(self):
+        """Rows are keyed by the header, empty cells are dropped and quoted newlines kept"""
+        stream = io.BytesIO(
+            '﻿name,price,category\nA,1.5,Books\n"B\nsecond line",,\nC,1,x,extra\n'.encode("utf-8")
+        )
+        records = list(iter_csv_records(stream))
+
+        assert records[0] == (2, {"name": "A", "price": "1.5", "category": "Books"})
+        assert records[1] == (3, {"name": "B\nsecond line"})
+        assert records[2][0] == 5
+        assert isinstance(records[2][1], UploadError)
+
+    def test_line_length_is_bounded(self):
+        """Oversized lines are rejected instead of buffered"""
+        with pytest.raises(UploadError):
+            list(iter_lines(io.BytesIO(b"x" * 100 + b"\n"), max_line_bytes=10))
+
+
+class TestProcessStream:
+    """Test cases for chunked ingestion"""
+
+    def test_chunks_are_committed_and_reported(self, sqlite_session):
+        """Each chunk reports its counts; invalid records are skipped"""
+        service = DataProcessingService(sqlite_session)
+        records = [
+            (1, {"name": "A", "price": 1}),
+            (2, {"price": 2}),
+            (3, UploadError("Invalid JSON")),
+            (4, {"name": "B", "price": "abc"}),
+            (5, {"name": "C", "quantity": 3}),
+        ]
+
+        events = list(service.process_stream(records, chunk_size=2))
+
+        assert [(event["received"], event["created"], event["failed"]) for event in events[:-1]] == [
+            (2, 1, 1), (2, 0, 2), (1, 1, 0)
+        ]
+        assert events[-1] == {"done": True, "chunks": 3, "received": 5, "created": 2, "failed": 3}
+        assert [item["name"] for item in service.get_products()["data"]] == ["A", "C"]
+
+    def test_earlier_chunks_survive_a_later_failure(self, sqlite_session):
+        """A read error stops the upload without undoing committed chunks"""
+        service = DataProcessingService(sqlite_session)
+
+        def records():
+            yield 1, {"name": "A"}
+            raise UploadError("Line 2 is not valid UTF-8")
+
+        events = service.process_stream(records(), chunk_size=1)
+        assert next(events)["created"] == 1
+        with pytest.raises(UploadError):
+            next(events)
+        sqlite_session.rollback()
+        assert len(service.get_products()["data"]) == 1
@@ -0,0 +1,132 @@
+import random
+import pytest
+from typing import Optional
+from pydantic import ValidationError
+from apps.data_processor.domain.schemas import DataItemSchema
+from apps.data_processor.domain.validators import validate_item, compile_item_validator, _fast_validate
+
+# Values that exercise every coercion rule of DataItemSchema
+VALUE_POOL = [
+    None, "", "Product A", "  12 ", "3", "3.5", "-7", "1e3", "nan", "inf", "abc", "1_000", "٣",
+    "9" * 150, 0, 1, -4, 3, 10 ** 20, 10 ** 400, 0.0, 2.5, -1.25, float("nan"), float("inf"),
+    True, False, [], [1, 2], {}, {"a": 1}, b"bytes", 7j,
+]
+
+NESTED_POOL = [
+    None, {}, {"weight": 2}, {"weight": "2.5"}, {"weight": "heavy"}, {"price": 1}, {1: 2.0},
+    {"color": "red"}, {"color": 3}, {"name": "Nested"}, [("weight", 1)], "weight", 5,
+]
+
+# Plain JSON values per field, most of which the fast path decides on its own
+PLAIN_POOLS = {
+    "id": [None, 1, 42, "7"],
+    "name": [None, "", "Product A", "  padded ", "٣"],
+    "price": [None, 0, 1, 2.5, -1.25, "3.5", "  12 ", "1e3", "nan", "abc", 10 ** 20, float("inf")],
+    "quantity": [None, 0, 3, -4, "3", " 12 ", "٣", "1_000", "3.5"],
+    "category": [None, "", "Books", "Electronics"],
+}
+
+PLAIN_NESTED_POOL = [{}, {"weight": 2}, {"weight": "2.5"}, {"price": 1.5}, {"color": "red"}, {"name": "Nested"}]
+
+FIELDS = ["id", "name", "price", "quantity", "category"]
+
+
+def schema_outcome(record):
+    """What DataItemSchema.parse_obj(record).to_domain() produces or raises"""
+    try:
+        item = DataItemSchema.parse_obj(record).to_domain()
+    except ValidationError as e:
+        return ("error", e.errors())
+    except Exception as e:
+        return ("exception", type(e))
+    return ("item", item.id, list(item.numeric_fields.items()), list(item.string_fields.items()))
+
+
+def validator_outcome(validator, record):
+    """What the compiled validator produces or raises"""
+    try:
+        item = validator(record)
+    except ValidationError as e:
+        return ("error", e.errors())
+    except Exception as e:
+        return ("exception", type(e))
+    return ("item", item.id, list(item.numeric_fields.items()), list(item.string_fields.items()))
+
+
+def same_outcome(expected, actual) -> bool:
+    """Compare outcomes by repr, so NaN values, key order and float vs int differences count"""
+    return repr(expected) == repr(actual)
+
+
+def generate_records(count: int, seed: int = 1234, pools=None, nested=NESTED_POOL):
+    """Random records mixing valid and invalid values for every field"""
+    rng = random.Random(seed)
+    pools = pools or {field: VALUE_POOL for field in FIELDS}
+    for _ in range(count):
+        record = {}
+        for field in FIELDS:
+            if rng.random() < 0.7:
+                record[field] = rng.choice(pools[field])
+        for field in ("numeric_fields", "string_fields"):
+            if rng.random() < 0.3:
+                record[field] = rng.choice(nested)
+        if rng.random() < 0.1:
+            record["extra"] = rng.choice(pools["name"])
+        yield record
+
+
+class TestCompiledValidator:
+    """Differential tests of the compiled validator against DataItemSchema"""
+
+    @pytest.mark.parametrize("record", [
+        {"name": "Product A", "price": 10.99, "quantity": 5, "category": "Electronics"},
+        {"id": 3, "name": "B", "price": "10", "quantity": "2"},
+        {"name": "C", "numeric_fields": {"weight": 2, "price": 1}, "price": 3},
+        {"name": "", "category": "", "string_fields": {"name": "Nested"}},
+        {"name": None, "price": None, "quantity": None},
+        {"numeric_fields": None},
+        {"quantity": 3.7},
+        {"quantity": "3.0"},
+        {"price": True},
+        {"id": True},
+        {"id": "5"},
+        {"name": 7},
+        {"price": "abc"},
+        {"numeric_fields": {"a": "b"}},
+        {"string_fields": {"color": 3}},
+        {"numeric_fields": [("weight", 1)]},
+        {"quantity": "9" * 5000},
+        [1],
+        "not a dict",
+    ])
+    def test_matches_schema(self, record):
+        """Known edge cases produce the same item or the same errors"""
+        assert same_outcome(schema_outcome(record), validator_outcome(validate_item, record))
+
+    def test_fuzz_matches_schema(self):
+        """Random records produce the same item or the same errors"""
+        for record in generate_records(5000):
+            assert same_outcome(schema_outcome(record), validator_outcome(validate_item, record)), record
+
+    def test_fuzz_plain_records(self):
+        """Random plain records, mostly decided by the fast path, match the schema"""
+        fast = 0
+        for record in generate_records(5000, seed=99, pools=PLAIN_POOLS, nested=PLAIN_NESTED_POOL):
+            fast += _fast_validate(record) is not None
+            assert same_outcome(schema_outcome(record), validator_outcome(validate_item, record)), record
+        assert fast > 1000
+
+    def test_plain_records_take_the_fast_path(self):
+        """Typical product records never reach pydantic"""
+        assert _fast_validate({"name": "A", "price": 1.5, "quantity": 2, "category": "Books"}) is not None
+        assert _fast_validate({"name": "A", "price": "1.5", "quantity": "2"}) is not None
+        assert _fast_validate({"name": "A", "price": "abc"}) is None
+
+    def test_changed_schema_falls_back(self):
+        """A schema with a different shape is validated by pydantic alone"""
+        class OtherSchema(DataItemSchema):
+            weight: Optional[float] = None
+
+        validator = compile_item_validator(OtherSchema)
+        with pytest.raises(ValidationError):
+            validator({"name": "A", "weight": "heavy"})
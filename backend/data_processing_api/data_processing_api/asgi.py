@@ -0,0 +1,20 @@
+"""
+ASGI config for data_processing_api project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server so long-lived streams (the change feed) do not
+hold a worker thread each, e.g.
+``gunicorn data_processing_api.asgi:application -k uvicorn.workers.UvicornWorker``.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'data_processing_api.settings')
+
+django_application = get_asgi_application()
+
+from shared.middleware.disconnect import CancelOnDisconnect  # noqa: E402
+
+application = CancelOnDisconnect(django_application, path_prefixes=['/api/data/products/events/'])
@@ -36,7 +36,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'shared.middleware.static_files.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,6 +44,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'shared.middleware.sqlalchemy_session.SQLAlchemySessionMiddleware',
 ]
 
 ROOT_URLCONF = 'data_processing_api.urls'
@@ -65,6 +66,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'data_processing_api.wsgi.application'
+ASGI_APPLICATION = 'data_processing_api.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -83,6 +85,40 @@ DATABASES = {
 # SQLAlchemy Configuration
 SQLALCHEMY_DATABASE_URL = f"postgresql://{os.environ.get('DB_USER', 'postgres')}:{os.environ.get('DB_PASSWORD', 'postgres')}@{os.environ.get('DB_HOST', 'localhost')}:{os.environ.get('DB_PORT', '5432')}/{os.environ.get('DB_NAME', 'data_processing')}"
 
+# Connection pool of the SQLAlchemy engine (one pool per worker process).
+# Size workers so that workers * (POOL_SIZE + MAX_OVERFLOW) stays below the
+# database's max_connections; GET /api/data/pool/stats/ reports saturation
+# and checkout wait times
+SQLALCHEMY_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+SQLALCHEMY_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+SQLALCHEMY_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '30'))
+SQLALCHEMY_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+SQLALCHEMY_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True') == 'True'
+
+# JSON keys that get a PostgreSQL expression index (see scripts/init_db.py)
+SQLALCHEMY_INDEXED_KEYS = {
+    'numeric_fields': tuple(filter(None, os.environ.get('INDEXED_NUMERIC_KEYS', 'price,quantity').split(','))),
+    'string_fields': tuple(filter(None, os.environ.get('INDEXED_STRING_KEYS', 'name,category').split(','))),
+}
+
+# Numeric fields (and group-by keys) whose sum/avg/min/max/count are kept in
+# the data_entry_summaries table and answered without scanning data_entries
+AGGREGATE_SUMMARY_FIELDS = tuple(filter(None, os.environ.get('AGGREGATE_SUMMARY_FIELDS', 'price,quantity').split(',')))
+AGGREGATE_SUMMARY_GROUP_BY = tuple(filter(None, os.environ.get('AGGREGATE_SUMMARY_GROUP_BY', 'category').split(',')))
+
+# In-process cache of transform results, invalidated by the dataset generation
+TRANSFORM_CACHE_MAX_ENTRIES = int(os.environ.get('TRANSFORM_CACHE_MAX_ENTRIES', '256'))
+TRANSFORM_CACHE_MAX_ROWS = int(os.environ.get('TRANSFORM_CACHE_MAX_ROWS', '200000'))
+TRANSFORM_CACHE_TTL = int(os.environ.get('TRANSFORM_CACHE_TTL', '300'))
+
+# Server-Sent Events change feed: heartbeat interval, stream lifetime (clients
+# reconnect), events a slow client may queue, and LISTEN/NOTIFY fan-out across
+# workers (PostgreSQL only)
+CHANGE_FEED_HEARTBEAT = int(os.environ.get('CHANGE_FEED_HEARTBEAT', '15'))
+CHANGE_FEED_MAX_SECONDS = int(os.environ.get('CHANGE_FEED_MAX_SECONDS', '300'))
+CHANGE_FEED_MAX_PENDING = int(os.environ.get('CHANGE_FEED_MAX_PENDING', '100'))
+CHANGE_FEED_NOTIFY = os.environ.get('CHANGE_FEED_NOTIFY', 'False') == 'True'
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Benchmark bulk ingestion through DataEntryRepository.create_many.
+
+Inserts the same synthetic batch with the previous add_all + per-row refresh
+path and with the bulk INSERT ... RETURNING path (and, on PostgreSQL with
+psycopg2, the COPY path), and prints rows/second and statements issued.
+Each run uses a fresh copy of the schema, so point --url at a scratch
+database, not at the application's.
+
+Usage:
+    python benchmark_ingest.py [--url sqlite://] [--rows 10000] [--repeat 3]
+"""
+
+import os
+import sys
+import argparse
+import random
+import time
+import django
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add the data_processing_api directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_processing_api"))
+
+# Set up Django settings
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "data_processing_api.settings")
+django.setup()
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from shared.db.base_model import Base
+from apps.data_processor.domain.models import DataItem
+from apps.data_processor.infrastructure.models import DataEntry
+from apps.data_processor.infrastructure.repositories import DataEntryRepository
+from apps.data_processor.infrastructure.schema import upgrade_schema
+
+CATEGORIES = ["Electronics", "Books", "Clothing", "Digital", "Toys", "Garden", "Sports", "Food"]
+
+
+def generate_items(rows: int, seed: int = 42):
+    """Generate a synthetic batch of new products"""
+    rng = random.Random(seed)
+    return [
+        DataItem(
+            numeric_fields={"price": round(rng.uniform(0, 500), 2), "quantity": rng.randint(0, 100)},
+            string_fields={"name": f"Product {index}", "category": rng.choice(CATEGORIES)}
+        )
+        for index in range(rows)
+    ]
+
+
+def legacy_create_many(repository: DataEntryRepository, data_items):
+    """The previous create_many: add_all, commit, then refresh every row"""
+    entries = [DataEntry.from_domain(item) for item in data_items]
+    repository.session.add_all(entries)
+    repository.session.flush()
+    repository.on_created(entries)
+    repository.session.commit()
+    for entry in entries:
+        repository.session.refresh(entry)
+    return entries
+
+
+def run(engine, items, insert, copy_threshold):
+    """Insert items into an empty schema; returns (seconds, statements)"""
+    Base.metadata.drop_all(bind=engine)
+    upgrade_schema(engine)
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    session = sessionmaker(bind=engine)()
+    try:
+        repository = DataEntryRepository(session)
+        repository.copy_threshold = copy_threshold
+        start = time.perf_counter()
+        insert(repository, items)
+        elapsed = time.perf_counter() - start
+    finally:
+        session.close()
+        event.remove(engine, "before_cursor_execute", listener)
+    return elapsed, len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite://", help="SQLAlchemy URL of a scratch database")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    items = generate_items(args.rows)
+    never = args.rows + 1
+
+    modes = [
+        ("add_all + refresh", legacy_create_many, never),
+        ("INSERT ... RETURNING", DataEntryRepository.create_many, never),
+    ]
+    if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2":
+        modes.append(("COPY + staging", DataEntryRepository.create_many, 0))
+
+    print(f"Inserting {args.rows:,} rows into {engine.dialect.name}, best of {args.repeat}\n")
+    print(f"{'path':<24}{'seconds':>10}{'rows/s':>12}{'statements':>12}{'speedup':>10}")
+    baseline = None
+    for name, insert, copy_threshold in modes:
+        elapsed, statements = min(run(engine, items, insert, copy_threshold) for _ in range(args.repeat))
+        baseline = baseline or elapsed
+        print(f"{name:<24}{elapsed:>10.2f}{args.rows / elapsed:>12,.0f}{statements:>12,}"
+              f"{baseline / elapsed:>9.1f}x")
+
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
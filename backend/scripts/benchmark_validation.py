@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Benchmark the compiled product validator against DataItemSchema.parse_obj.
+
+Generates synthetic upload records (JSON-typed, CSV-style strings, and a
+share of invalid ones), validates them with both paths, checks that the
+results agree and prints items/second and the speedup.
+
+Usage:
+    python benchmark_validation.py [--items 100000] [--repeat 3] [--invalid 0.01]
+"""
+
+import sys
+import os
+import argparse
+import random
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pydantic import ValidationError
+from apps.data_processor.domain.schemas import DataItemSchema
+from apps.data_processor.domain.validators import validate_item
+
+CATEGORIES = ["Electronics", "Books", "Clothing", "Digital", "Toys", "Garden", "Sports", "Food"]
+
+
+def generate_records(items: int, invalid: float, seed: int = 42):
+    """Generate JSON-style and CSV-style product records"""
+    rng = random.Random(seed)
+    records = []
+    for index in range(items):
+        price = round(rng.uniform(0, 500), 2)
+        quantity = rng.randint(0, 100)
+        record = {"name": f"Product {index}", "price": price, "quantity": quantity, "category": rng.choice(CATEGORIES)}
+        if rng.random() < 0.5:
+            # CSV uploads deliver every cell as a string
+            record = {key: str(value) for key, value in record.items()}
+        if rng.random() < invalid:
+            record["price"] = "n/a"
+        records.append(record)
+    return records
+
+
+def schema_validate(records):
+    """Validate with the pydantic schema"""
+    results = []
+    for record in records:
+        try:
+            results.append(DataItemSchema.parse_obj(record).to_domain())
+        except ValidationError:
+            results.append(None)
+    return results
+
+
+def compiled_validate(records):
+    """Validate with the compiled validator"""
+    results = []
+    for record in records:
+        try:
+            results.append(validate_item(record))
+        except ValidationError:
+            results.append(None)
+    return results
+
+
+def best_time(function, repeat: int):
+    """Best wall-clock time of `repeat` runs, and the last result"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--invalid", type=float, default=0.01, help="share of invalid records")
+    args = parser.parse_args()
+
+    records = generate_records(args.items, args.invalid)
+
+    schema_time, schema_results = best_time(lambda: schema_validate(records), args.repeat)
+    compiled_time, compiled_results = best_time(lambda: compiled_validate(records), args.repeat)
+    match = "yes" if schema_results == compiled_results else "NO"
+
+    print(f"Validated {args.items:,} items ({args.invalid:.0%} invalid), best of {args.repeat}\n")
+    print(f"{'validator':<22}{'seconds':>10}{'items/s':>14}")
+    print(f"{'DataItemSchema':<22}{schema_time:>10.3f}{args.items / schema_time:>14,.0f}")
+    print(f"{'compiled':<22}{compiled_time:>10.3f}{args.items / compiled_time:>14,.0f}")
+    print(f"\nspeedup {schema_time / compiled_time:.1f}x, results match: {match}")
+
+
+if __name__ == "__main__":
+    main()
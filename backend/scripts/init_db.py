@@ -1,6 +1,10 @@
 #!/usr/bin/env python
 """
-Script to initialize database tables using SQLAlchemy
+Script to initialize database tables using SQLAlchemy.
+
+Also upgrades an existing database in place: JSON columns are converted to
+JSONB and the indexes declared in SQLALCHEMY_INDEXED_KEYS are created
+(including pg_trgm indexes for the string keys when the extension can be installed).
 """
 
 import os
@@ -18,8 +22,7 @@ django.setup()
 
 from sqlalchemy import create_engine
 from django.conf import settings
-from shared.db.base_model import Base
-from apps.data_processor.infrastructure.models import DataEntry
+from apps.data_processor.infrastructure.schema import upgrade_schema
 
 def init_db():
     """Initialize database tables"""
@@ -28,8 +31,8 @@ def init_db():
     # Create SQLAlchemy engine
     engine = create_engine(settings.SQLALCHEMY_DATABASE_URL)
     
-    # Create tables
-    Base.metadata.create_all(bind=engine)
+    # Create tables, convert JSON columns to JSONB and create indexes
+    upgrade_schema(engine)
     
     print("Database tables created successfully.")
 
@@ -1,4 +1,5 @@
 from typing import Generic, TypeVar, Type, List, Optional, Any, Dict, Union
+import copy
 from sqlalchemy.orm import Session
 from .base_model import BaseModel
 
@@ -19,10 +20,21 @@ class BaseRepository(Generic[T]):
         """Get all records"""
         return self.session.query(self.model).all()
     
+    def on_created(self, instances: List[T]) -> None:
+        """Hook run after new records are flushed, inside the same transaction"""
+    
+    def on_updated(self, instance: T, previous: Dict[str, Any]) -> None:
+        """Hook run after a record update is flushed; `previous` holds the old column values"""
+    
+    def on_deleted(self, instance: T) -> None:
+        """Hook run after a record deletion is flushed, inside the same transaction"""
+    
     def create(self, data: Dict[str, Any]) -> T:
         """Create a new record"""
         instance = self.model(**data)
         self.session.add(instance)
+        self.session.flush()
+        self.on_created([instance])
         self.session.commit()
         self.session.refresh(instance)
         return instance
@@ -31,8 +43,11 @@ class BaseRepository(Generic[T]):
         """Update an existing record"""
         instance = self.get_by_id(id)
         if instance:
+            previous = copy.deepcopy(instance.to_dict())
             for key, value in data.items():
                 setattr(instance, key, value)
+            self.session.flush()
+            self.on_updated(instance, previous)
             self.session.commit()
             self.session.refresh(instance)
         return instance
@@ -42,6 +57,8 @@ class BaseRepository(Generic[T]):
         instance = self.get_by_id(id)
         if instance:
             self.session.delete(instance)
+            self.session.flush()
+            self.on_deleted(instance)
             self.session.commit()
             return True
         return False
@@ -0,0 +1,253 @@
+from typing import Any, Dict, Optional
+from threading import Lock
+import logging
+import time
+from django.conf import settings
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pool settings used when the Django settings do not define them
+DEFAULT_POOL_SETTINGS = {
+    "SQLALCHEMY_POOL_SIZE": 5,
+    "SQLALCHEMY_MAX_OVERFLOW": 10,
+    "SQLALCHEMY_POOL_TIMEOUT": 30,
+    "SQLALCHEMY_POOL_RECYCLE": 1800,
+    "SQLALCHEMY_POOL_PRE_PING": True,
+}
+
+# asyncio drivers used for the async engine when its URL names none
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+class PoolStats:
+    """
+    Checkout counters of a connection pool: how many checkouts there were,
+    how long they waited for a connection (including opening a new one) and
+    how many timed out, plus the highest number of connections in use.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all counters"""
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.peak_checked_out = 0
+
+    def record_checkout(self, wait: float, checked_out: int, timed_out: bool = False) -> None:
+        """Record one checkout attempt"""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout into a PoolStats"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_checkout(time.perf_counter() - start, self.checkedout(), timed_out=True)
+            raise
+        self.stats.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+    def recreate(self):
+        # Keep the counters when the pool is recreated after a disconnect
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_engine_lock = Lock()
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_pool_settings() -> Dict[str, Any]:
+    """Pool size, overflow, timeout, recycle and pre-ping from the settings"""
+    return {name: getattr(settings, name, default) for name, default in DEFAULT_POOL_SETTINGS.items()}
+
+
+def build_engine(url: str) -> Engine:
+    """Create an engine; server databases get the instrumented, tuned pool"""
+    if url.startswith("sqlite"):
+        # SQLite connections are local files (or memory); keep SQLAlchemy's default pool
+        return create_engine(url)
+
+    pool = get_pool_settings()
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool["SQLALCHEMY_POOL_SIZE"],
+        max_overflow=pool["SQLALCHEMY_MAX_OVERFLOW"],
+        pool_timeout=pool["SQLALCHEMY_POOL_TIMEOUT"],
+        pool_recycle=pool["SQLALCHEMY_POOL_RECYCLE"],
+        pool_pre_ping=pool["SQLALCHEMY_POOL_PRE_PING"],
+    )
+
+
+def get_engine() -> Engine:
+    """The process-wide engine for SQLALCHEMY_DATABASE_URL, created on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = build_engine(settings.SQLALCHEMY_DATABASE_URL)
+                logger.info(f"Created SQLAlchemy engine with pool {_engine.pool.status()}")
+    return _engine
+
+
+def get_session_factory() -> sessionmaker:
+    """Session factory bound to the process-wide engine"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _session_factory
+
+
+def create_session() -> Session:
+    """A new session; it only checks a connection out of the pool when first used"""
+    return get_session_factory()()
+
+
+def set_engine(engine: Optional[Engine]) -> None:
+    """Replace the process-wide engine (tests and scripts); None disposes it"""
+    global _engine, _session_factory
+    with _engine_lock:
+        if _engine is not None and _engine is not engine:
+            _engine.dispose()
+        _engine = engine
+        _session_factory = None
+
+
+def get_async_database_url() -> str:
+    """
+    URL of the async engine: SQLALCHEMY_ASYNC_DATABASE_URL, or else
+    SQLALCHEMY_DATABASE_URL with its driver replaced by the asyncio one
+    (postgresql:// becomes postgresql+asyncpg://, sqlite:// sqlite+aiosqlite://)
+    """
+    url = getattr(settings, "SQLALCHEMY_ASYNC_DATABASE_URL", None)
+    if url:
+        return url
+    url = make_url(settings.SQLALCHEMY_DATABASE_URL)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No asyncio driver known for {url.get_backend_name()}; set SQLALCHEMY_ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def build_async_engine(url: str) -> AsyncEngine:
+    """Create an asyncio engine; server databases get the same pool settings as the sync engine"""
+    if url.startswith("sqlite"):
+        return create_async_engine(url)
+
+    pool = get_pool_settings()
+    return create_async_engine(
+        url,
+        pool_size=pool["SQLALCHEMY_POOL_SIZE"],
+        max_overflow=pool["SQLALCHEMY_MAX_OVERFLOW"],
+        pool_timeout=pool["SQLALCHEMY_POOL_TIMEOUT"],
+        pool_recycle=pool["SQLALCHEMY_POOL_RECYCLE"],
+        pool_pre_ping=pool["SQLALCHEMY_POOL_PRE_PING"],
+    )
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    The process-wide asyncio engine, created on first use. Its pooled
+    connections belong to the event loop that opened them, so it must only
+    be used from the ASGI server's loop.
+    """
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = build_async_engine(get_async_database_url())
+                logger.info(f"Created SQLAlchemy async engine with pool {_async_engine.pool.status()}")
+    return _async_engine
+
+
+def create_async_session() -> AsyncSession:
+    """A new AsyncSession; like create_session, it connects on first use"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory()
+
+
+def set_async_engine(engine: Optional[AsyncEngine]) -> None:
+    """
+    Replace the process-wide async engine (tests and scripts). The previous
+    one is not disposed, since that needs its event loop; dispose it there.
+    """
+    global _async_engine, _async_session_factory
+    with _engine_lock:
+        _async_engine = engine
+        _async_session_factory = None
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Pool usage for sizing workers against the database's max_connections:
+    connections in use, idle and in overflow, saturation (in use / maximum),
+    and checkout counts and wait times since start or the last reset.
+    """
+    pool = get_engine().pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": pool.__class__.__name__}
+
+    # A negative max_overflow means the pool never blocks, so there is no ceiling
+    capacity = pool.size() + pool._max_overflow if pool._max_overflow >= 0 else 0
+    result = {
+        "pool": pool.__class__.__name__,
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": pool.checkedout() / capacity if capacity > 0 else None,
+    }
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        result.update({
+            "peak_checked_out": stats.peak_checked_out,
+            "peak_saturation": stats.peak_checked_out / capacity if capacity > 0 else None,
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "wait_seconds_total": stats.wait_seconds,
+            "wait_seconds_max": stats.max_wait_seconds,
+            "wait_seconds_avg": stats.wait_seconds / stats.checkouts if stats.checkouts else None,
+        })
+    return result
@@ -0,0 +1,105 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import deque
+from threading import Lock
+import asyncio
+import logging
+import threading
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Events a subscriber may have pending before it is marked as lagging
+DEFAULT_MAX_PENDING = 100
+
+
+class Subscription:
+    """
+    Queue of events for one subscriber.
+
+    Events may be published from any thread. An async subscriber passes its
+    event loop and is woken through it; a sync subscriber blocks on a
+    threading.Event. A subscriber that falls more than `max_pending` events
+    behind loses them and is flagged as lagged instead, so one slow client
+    cannot grow memory without bound.
+    """
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.max_pending = max_pending
+        self._loop = loop
+        self._lock = Lock()
+        self._events: deque = deque()
+        self._lagged = False
+        self._ready = asyncio.Event() if loop is not None else threading.Event()
+
+    def push(self, event: Dict[str, Any]) -> None:
+        """Queue an event and wake the subscriber"""
+        with self._lock:
+            if len(self._events) >= self.max_pending:
+                self._events.clear()
+                self._lagged = True
+            else:
+                self._events.append(event)
+        if self._loop is None:
+            self._ready.set()
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # The subscriber's loop is closed; it is about to unsubscribe
+            pass
+
+    def drain(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """Take the pending events, and whether any were lost since the last drain"""
+        self._ready.clear()
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            lagged, self._lagged = self._lagged, False
+        return events, lagged
+
+    def wait(self, timeout: float) -> bool:
+        """Block until events are pending (sync subscribers); False on timeout"""
+        return self._ready.wait(timeout)
+
+    async def wait_async(self, timeout: float) -> bool:
+        """Wait until events are pending (async subscribers); False on timeout"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class Broadcaster:
+    """In-process fan-out of events to every current subscriber"""
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING):
+        self.max_pending = max_pending
+        self._lock = Lock()
+        self._subscriptions: Set[Subscription] = set()
+        self.published = 0
+
+    def subscribe(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        """Start receiving events; pass the running loop for an async subscriber"""
+        subscription = Subscription(self.max_pending, loop)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop receiving events"""
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Deliver an event to every subscriber"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            self.published += 1
+        for subscription in subscriptions:
+            subscription.push(event)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of subscribers and of events published"""
+        with self._lock:
+            return {"subscribers": len(self._subscriptions), "published": self.published}
@@ -0,0 +1,58 @@
+from typing import Iterable
+import asyncio
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class CancelOnDisconnect:
+    """
+    ASGI middleware that cancels a request when its client disconnects.
+
+    Django 4.2 keeps iterating a streaming response after the client has
+    gone, so an endless stream (such as the change feed) would never end.
+    For requests under `path_prefixes` this reads the body, hands it to the
+    application, and then watches for http.disconnect; when it arrives the
+    application task is cancelled, which closes the response iterator.
+    """
+
+    def __init__(self, app, path_prefixes: Iterable[str]):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            return await self.app(scope, receive, send)
+
+        messages = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            messages.append(message)
+            if not message.get("more_body", False):
+                break
+
+        disconnected = asyncio.Event()
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        app = asyncio.ensure_future(self.app(scope, replay, send))
+        watcher = asyncio.ensure_future(receive())
+        try:
+            await asyncio.wait({app, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not app.done():
+                logger.debug(f"Client disconnected from {scope['path']}")
+                disconnected.set()
+                app.cancel()
+            watcher.cancel()
+        try:
+            await app
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,120 @@
+from typing import Any, AsyncIterator, Callable, Iterator
+import inspect
+import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from sqlalchemy.orm import Session
+from shared.db.engine import create_session
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class _ClosingIterator:
+    """
+    Wraps streaming content so a callback runs once the stream is finished.
+    Django registers close() as a resource closer of StreamingHttpResponse,
+    so it also runs when the client disconnects before reading everything.
+    """
+
+    def __init__(self, content: Iterator[bytes], on_close: Callable[[], None]):
+        self._content = iter(content)
+        self._on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self._content)
+
+    def close(self) -> None:
+        try:
+            close = getattr(self._content, "close", None)
+            if close is not None:
+                close()
+        finally:
+            if self._on_close is not None:
+                on_close, self._on_close = self._on_close, None
+                on_close()
+
+
+async def _aclosing(content: AsyncIterator[bytes], on_close: Callable[[], Any]) -> AsyncIterator[bytes]:
+    """Async counterpart of _ClosingIterator for async streaming content; on_close may be async"""
+    try:
+        async for chunk in content:
+            yield chunk
+    finally:
+        result = on_close()
+        if inspect.isawaitable(result):
+            await result
+
+
+async def _close_session(session: Session) -> None:
+    """
+    Close a session from the event loop. Closing a session that still holds
+    a connection rolls it back over the network, so that runs on a thread.
+    """
+    if session.get_transaction() is None:
+        session.close()
+    else:
+        await sync_to_async(session.close)()
+
+
+class SQLAlchemySessionMiddleware:
+    """
+    Lend one SQLAlchemy session per request as `request.db_session`.
+
+    The session only checks a connection out of the shared pool when it is
+    first used, so requests that never touch the database cost nothing. It
+    is closed (rolling back anything left uncommitted and returning the
+    connection) when the response is complete; for streaming responses that
+    is after the last chunk has been sent.
+
+    Under ASGI the middleware runs as a coroutine, so async views are not
+    handed to a thread just to pass through it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        session = create_session()
+        request.db_session = session
+        try:
+            response = self.get_response(request)
+        except Exception:
+            session.close()
+            raise
+
+        if getattr(response, "streaming", False) and getattr(response, "is_async", False):
+            response.streaming_content = _aclosing(response.streaming_content, session.close)
+        elif getattr(response, "streaming", False):
+            response.streaming_content = _ClosingIterator(response.streaming_content, session.close)
+        else:
+            session.close()
+        return response
+
+    async def __acall__(self, request):
+        session = create_session()
+        request.db_session = session
+        try:
+            response = await self.get_response(request)
+        except Exception:
+            await _close_session(session)
+            raise
+
+        if getattr(response, "streaming", False) and getattr(response, "is_async", False):
+            response.streaming_content = _aclosing(response.streaming_content, lambda: _close_session(session))
+        elif getattr(response, "streaming", False):
+            # Sync content is iterated, and closed, on a thread
+            response.streaming_content = _ClosingIterator(response.streaming_content, session.close)
+        else:
+            await _close_session(session)
+        return response
@@ -0,0 +1,55 @@
+from typing import Any, Dict
+import base64
+import hashlib
+import json
+
+# Integers in a position must fit the BIGINT id column
+MAX_POSITION_INT = 2 ** 63
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be used for the current query"""
+
+
+def fingerprint(params: Dict[str, Any]) -> str:
+    """Short stable digest of the query a cursor belongs to"""
+    normalized = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def is_position(position: Any) -> bool:
+    """Check the {"key", "id"} shape of the keyset positions that get_page returns"""
+    def is_int(value: Any) -> bool:
+        return type(value) is int and -MAX_POSITION_INT <= value < MAX_POSITION_INT
+
+    if not isinstance(position, dict) or set(position) != {"key", "id"}:
+        return False
+    key = position["key"]
+    return is_int(position["id"]) and (is_int(key) or type(key) in (float, str))
+
+
+def encode_cursor(position: Dict[str, Any], params: Dict[str, Any]) -> str:
+    """Encode a keyset position as an opaque URL-safe cursor"""
+    payload = {"p": position, "q": fingerprint(params)}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises InvalidCursorError if the cursor is malformed, holds something
+    other than a keyset position or was issued for a different query.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        position = payload["p"]
+        issued_for = payload["q"]
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise InvalidCursorError("Invalid cursor")
+    if not is_position(position):
+        raise InvalidCursorError("Invalid cursor")
+    if issued_for != fingerprint(params):
+        raise InvalidCursorError("Cursor does not match the query parameters")
+    return position